@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token
 import time
@@ -6,13 +6,29 @@ import logging
 import json
 import os
 from datetime import datetime
+from functools import wraps
 from dotenv import load_dotenv
 
 # Import routes
-from controllers.drone_controller import DroneController
-from controllers.mapping_controller import MappingController, mapping_bp
-from controllers.detection_controller import DetectionController
-from controllers.mock_controller import MockController
+from controllers.drone_session import SessionRegistry, request_drone_id
+from controllers.mapping_controller import mapping_bp
+from services.downsample import DOWNSAMPLE_METHODS
+from services.flight_log import DEFAULT_FLIGHT_LOG_DIRECTORY, FlightLog
+from services.fleet_planner import plan_fleet
+from services.geo import as_latlon_array
+from services.revisit_route import DEFAULT_TIME_BUDGET
+from services.telemetry_ingest import TelemetryIngest
+from services.telemetry_replay import parse_speed
+from services.telemetry_stats import TelemetryStatsRegistry
+from services.telemetry_codec import CONTENT_TYPE as TELEMETRY_CONTENT_TYPE
+from services.telemetry_codec import STREAM_CONTENT_TYPE as TELEMETRY_STREAM_CONTENT_TYPE
+from services.telemetry_codec import encode_frame
+from services.telemetry_store import DEFAULT_DRONE_ID, TelemetryStore, parse_fields, parse_timestamp, validate_drone_id
+from services.telemetry_stream import (DEFAULT_STREAM_RATE, TelemetryBroadcaster, binary_events, parse_queue_size,
+                                      sse_events)
+from services.terrain import DEFAULT_EXPORT_CELL_SIZE, TerrainModel, export_shape
+from services.waypoint_array import CONTENT_TYPE as WAYPOINT_CONTENT_TYPE
+from services.waypoint_simplify import DEFAULT_SIMPLIFY_TOLERANCE
 
 # Load environment variables
 load_dotenv()
@@ -65,52 +81,108 @@ logging.basicConfig(
 )
 logger = logging.getLogger('api')
 
-# Initialize controllers
-drone_controller = DroneController()
-mapping_controller = MappingController()
-detection_controller = DetectionController()
-mock_controller = MockController()
+# Elevation tiles from DEM_DIRECTORY, shared by terrain following and terrain export
+terrain_model = TerrainModel()
 
-# Global state
-mock_mode = True  # Start in mock mode by default
+# Fixed-size telemetry history per drone
+telemetry_store = TelemetryStore()
+
+# Rolling trends (climb rate, average ground speed, battery drain) of each drone's telemetry
+telemetry_stats = TelemetryStatsRegistry()
+
+# Every sample of every drone goes out to the stream clients from here, with its drone's trends
+telemetry_broadcaster = TelemetryBroadcaster(stats=telemetry_stats)
+
+# Telemetry pushed by any number of drone links, over TCP on TELEMETRY_INGEST_PORT or over HTTP
+telemetry_ingest = TelemetryIngest(telemetry_store, telemetry_broadcaster)
+ingest_port = os.getenv('TELEMETRY_INGEST_PORT')
+
+@app.before_request
+def start_telemetry_ingest():
+    # Bound by the first request, so only the serving process listens (not the reloader's parent)
+    global ingest_port
+    if ingest_port and telemetry_ingest.server is None:
+        try:
+            telemetry_ingest.listen(os.getenv('TELEMETRY_INGEST_HOST', '0.0.0.0'), int(ingest_port))
+        except OSError as e:
+            logger.error(f"Cannot accept telemetry links on port {ingest_port}: {e}")
+            ingest_port = None
+
+# Every connection records a flight log under FLIGHT_LOG_DIRECTORY/<drone id>/<flight>
+flight_log_directory = os.getenv('FLIGHT_LOG_DIRECTORY', DEFAULT_FLIGHT_LOG_DIRECTORY)
+
+# One session per drone id with its own controllers, mode, telemetry producer and lock. Routes
+# act on the drone named by `droneId` (query string or JSON body), the default drone otherwise.
+sessions = SessionRegistry(
+    telemetry_store, telemetry_broadcaster, terrain_model, flight_log_directory,
+    rate=float(os.getenv('TELEMETRY_RATE', DEFAULT_STREAM_RATE))
+)
+app.extensions['drone_sessions'] = sessions
+# The default drone always has a session, so single-drone clients work without a droneId
+sessions.get(DEFAULT_DRONE_ID)
+
+def drone_route(locked=True, create=False):
+    """
+    Pass the requesting drone's session to the route as its first argument. With `locked`, the
+    route holds the session lock; routes that only read telemetry, or must not wait behind a
+    long operation on the same drone (safety commands), run without it. Only routes that set a
+    drone up (`create`) start a session for a new drone id; the others answer 404 for one, so
+    arbitrary ids cannot make the server keep state for them.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                session = sessions.for_request(create)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            if session is None:
+                return jsonify({'success': False, 'message': f"Unknown drone: {request_drone_id()}"}), 404
+            if not locked:
+                return fn(session, *args, **kwargs)
+            with session.lock:
+                return fn(session, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def flight_log_path(drone_id, flight):
+    """Directory of a recorded flight; names are single path components"""
+    for name in (drone_id, flight):
+        if not name or name.startswith('.') or os.path.basename(name) != name:
+            raise ValueError(f"Invalid flight log name: {name}")
+    return os.path.join(flight_log_directory, drone_id, flight)
 
 @app.route('/api/status', methods=['GET'])
-def get_status():
+@drone_route(locked=False)
+def get_status(session):
     """Get the overall system status"""
     return jsonify({
         'success': True,
-        'mockMode': mock_mode,
-        'connected': drone_controller.is_connected(),
+        'droneId': session.drone_id,
+        'mockMode': session.mock_mode,
+        'connected': session.drone_controller.is_connected(),
         'timestamp': datetime.now().isoformat()
     })
 
 @app.route('/api/mode', methods=['POST'])
-def set_mode():
-    """Switch between mock and production modes"""
-    global mock_mode
+@drone_route(create=True)
+def set_mode(session):
+    """Switch a drone between mock and production modes"""
     data = request.json
     if 'mode' not in data:
         return jsonify({'success': False, 'message': 'Mode parameter is required'}), 400
     
-    new_mode = data['mode'].upper() == 'MOCK'
-    if mock_mode != new_mode:
-        mock_mode = new_mode
-        logger.info(f"Switched to {'MOCK' if mock_mode else 'PRODUCTION'} mode")
-        
-        # Update controllers with new mode
-        drone_controller.set_mock_mode(mock_mode)
-        mapping_controller.set_mock_mode(mock_mode)
-        detection_controller.set_mock_mode(mock_mode)
-        
-        if mock_mode:
-            mock_controller.start()
-        else:
-            mock_controller.stop()
-    
-    return jsonify({'success': True, 'mockMode': mock_mode})
+    session.set_mock_mode(data['mode'].upper() == 'MOCK')
+    return jsonify({'success': True, 'droneId': session.drone_id, 'mockMode': session.mock_mode})
+
+@app.route('/api/drones', methods=['GET'])
+def list_drones():
+    """List the drones the server has a session for"""
+    return jsonify({'success': True, 'drones': [session.status() for session in sessions.list()]})
 
 @app.route('/api/drone/connect', methods=['POST'])
-def connect_drone():
+@drone_route(create=True)
+def connect_drone(session):
     """Connect to the drone"""
     data = request.json
     connection_type = data.get('connectionType', 'Wi-Fi')
@@ -118,17 +190,21 @@ def connect_drone():
     port = data.get('port', 8080)
     
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate connection
-            success = mock_controller.connect()
+            success = session.mock_controller.connect()
             message = "Connected to mock drone"
         else:
             # In production mode, connect to real drone
-            success = drone_controller.connect(connection_type, ip, port)
+            success = session.drone_controller.connect(connection_type, ip, port)
             message = f"Connected to drone at {ip}:{port}"
         
         if success:
             logger.info(message)
+            # The live link takes over from any replay
+            session.stop_replay()
+            session.start_flight_log()
+            session.producer.start()
             return jsonify({'success': True, 'message': message})
         else:
             logger.error("Failed to connect to drone")
@@ -138,20 +214,22 @@ def connect_drone():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/drone/disconnect', methods=['POST'])
-def disconnect_drone():
+@drone_route()
+def disconnect_drone(session):
     """Disconnect from the drone"""
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate disconnection
-            success = mock_controller.disconnect()
+            success = session.mock_controller.disconnect()
             message = "Disconnected from mock drone"
         else:
             # In production mode, disconnect from real drone
-            success = drone_controller.disconnect()
+            success = session.drone_controller.disconnect()
             message = "Disconnected from drone"
         
         if success:
             logger.info(message)
+            session.stop_flight_log()
             return jsonify({'success': True, 'message': message})
         else:
             logger.error("Failed to disconnect from drone")
@@ -161,27 +239,286 @@ def disconnect_drone():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/telemetry', methods=['GET'])
-def get_telemetry():
+@drone_route(locked=False)
+def get_telemetry(session):
     """Get the latest telemetry data"""
     try:
-        if mock_mode:
+        if session.replaying():
+            telemetry = session.replay.get_telemetry()
+        elif session.mock_mode:
             # In mock mode, get mock telemetry
-            telemetry = mock_controller.get_telemetry()
+            telemetry = session.mock_controller.get_telemetry()
         else:
             # In production mode, get real telemetry
-            telemetry = drone_controller.get_telemetry()
+            telemetry = session.drone_controller.get_telemetry()
         
+        timestamp = datetime.now()
+        if telemetry and not session.producer.running and not session.replaying():
+            # Once the producer or a replay runs, it records every sample itself
+            telemetry_store.append(session.drone_id, telemetry, timestamp.timestamp())
+            stats = telemetry_stats.update(session.drone_id, telemetry, timestamp.timestamp())
+        else:
+            stats = telemetry_stats.snapshot(session.drone_id)
+        # Clients that ask for it get one compact binary frame instead of JSON
+        if telemetry and request.accept_mimetypes.best_match(['application/json', TELEMETRY_CONTENT_TYPE]) == TELEMETRY_CONTENT_TYPE:
+            return Response(encode_frame(0, telemetry, timestamp.timestamp(), session.drone_id), mimetype=TELEMETRY_CONTENT_TYPE)
         return jsonify({
             'success': True,
             'telemetry': telemetry,
-            'timestamp': datetime.now().isoformat()
+            'stats': stats,
+            'timestamp': timestamp.isoformat()
         })
     except Exception as e:
         logger.exception("Error getting telemetry")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/telemetry/stream', methods=['GET'])
+def stream_telemetry():
+    """
+    Push telemetry frames as server-sent events instead of polling /api/telemetry. Like the
+    other routes, the stream is of the drone named by droneId, the default drone otherwise;
+    allDrones=true streams every drone's frames, each tagged with its droneId. Drones that only
+    push telemetry through the ingest have no session, but their frames stream all the same.
+    """
+    all_drones = request.args.get('allDrones', 'false').lower() == 'true'
+    try:
+        session = sessions.for_request()
+        drone_id = None if all_drones else validate_drone_id(request_drone_id())
+        queue_size = parse_queue_size(request.args.get('queue'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if session is not None and not session.replaying():
+        session.producer.start()
+    subscription = telemetry_broadcaster.subscribe(queue_size, drone_id)
+    if request.accept_mimetypes.best_match(['text/event-stream', TELEMETRY_STREAM_CONTENT_TYPE]) == TELEMETRY_STREAM_CONTENT_TYPE:
+        # Length-prefixed binary frames, delta-encoded per client
+        return Response(
+            binary_events(telemetry_broadcaster, subscription),
+            mimetype=TELEMETRY_STREAM_CONTENT_TYPE,
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    return Response(
+        sse_events(telemetry_broadcaster, subscription),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/telemetry/stream/stats', methods=['GET'])
+def get_telemetry_stream_stats():
+    """Get telemetry streaming statistics"""
+    stats = telemetry_broadcaster.stats()
+    stats['producers'] = {
+        session.drone_id: {
+            'running': session.producer.running,
+            'rate': 1.0 / session.producer.interval,
+            'errors': session.producer.errors
+        }
+        for session in sessions.list()
+    }
+    return jsonify({'success': True, 'stream': stats})
+
+@app.route('/api/telemetry/ingest', methods=['POST'])
+def ingest_telemetry():
+    """
+    Push telemetry from a drone link: one {'droneId', 'timestamp', 'telemetry'} frame or a list
+    of them. Answers 503 while the ingestion pipeline is overloaded.
+    """
+    data = request.get_json(silent=True)
+    frames = data if isinstance(data, list) else [data]
+    accepted, malformed = telemetry_ingest.submit(frames)
+    if accepted == 0 and malformed < len(frames):
+        return jsonify({'success': False, 'message': "Telemetry ingestion overloaded"}), 503
+    return jsonify({
+        'success': malformed == 0,
+        'accepted': accepted,
+        'malformed': malformed
+    }), 200 if accepted else 400
+
+@app.route('/api/telemetry/ingest/stats', methods=['GET'])
+def get_telemetry_ingest_stats():
+    """Get per-drone ingestion counters"""
+    return jsonify({'success': True, 'ingest': telemetry_ingest.stats()})
+
+@app.route('/api/telemetry/history', methods=['GET'])
+def get_telemetry_history():
+    """
+    Get recorded telemetry between `from` and `to` (Unix seconds or ISO 8601) as columns.
+    With maxPoints, each field comes back as its own series downsampled to at most that many
+    points (method=lttb, or minmax for a min/max envelope).
+    """
+    try:
+        drone_id = request_drone_id()
+        start = parse_timestamp(request.args.get('from'))
+        stop = parse_timestamp(request.args.get('to'))
+        fields = parse_fields(request.args.get('fields'))
+        max_points = request.args.get('maxPoints', type=int)
+        method = request.args.get('method', 'lttb')
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        if max_points is not None and max_points <= 0:
+            raise ValueError("maxPoints must be positive")
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        if max_points is not None:
+            series = telemetry_store.series(drone_id, start, stop, fields, max_points, method)
+            return jsonify({
+                'success': True,
+                'droneId': drone_id,
+                'method': method,
+                'series': series
+            })
+        history = telemetry_store.history(drone_id, start, stop, fields)
+        return jsonify({
+            'success': True,
+            'droneId': drone_id,
+            'count': len(history['time']),
+            'history': history
+        })
+    except Exception as e:
+        logger.exception("Error getting telemetry history")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/flightlogs', methods=['GET'])
+def list_flight_logs():
+    """List recorded flight logs, newest first"""
+    flights = []
+    try:
+        drone_ids = sorted(os.listdir(flight_log_directory)) if os.path.isdir(flight_log_directory) else []
+        for drone_id in drone_ids:
+            drone_directory = os.path.join(flight_log_directory, drone_id)
+            if not os.path.isdir(drone_directory):
+                continue
+            for flight in sorted(os.listdir(drone_directory), reverse=True):
+                log = FlightLog(os.path.join(drone_directory, flight))
+                flights.append(dict(log.summary(), droneId=drone_id, flight=flight))
+        return jsonify({
+            'success': True,
+            'flights': flights,
+            'recording': {
+                session.drone_id: session.producer.recorder.stats()
+                for session in sessions.list() if session.producer.recorder is not None
+            }
+        })
+    except Exception as e:
+        logger.exception("Error listing flight logs")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/flightlogs/<drone_id>/<flight>', methods=['GET'])
+def get_flight_log(drone_id, flight):
+    """
+    Get a recorded flight's telemetry between `from` and `to`, with the same parameters and
+    response as /api/telemetry/history
+    """
+    try:
+        path = flight_log_path(drone_id, flight)
+        start = parse_timestamp(request.args.get('from'))
+        stop = parse_timestamp(request.args.get('to'))
+        fields = parse_fields(request.args.get('fields'))
+        max_points = request.args.get('maxPoints', type=int)
+        method = request.args.get('method', 'lttb')
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"Unknown downsampling method: {method}")
+        if max_points is not None and max_points <= 0:
+            raise ValueError("maxPoints must be positive")
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if not os.path.isdir(path):
+        return jsonify({'success': False, 'message': f"No flight log {drone_id}/{flight}"}), 404
+    
+    try:
+        session = sessions.find(drone_id)
+        recorder = session.producer.recorder if session is not None else None
+        if recorder is not None and os.path.abspath(recorder.directory) == os.path.abspath(path):
+            # Include what the live recorder still buffers
+            recorder.flush()
+        log = FlightLog(path)
+        if max_points is not None:
+            return jsonify({
+                'success': True,
+                'droneId': drone_id,
+                'flight': flight,
+                'method': method,
+                'series': log.series(start, stop, fields, max_points, method)
+            })
+        history = log.history(start, stop, fields)
+        return jsonify({
+            'success': True,
+            'droneId': drone_id,
+            'flight': flight,
+            'count': len(history['time']),
+            'history': history
+        })
+    except Exception as e:
+        logger.exception("Error reading flight log")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/replay', methods=['GET'])
+@drone_route(locked=False)
+def get_replay_status(session):
+    """Get the state of the drone's flight replay"""
+    replay = session.replay
+    return jsonify({'success': True, 'droneId': session.drone_id, 'replay': replay.status() if replay is not None else None})
+
+@app.route('/api/replay/start', methods=['POST'])
+@drone_route(create=True)
+def start_replay(session):
+    """
+    Replay a recorded flight into the drone's telemetry history, streams and detections in place
+    of its link. The flight is one of sourceDroneId's (the drone's own by default), so a single
+    recording can drive any number of drones. speed is a multiplier or 'max'; offset is seconds
+    into the flight.
+    """
+    data = request.get_json(silent=True) or {}
+    source_drone_id = data.get('sourceDroneId', session.drone_id)
+    try:
+        path = flight_log_path(source_drone_id, data.get('flight', ''))
+        speed = parse_speed(data.get('speed', 1.0))
+        offset = float(data.get('offset', 0.0))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if not os.path.isdir(path):
+        return jsonify({'success': False, 'message': f"No flight log {source_drone_id}/{data.get('flight')}"}), 404
+    
+    try:
+        replay = session.start_replay(FlightLog(path), speed, bool(data.get('loop', False)), offset)
+        logger.info(f"Replaying flight log {path} as {session.drone_id} at {data.get('speed', 1.0)}x")
+        return jsonify({'success': True, 'droneId': session.drone_id, 'replay': replay.status()})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error starting replay")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/replay/<action>', methods=['POST'])
+@drone_route()
+def control_replay(session, action):
+    """Pause, resume, seek (offset seconds into the flight), set the speed of or stop the replay"""
+    replay = session.replay
+    if replay is None:
+        return jsonify({'success': False, 'message': "No replay running"}), 400
+    data = request.get_json(silent=True) or {}
+    try:
+        if action == 'pause':
+            replay.pause()
+        elif action == 'resume':
+            replay.resume()
+        elif action == 'seek':
+            replay.seek(replay.start_time + float(data['offset']))
+        elif action == 'speed':
+            replay.set_speed(parse_speed(data['speed']))
+        elif action == 'stop':
+            session.stop_replay()
+        else:
+            return jsonify({'success': False, 'message': f"Unknown replay action: {action}"}), 404
+    except (KeyError, ValueError) as e:
+        return jsonify({'success': False, 'message': f"Invalid replay parameter: {e}"}), 400
+    return jsonify({'success': True, 'droneId': session.drone_id, 'replay': replay.status()})
+
 @app.route('/api/drone/mission', methods=['POST'])
-def create_mission():
+@drone_route(create=True)
+def create_mission(session):
     """Create a new mission plan"""
     data = request.json
     
@@ -193,43 +530,282 @@ def create_mission():
         capture_interval = float(data.get('captureInterval', 0.5))
         directional_capture = data.get('useDirectionalCapture', True)
         spotlight_enabled = data.get('useSpotlight', False)
-        
-        if mock_mode:
+        area = data.get('area')  # Optional search polygon as [[lat, lon], ...]
+        holes = data.get('holes')  # Optional no-fly rings inside the area; the path goes around them
+        track_spacing = float(data.get('trackSpacing', 10))
+        heading = float(data.get('heading', 0))
+        optimize = data.get('optimize', False)  # Search for the fastest sweep heading
+        datum = data.get('datum')  # Last known position [lat, lon] for pattern searches
+        waypoint_format = data.get('waypointFormat', 'json')  # 'binary' omits the waypoint list
+        battery = data.get('battery')  # Battery model; when given the mission is split into sorties
+        home = data.get('home')  # Launch/battery-swap point [lat, lon]
+        terrain_clearance = data.get('terrainClearance')  # Height above ground; enables terrain following
+        if terrain_clearance is not None:
+            terrain_clearance = float(terrain_clearance)
+        incremental = data.get('incremental', False)  # Re-plan only what the area change touches
+        flown_waypoints = int(data.get('flownWaypoints', 0))  # Waypoints already flown, kept as they are
+        targets = data.get('targets')  # Points [lat, lon] for Object Tracking; defaults to the detections
+        time_budget = float(data.get('timeBudget', DEFAULT_TIME_BUDGET))  # Seconds to spend optimizing the route
+        if mission_type == 'Object Tracking' and targets is None:
+            targets = session.detection_controller.get_detection_points(data.get('detectionTypes'))
+        if terrain_clearance is not None and len(terrain_model) == 0:
+            # Valid request, but the server has no DEM tiles to follow yet
+            return jsonify({'success': False, 'message': 'Terrain following requested but no terrain model is loaded'}), 409
+
+        if session.mock_mode:
             # In mock mode, create mock mission
-            mission = mock_controller.create_mission(
-                mission_type, grid_size, altitude, speed, 
-                capture_interval, directional_capture, spotlight_enabled
+            mission = session.mock_controller.create_mission(
+                mission_type, grid_size, altitude, speed,
+                capture_interval, directional_capture, spotlight_enabled,
+                area=area, track_spacing=track_spacing, heading=heading, holes=holes,
+                optimize=optimize, datum=datum, waypoint_format=waypoint_format,
+                battery=battery, home=home, terrain_clearance=terrain_clearance,
+                incremental=incremental, flown_waypoints=flown_waypoints,
+                targets=targets, time_budget=time_budget
             )
         else:
             # In production mode, create real mission
-            mission = drone_controller.create_mission(
+            mission = session.drone_controller.create_mission(
                 mission_type, grid_size, altitude, speed,
-                capture_interval, directional_capture, spotlight_enabled
+                capture_interval, directional_capture, spotlight_enabled,
+                area=area, track_spacing=track_spacing, heading=heading, holes=holes,
+                optimize=optimize, datum=datum, waypoint_format=waypoint_format,
+                battery=battery, home=home, terrain_clearance=terrain_clearance,
+                incremental=incremental, flown_waypoints=flown_waypoints,
+                targets=targets, time_budget=time_budget
             )
         
-        logger.info(f"Created {mission_type} mission with {len(mission['waypoints'])} waypoints")
+        # Mapping status (served by the blueprint) reports progress against the trigger schedule
+        if session.mock_mode:
+            schedule = session.mock_controller.get_trigger_schedule()
+        else:
+            schedule = session.drone_controller.get_trigger_schedule()
+        session.mapping_controller.set_trigger_schedule(schedule)
+        
+        logger.info(f"Created {mission_type} mission with {mission['waypointCount']} waypoints")
         return jsonify({
             'success': True,
             'mission': mission
         })
+    except (TypeError, ValueError) as e:
+        # Malformed parameters, or ones the planners cannot plan with, e.g. Object Tracking without targets
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         logger.exception("Error creating mission")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/drone/mission/triggers', methods=['GET'])
+@drone_route()
+def get_mission_triggers(session):
+    """Get the camera trigger schedule of the current mission"""
+    try:
+        if session.mock_mode:
+            schedule = session.mock_controller.get_trigger_schedule()
+        else:
+            schedule = session.drone_controller.get_trigger_schedule()
+        
+        return jsonify({'success': True, 'triggers': schedule.to_dict()})
+    except Exception as e:
+        logger.exception("Error getting trigger schedule")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/drone/mission/cache', methods=['GET'])
+@drone_route()
+def get_mission_cache(session):
+    """Get mission plan cache statistics"""
+    # The plan cache belongs to the drone controller in either mode
+    stats = session.drone_controller.get_plan_cache_stats()
+    return jsonify({'success': True, 'cache': stats})
+
+@app.route('/api/drone/mission/cache/invalidate', methods=['POST'])
+@drone_route()
+def invalidate_mission_cache(session):
+    """Invalidate cached mission plans after a geofence or terrain change"""
+    data = request.get_json(silent=True) or {}
+    reason = data.get('reason')  # 'geofence', 'terrain' or omitted for a plain flush
+    
+    try:
+        session.drone_controller.invalidate_plans(reason)
+        
+        logger.info(f"Mission plan cache invalidated ({reason or 'manual'})")
+        return jsonify({'success': True, 'message': "Mission plan cache invalidated"})
+    except Exception as e:
+        logger.exception("Error invalidating mission plan cache")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/drone/mission/waypoints', methods=['GET'])
+@drone_route()
+def get_mission_waypoints(session):
+    """Get the current mission's (or one sortie's) waypoints in the compact binary format"""
+    try:
+        sortie = request.args.get('sortie', type=int)
+        if sortie is not None:
+            # One battery sortie, ending with its return-to-home leg
+            if session.mock_mode:
+                waypoints = session.mock_controller.get_sortie_waypoints(sortie)
+            else:
+                waypoints = session.drone_controller.get_sortie_waypoints(sortie)
+        elif session.mock_mode:
+            waypoints = session.mock_controller.get_waypoints()
+        else:
+            waypoints = session.drone_controller.get_waypoints()
+        
+        if request.args.get('format') == 'json':
+            return jsonify({'success': True, 'waypoints': waypoints.to_dicts()})
+        return Response(waypoints.encode(), mimetype=WAYPOINT_CONTENT_TYPE)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error getting mission waypoints")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/drone/mission/sorties', methods=['POST'])
+@drone_route()
+def segment_mission(session):
+    """Split the current mission into battery sorties with return-to-home legs"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        battery = data.get('battery', {})
+        if session.mock_mode:
+            report = session.mock_controller.segment_mission(battery)
+        else:
+            report = session.drone_controller.segment_mission(battery)
+        
+        return jsonify({'success': True, 'sorties': report})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error segmenting mission")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/terrain', methods=['GET'])
+def get_terrain_status():
+    """Get the loaded terrain model's tiles and cache state"""
+    return jsonify({'success': True, 'terrain': terrain_model.stats()})
+
+@app.route('/api/terrain/reload', methods=['POST'])
+def reload_terrain():
+    """Rescan the DEM directory and drop plans built on the previous terrain"""
+    try:
+        terrain_model.reload()
+    except Exception as e:
+        logger.exception("Error reloading terrain")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    # Plans of every drone were built on the old terrain; the plan caches lock themselves.
+    # Each drone is invalidated on its own, so one failure cannot leave the others stale.
+    failed = []
+    for session in sessions.list():
+        try:
+            session.drone_controller.invalidate_plans('terrain')
+        except Exception:
+            logger.exception(f"Error invalidating mission plans of {session.drone_id}")
+            failed.append(session.drone_id)
+    if failed:
+        return jsonify({'success': False, 'message': f"Plans not invalidated for: {', '.join(failed)}",
+                        'terrain': terrain_model.stats()}), 500
+    return jsonify({'success': True, 'terrain': terrain_model.stats()})
+
+@app.route('/api/terrain/export', methods=['POST'])
+@drone_route()
+def export_terrain(session):
+    """Export the terrain model over an area, or over the current mission when no area is given"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        area = data.get('area')
+        if area:
+            points = as_latlon_array(area)
+            lat, lon = points[:, 0], points[:, 1]
+        else:
+            if session.mock_mode:
+                waypoints = session.mock_controller.get_waypoints()
+            else:
+                waypoints = session.drone_controller.get_waypoints()
+            if len(waypoints) == 0:
+                return jsonify({'success': False, 'message': 'Area parameter or a planned mission is required'}), 400
+            lat, lon = waypoints.lat, waypoints.lon
+        
+        bounds = (float(lat.min()), float(lat.max()), float(lon.min()), float(lon.max()))
+        try:
+            cell_size = float(data.get('cellSize', DEFAULT_EXPORT_CELL_SIZE))
+            # Checked before any file is written: tiny cells would make the grid unbounded
+            export_shape(*bounds, cell_size)
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        result = session.mapping_controller.export_terrain(bounds, data.get('format', 'ASC'), cell_size)
+        
+        if not result.get('success', False):
+            return jsonify(result), 400
+        return jsonify(result)
+    except Exception as e:
+        logger.exception("Error exporting terrain")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/fleet/mission', methods=['POST'])
+def create_fleet_mission():
+    """Split a search area between several drones and plan one mission per drone"""
+    data = request.json
+    
+    try:
+        area = data.get('area')
+        drones = data.get('drones', [])
+        if not area or not drones:
+            return jsonify({'success': False, 'message': 'Area and drones parameters are required'}), 400
+        
+        missions = plan_fleet(
+            area, drones,
+            spacing=float(data.get('trackSpacing', 10)),
+            altitude=float(data.get('altitude', 50)),
+            heading=float(data.get('heading', 0)),
+            holes=data.get('holes'),
+            optimize=data.get('optimize', False)
+        )
+        
+        logger.info(f"Created fleet mission for {len(drones)} drones")
+        return jsonify({
+            'success': True,
+            'missions': missions
+        })
+    except (TypeError, ValueError) as e:
+        # Malformed parameters, or an area or fleet the planner cannot split
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error creating fleet mission")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/drone/mission/upload', methods=['POST'])
-def upload_mission():
+@drone_route()
+def upload_mission(session):
     """Upload mission to drone"""
+    data = request.get_json(silent=True) or {}
+    tolerance = float(data.get('simplifyTolerance', DEFAULT_SIMPLIFY_TOLERANCE))
+    delta = data.get('delta', False)  # Only send what changed since the last upload
+    
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate upload
-            success = mock_controller.upload_mission()
+            if delta:
+                success = session.mock_controller.upload_mission_delta(tolerance)
+            else:
+                success = session.mock_controller.upload_mission(tolerance)
+            report = session.mock_controller.get_upload_report()
         else:
             # In production mode, upload to real drone
-            success = drone_controller.upload_mission()
+            if delta:
+                success = session.drone_controller.upload_mission_delta(tolerance)
+            else:
+                success = session.drone_controller.upload_mission(tolerance)
+            report = session.drone_controller.get_upload_report()
         
         if success:
             logger.info("Mission uploaded to drone")
-            return jsonify({'success': True, 'message': "Mission uploaded successfully"})
+            return jsonify({
+                'success': True,
+                'message': "Mission uploaded successfully",
+                'simplification': report
+            })
         else:
             logger.error("Failed to upload mission")
             return jsonify({'success': False, 'message': "Upload failed"}), 500
@@ -238,15 +814,16 @@ def upload_mission():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/drone/mission/start', methods=['POST'])
-def start_mission():
+@drone_route()
+def start_mission(session):
     """Start mission execution"""
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate mission start
-            success = mock_controller.start_mission()
+            success = session.mock_controller.start_mission()
         else:
             # In production mode, start real mission
-            success = drone_controller.start_mission()
+            success = session.drone_controller.start_mission()
         
         if success:
             logger.info("Mission started")
@@ -259,15 +836,16 @@ def start_mission():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/drone/mission/pause', methods=['POST'])
-def pause_mission():
+@drone_route(locked=False)
+def pause_mission(session):
     """Pause mission execution"""
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate mission pause
-            success = mock_controller.pause_mission()
+            success = session.mock_controller.pause_mission()
         else:
             # In production mode, pause real mission
-            success = drone_controller.pause_mission()
+            success = session.drone_controller.pause_mission()
         
         if success:
             logger.info("Mission paused")
@@ -280,15 +858,16 @@ def pause_mission():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/drone/rth', methods=['POST'])
-def return_to_home():
+@drone_route(locked=False)
+def return_to_home(session):
     """Initiate return to home"""
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate RTH
-            success = mock_controller.return_to_home()
+            success = session.mock_controller.return_to_home()
         else:
             # In production mode, initiate real RTH
-            success = drone_controller.return_to_home()
+            success = session.drone_controller.return_to_home()
         
         if success:
             logger.info("Return to home initiated")
@@ -301,15 +880,16 @@ def return_to_home():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/drone/emergency-stop', methods=['POST'])
-def emergency_stop():
+@drone_route(locked=False)
+def emergency_stop(session):
     """Execute emergency stop"""
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate emergency stop
-            success = mock_controller.emergency_stop()
+            success = session.mock_controller.emergency_stop()
         else:
             # In production mode, execute real emergency stop
-            success = drone_controller.emergency_stop()
+            success = session.drone_controller.emergency_stop()
         
         if success:
             logger.info("Emergency stop executed")
@@ -322,19 +902,20 @@ def emergency_stop():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/drone/spotlight', methods=['POST'])
-def toggle_spotlight():
+@drone_route()
+def toggle_spotlight(session):
     """Toggle AL1 spotlight on/off"""
     data = request.json
     enable = data.get('enable', True)
     brightness = data.get('brightness', 80)
     
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate spotlight toggle
-            success = mock_controller.set_spotlight(enable, brightness)
+            success = session.mock_controller.set_spotlight(enable, brightness)
         else:
             # In production mode, toggle real spotlight
-            success = drone_controller.set_spotlight(enable, brightness)
+            success = session.drone_controller.set_spotlight(enable, brightness)
         
         state = "enabled" if enable else "disabled"
         if success:
@@ -353,19 +934,20 @@ def toggle_spotlight():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/drone/camera', methods=['POST'])
-def configure_camera():
+@drone_route()
+def configure_camera(session):
     """Configure camera settings"""
     data = request.json
     capture_interval = float(data.get('captureInterval', 0.5))
     directional_mode = data.get('directionalMode', True)
     
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate camera configuration
-            success = mock_controller.configure_camera(capture_interval, directional_mode)
+            success = session.mock_controller.configure_camera(capture_interval, directional_mode)
         else:
             # In production mode, configure real camera
-            success = drone_controller.configure_camera(capture_interval, directional_mode)
+            success = session.drone_controller.configure_camera(capture_interval, directional_mode)
         
         mode = "3-Directional" if directional_mode else "Omni-Directional"
         if success:
@@ -384,19 +966,20 @@ def configure_camera():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/mapping/start', methods=['POST'])
-def start_mapping():
+@drone_route()
+def start_mapping(session):
     """Start terrain mapping"""
     data = request.json
     mapping_mode = data.get('mode', '2D Map')
     resolution = data.get('resolution', 'Medium')
     
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate mapping start
-            success = mock_controller.start_mapping(mapping_mode, resolution)
+            success = session.mock_controller.start_mapping(mapping_mode, resolution)
         else:
             # In production mode, start real mapping
-            success = mapping_controller.start_mapping(mapping_mode, resolution)
+            success = session.mapping_controller.start_mapping(mapping_mode, resolution)
         
         if success:
             logger.info(f"Started {mapping_mode} mapping at {resolution} resolution")
@@ -414,15 +997,16 @@ def start_mapping():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/mapping/stop', methods=['POST'])
-def stop_mapping():
+@drone_route()
+def stop_mapping(session):
     """Stop terrain mapping"""
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate mapping stop
-            success = mock_controller.stop_mapping()
+            success = session.mock_controller.stop_mapping()
         else:
             # In production mode, stop real mapping
-            success = mapping_controller.stop_mapping()
+            success = session.mapping_controller.stop_mapping()
         
         if success:
             logger.info("Stopped mapping")
@@ -435,18 +1019,19 @@ def stop_mapping():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/mapping/export', methods=['POST'])
-def export_mapping():
+@drone_route()
+def export_mapping(session):
     """Export mapping data to DJI Terra"""
     data = request.json
     format_type = data.get('format', 'Terra')
     
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate export
-            result = mock_controller.export_mapping(format_type)
+            result = session.mock_controller.export_mapping(format_type)
         else:
             # In production mode, export real data
-            result = mapping_controller.export_mapping(format_type)
+            result = session.mapping_controller.export_mapping(format_type)
         
         if result['success']:
             logger.info(f"Exported mapping data to {format_type} format")
@@ -464,7 +1049,8 @@ def export_mapping():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/detection/settings', methods=['POST'])
-def configure_detection():
+@drone_route()
+def configure_detection(session):
     """Configure object detection settings"""
     data = request.json
     detection_mode = data.get('mode', 'Combined')
@@ -473,14 +1059,14 @@ def configure_detection():
     alert_settings = data.get('alerts', {})
     
     try:
-        if mock_mode:
+        if session.mock_mode:
             # In mock mode, simulate configuration
-            success = mock_controller.configure_detection(
+            success = session.mock_controller.configure_detection(
                 detection_mode, sensitivity, min_confidence, alert_settings
             )
         else:
             # In production mode, configure real detection
-            success = detection_controller.configure_detection(
+            success = session.detection_controller.configure_detection(
                 detection_mode, sensitivity, min_confidence, alert_settings
             )
         
@@ -501,9 +1087,10 @@ def configure_detection():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/api/mock/settings', methods=['POST'])
-def configure_mock():
+@drone_route()
+def configure_mock(session):
     """Configure mock data settings"""
-    if not mock_mode:
+    if not session.mock_mode:
         return jsonify({'success': False, 'message': "Not in mock mode"}), 400
     
     data = request.json
@@ -512,7 +1099,7 @@ def configure_mock():
     update_rate = int(data.get('updateRate', 1000))
     
     try:
-        success = mock_controller.configure(flight_path, detection_freq, update_rate)
+        success = session.mock_controller.configure(flight_path, detection_freq, update_rate)
         
         if success:
             logger.info(f"Configured mock data: {flight_path} path with {detection_freq} detections")
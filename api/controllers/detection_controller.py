@@ -26,6 +26,8 @@ class DetectionController:
             'Vehicles': 0,
             'Other': 0
         }
+        # Called with every accepted detection, e.g. to record it in the flight log
+        self.on_detection = None
         
     def set_mock_mode(self, mock_mode):
         """Set controller to mock or production mode"""
@@ -72,6 +74,14 @@ class DetectionController:
         """Get list of recent detections"""
         return self.detections[:limit]
     
+    def get_detection_points(self, detection_types=None):
+        """Locations [lat, lon] of the collected detections, optionally only of the given types"""
+        return [
+            [d['location']['lat'], d['location']['lng']]
+            for d in self.detections
+            if detection_types is None or d['type'] in detection_types
+        ]
+    
     def add_detection(self, detection_type, confidence, latitude, longitude):
         """Add a new detection"""
         if confidence < self.min_confidence:
@@ -116,6 +126,8 @@ class DetectionController:
                 
             if should_alert:
                 self.trigger_alert(detection)
+            if self.on_detection is not None:
+                self.on_detection(detection)
                 
             self.logger.info(f"New detection: {detection_type} with {confidence}% confidence")
             return detection
@@ -2,6 +2,40 @@ import logging
 import time
 from datetime import datetime
 
+import numpy as np
+
+from services.geo import DEFAULT_HOME, LocalFrame, square_area
+from services.incremental_plan import LanePlan
+from services.search_grid import SearchArea, generate_search_grid
+from services.camera_triggers import TriggerSchedule, plan_trigger_schedule
+from services.coverage_optimizer import optimize_coverage
+from services.mission_cache import MissionPlanCache
+from services.revisit_route import DEFAULT_TIME_BUDGET, plan_revisit_route
+from services.sortie_planner import BatteryModel, MissionProfile, sortie_report, sortie_waypoints
+from services.search_patterns import PATTERNS, generate_pattern
+from services.waypoint_builder import WaypointBuilder
+from services.waypoint_simplify import (DEFAULT_SIMPLIFY_TOLERANCE, UPLOAD_TIME_PER_WAYPOINT,
+                                        resimplify_span, simplification_mask, simplification_report)
+from services.waypoint_array import (CAPTURE_DIRECTIONAL, CAPTURE_PHOTO, CAPTURE_TRIGGER, SPOTLIGHT_ON,
+                                     WaypointArray)
+
+# Lane spacing used when a mission request does not specify one (meters)
+DEFAULT_TRACK_SPACING = 10.0
+
+# Largest waypoint mission the aircraft accepts in one upload
+MAX_MISSION_WAYPOINTS = 65535
+
+def capture_flags(capture_interval, directional_capture, spotlight_enabled):
+    """Per-waypoint action flags for the mission-wide camera and spotlight settings"""
+    flags = 0
+    if capture_interval > 0:
+        flags |= CAPTURE_PHOTO
+    if directional_capture:
+        flags |= CAPTURE_DIRECTIONAL
+    if spotlight_enabled:
+        flags |= SPOTLIGHT_ON
+    return flags
+
 class DroneController:
     """
     Controller for DJI Matrice drone communication.
@@ -14,7 +48,25 @@ class DroneController:
         self.connected = False
         self.mission_loaded = False
         self.mission_active = False
-        self.waypoints = []
+        self.waypoints = WaypointArray.empty()
+        self.uploaded_waypoints = WaypointArray.empty()
+        # Planned index of every uploaded waypoint, and the planned count at upload time
+        self.uploaded_index = None
+        self.uploaded_count = 0
+        # Frame and tolerance the uploaded mission was simplified with; deltas use the same ones
+        self.upload_frame = None
+        self.upload_tolerance = None
+        # (unchanged prefix, unchanged suffix) of the plan since the last upload; None if unchanged
+        self.changed_window = None
+        self.upload_report = {}
+        self.lane_plan = None
+        self.plan_cache = MissionPlanCache()
+        self.trigger_schedule = TriggerSchedule.empty()
+        self.mission_profile = None
+        self.mission_home = DEFAULT_HOME
+        self.terrain = None
+        self.mission_speed = 0.0
+        self.sorties = []
         self.connection_params = {}
         self.spotlight_active = False
         self.spotlight_brightness = 80
@@ -88,79 +140,349 @@ class DroneController:
             self.logger.error(f"Failed to get telemetry: {str(e)}")
             return None
     
-    def create_mission(self, mission_type, grid_size, altitude, speed, capture_interval, directional_capture, spotlight_enabled):
+    def create_mission(self, mission_type, grid_size, altitude, speed, capture_interval, directional_capture, spotlight_enabled,
+                       area=None, track_spacing=DEFAULT_TRACK_SPACING, heading=0.0, holes=None, optimize=False,
+                       datum=None, waypoint_format='json', battery=None, home=None, terrain_clearance=None,
+                       incremental=False, flown_waypoints=0, targets=None, time_budget=DEFAULT_TIME_BUDGET):
         """Create a new mission plan with specified parameters"""
         try:
-            # This would use the DJI SDK to create a real mission plan
-            # For now creating a dummy plan
-            start_lat = 37.7749
-            start_lon = -122.4194
-            
-            waypoints = []
-            if mission_type == 'Search Grid':
-                # Create a simple grid pattern
-                step = 0.0001  # Approx 10m steps
-                steps = int(grid_size / 1000)  # Convert meters to grid steps
-                
-                for i in range(steps):
-                    if i % 2 == 0:
-                        waypoints.append({
-                            'lat': start_lat + i * step, 
-                            'lon': start_lon, 
-                            'alt': altitude
-                        })
-                        waypoints.append({
-                            'lat': start_lat + i * step, 
-                            'lon': start_lon + steps * step, 
-                            'alt': altitude
-                        })
-                    else:
-                        waypoints.append({
-                            'lat': start_lat + i * step, 
-                            'lon': start_lon + steps * step, 
-                            'alt': altitude
-                        })
-                        waypoints.append({
-                            'lat': start_lat + i * step, 
-                            'lon': start_lon, 
-                            'alt': altitude
-                        })
-            
+            builder = self.waypoint_builder(altitude, speed, capture_interval, directional_capture,
+                                            spotlight_enabled, home, terrain_clearance)
+            if area is None:
+                # Without an explicit polygon, search a grid_size square anchored at home
+                area = square_area(DEFAULT_HOME, grid_size)
+
+            replan = None
+            if incremental and self.can_replan(mission_type, track_spacing, heading, optimize, builder):
+                # Re-plan only the lanes the area change touches and keep the rest of the mission
+                search_area = SearchArea(area, holes, frame=self.lane_plan.search_area.frame)
+                lane_plan, delta, replan = self.lane_plan.replan(search_area, flown_waypoints)
+                waypoints = lane_plan.waypoints
+                heading = lane_plan.heading
+                stats = lane_plan.stats(speed)
+                schedule = self.finish_plan(waypoints, stats, speed, capture_interval, track_spacing, terrain_clearance)
+                replan['incremental'] = True
+            else:
+                params = {
+                    'missionType': mission_type,
+                    'gridSize': grid_size,
+                    'altitude': altitude,
+                    'speed': speed,
+                    'captureInterval': capture_interval,
+                    'directionalCapture': directional_capture,
+                    'spotlightEnabled': spotlight_enabled,
+                    'area': area,
+                    'holes': holes,
+                    'trackSpacing': track_spacing,
+                    'heading': heading,
+                    'optimize': optimize,
+                    'datum': datum,
+                    'home': home,
+                    'terrainClearance': terrain_clearance,
+                    'targets': targets,
+                    'timeBudget': time_budget,
+                    # Plans built on other DEM tiles never match, even if an invalidation was missed
+                    'terrain': self.terrain_identity()
+                }
+                # Identical requests are served from the plan cache instead of being re-planned
+                waypoints, stats, heading, schedule, lane_plan = self.plan_cache.get_or_create(params, lambda: self.build_plan(
+                    mission_type, grid_size, speed, capture_interval, area, track_spacing, heading, holes,
+                    optimize, datum, builder, terrain_clearance, home, targets, time_budget
+                ))
+                delta = {'start': 0, 'deleteCount': len(self.waypoints), 'waypoints': waypoints}
+                if incremental:
+                    replan = {'incremental': False}
+
+            incremental_replan = replan is not None and replan['incremental']
+            self.track_change(delta, len(waypoints))
             self.waypoints = waypoints
+            self.lane_plan = lane_plan
+            self.trigger_schedule = schedule
+            # Profiled for battery segmentation when first needed, so re-plans do not pay for it
+            self.mission_profile = None
+            self.mission_home = home or DEFAULT_HOME
+            self.mission_speed = speed
+            self.sorties = []
             mission = {
                 'id': datetime.now().strftime('MISSION-%Y%m%d-%H%M%S'),
                 'type': mission_type,
-                'waypoints': waypoints,
+                # Binary clients fetch the columns from /api/drone/mission/waypoints instead, and an
+                # incremental re-plan only sends the splice in its delta
+                'waypoints': waypoints.to_dicts() if waypoint_format == 'json' and not incremental_replan else [],
+                'waypointCount': len(waypoints),
+                'stats': stats,
                 'params': {
                     'gridSize': grid_size,
                     'altitude': altitude,
                     'speed': speed,
                     'captureInterval': capture_interval,
                     'directionalCapture': directional_capture,
-                    'spotlightEnabled': spotlight_enabled
+                    'spotlightEnabled': spotlight_enabled,
+                    'trackSpacing': track_spacing,
+                    'heading': heading,
+                    'datum': datum,
+                    'terrainClearance': terrain_clearance
                 }
             }
+            if replan is not None:
+                # The waypoint splice that turns the previous plan into this one
+                replan.update({
+                    'start': delta['start'],
+                    'deleteCount': delta['deleteCount'],
+                    'insertCount': len(delta['waypoints']),
+                    'waypoints': delta['waypoints'].to_dicts() if waypoint_format == 'json' else []
+                })
+                mission['delta'] = replan
+            if battery is not None:
+                mission['sorties'] = self.segment_mission(battery)
             
             return mission
         except Exception as e:
             self.logger.error(f"Failed to create mission: {str(e)}")
             raise
     
-    def upload_mission(self):
+    def waypoint_builder(self, altitude, speed, capture_interval, directional_capture, spotlight_enabled,
+                         home=None, terrain_clearance=None):
+        """Waypoint settings for a mission; terrain clearance needs a loaded terrain model"""
+        if terrain_clearance is not None and (self.terrain is None or len(self.terrain) == 0):
+            raise ValueError("Terrain following requested but no terrain model is loaded")
+        return WaypointBuilder(
+            altitude, speed, capture_flags(capture_interval, directional_capture, spotlight_enabled),
+            terrain=self.terrain, clearance=terrain_clearance, home=home
+        )
+    
+    def can_replan(self, mission_type, track_spacing, heading, optimize, builder):
+        """Whether the current mission can be re-planned in place for these parameters"""
+        plan = self.lane_plan
+        if mission_type != 'Search Grid' or plan is None or not plan.lane_ordered:
+            return False
+        # An incremental re-plan keeps the current heading, so optimize only has to agree with it
+        same_heading = optimize or plan.heading == heading
+        return plan.spacing == track_spacing and same_heading and plan.builder.settings() == builder.settings()
+    
+    def build_plan(self, mission_type, grid_size, speed, capture_interval, area, track_spacing, heading, holes,
+                   optimize, datum, builder, terrain_clearance=None, home=None, targets=None,
+                   time_budget=DEFAULT_TIME_BUDGET):
+        """Generate mission waypoints; returns (waypoints, stats, heading flown, trigger schedule, lane plan)"""
+        # This would use the DJI SDK to upload the plan; the geometry is computed locally
+        plan = None
+        lane_plan = None
+        stats = {}
+        if mission_type == 'Search Grid':
+            search_area = SearchArea(area, holes)
+            if optimize:
+                # Search candidate headings/decompositions for the fastest coverage
+                result = optimize_coverage(search_area, track_spacing, speed, default_heading=heading)
+                plan = result.plan
+                heading = result.heading
+                stats = result.to_dict()
+            else:
+                plan = generate_search_grid(search_area, track_spacing, heading=heading)
+                stats = {
+                    'turns': plan.turn_count,
+                    'pathLength': plan.path_length(),
+                    'estimatedFlightTime': plan.estimate_flight_time(speed)
+                }
+            stats['lanes'] = plan.lane_count
+            # Sweeps keep their segments so later area changes can be re-planned incrementally
+            lane_plan = LanePlan.from_sweep(search_area, plan, builder)
+            waypoints = lane_plan.waypoints
+        elif mission_type in PATTERNS:
+            # IAMSAR patterns are placed around the datum (last known position)
+            plan = generate_pattern(mission_type, datum or DEFAULT_HOME, track_spacing, grid_size, heading)
+            stats = {
+                'turns': plan.turn_count,
+                'pathLength': plan.path_length(),
+                'estimatedFlightTime': plan.estimate_flight_time(speed)
+            }
+            waypoints, _ = builder.build(plan.lat, plan.lon, plan.x, plan.y)
+        elif mission_type == 'Object Tracking':
+            # Re-fly the detection points on the shortest route found from home and back
+            route = plan_revisit_route(targets or [], home or DEFAULT_HOME, time_budget)
+            plan = route.plan
+            stats = route.to_dict()
+            stats['estimatedFlightTime'] = plan.estimate_flight_time(speed)
+            waypoints, index = builder.build(plan.lat, plan.lon, plan.x, plan.y)
+            # A photo exactly over every target; the route starts and ends at home
+            waypoints.capture[index[1:-1]] |= CAPTURE_TRIGGER
+        else:
+            waypoints = WaypointArray.empty()
+
+        schedule = self.finish_plan(waypoints, stats, speed, capture_interval,
+                                    track_spacing if mission_type == 'Search Grid' else None, terrain_clearance)
+        return waypoints, stats, heading, schedule, lane_plan
+    
+    def finish_plan(self, waypoints, stats, speed, capture_interval, track_spacing, terrain_clearance):
+        """Add terrain and camera figures to a plan's stats; returns its trigger schedule"""
+        if terrain_clearance is not None:
+            # Waypoints hold a constant height above ground instead of a constant altitude above takeoff
+            stats['terrainFollowing'] = {
+                'clearance': terrain_clearance,
+                'minAltitude': float(waypoints.alt.min()) if len(waypoints) else 0.0,
+                'maxAltitude': float(waypoints.alt.max()) if len(waypoints) else 0.0
+            }
+
+        # Where photos will be taken, and the image count and duration the UI reports
+        schedule = plan_trigger_schedule(waypoints, speed, capture_interval, track_spacing=track_spacing)
+        stats.update(schedule.summary())
+        return schedule
+    
+    def track_change(self, delta, new_count):
+        """Narrow the window of waypoints that differ from the uploaded mission by one plan splice"""
+        prefix = delta['start']
+        suffix = new_count - prefix - len(delta['waypoints'])
+        if self.changed_window is not None:
+            prefix = min(prefix, self.changed_window[0])
+            suffix = min(suffix, self.changed_window[1])
+        self.changed_window = (prefix, suffix)
+    
+    def segment_mission(self, battery):
+        """Split the current mission into battery sorties; battery is a BatteryModel.from_dict() dict"""
+        model = BatteryModel.from_dict(battery or {})
+        profile = self.get_mission_profile()
+        if profile is None:
+            self.sorties = []
+        else:
+            # Segmentation runs on the profiled path, so changing the battery model is cheap
+            self.sorties = profile.segment(model, self.mission_speed)
+        self.logger.info(f"Mission split into {len(self.sorties)} sorties")
+        return sortie_report(self.sorties, model)
+    
+    def get_sortie_waypoints(self, index):
+        """Waypoints of one sortie of the current mission, ending with its return-to-home leg"""
+        if not 0 <= index < len(self.sorties):
+            raise ValueError(f"No sortie {index}; mission has {len(self.sorties)}")
+        return sortie_waypoints(self.waypoints, self.sorties[index], self.get_mission_profile().home)
+    
+    def get_mission_profile(self):
+        """Distance and turn profile of the current mission; None before the first mission"""
+        if self.mission_profile is None and len(self.waypoints):
+            self.mission_profile = MissionProfile(self.waypoints, self.mission_home)
+        return self.mission_profile
+    
+    def set_terrain_model(self, terrain):
+        """Use a TerrainModel for terrain-following altitudes"""
+        self.terrain = terrain
+    
+    def terrain_identity(self):
+        """(DEM directory, tile index version) of the terrain model, or None without one"""
+        if self.terrain is None:
+            return None
+        return [self.terrain.directory, self.terrain.version]
+    
+    def invalidate_plans(self, reason=None):
+        """Drop cached mission plans, e.g. after a geofence or terrain update"""
+        self.plan_cache.invalidate(reason)
+        self.logger.info(f"Mission plan cache invalidated ({reason or 'manual'})")
+    
+    def get_plan_cache_stats(self):
+        """Get mission plan cache hit/miss statistics"""
+        return self.plan_cache.stats()
+    
+    def get_upload_report(self):
+        """Get the waypoint simplification report from the last upload"""
+        return self.upload_report
+    
+    def get_trigger_schedule(self):
+        """Get the camera trigger schedule of the current mission"""
+        return self.trigger_schedule
+    
+    def get_waypoints(self):
+        """Get the current mission's waypoints as a WaypointArray"""
+        return self.waypoints
+    
+    def upload_mission(self, tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
         """Upload mission plan to drone"""
         if not self.connected:
             self.logger.error("Cannot upload mission: Not connected to drone")
             return False
             
         try:
+            # Drop redundant waypoints first; upload time and the aircraft's waypoint limit scale with count
+            frame = None
+            if len(self.waypoints):
+                frame = LocalFrame.around(np.column_stack((self.waypoints.lat, self.waypoints.lon)))
+            keep, waypoints = simplification_mask(self.waypoints, tolerance, frame)
+            self.upload_report = simplification_report(len(self.waypoints), len(waypoints))
+            if len(waypoints) > MAX_MISSION_WAYPOINTS:
+                self.logger.error(f"Cannot upload mission: {len(waypoints)} waypoints exceeds the aircraft limit")
+                return False
+            self.logger.info(
+                f"Uploading {len(waypoints)} of {len(self.waypoints)} waypoints "
+                f"({self.upload_report['reduction']:.0%} removed)"
+            )
+            
             # This would use the DJI SDK to upload waypoints to a real drone
             time.sleep(2)  # Simulate upload delay
+            self.uploaded_waypoints = waypoints
+            self.uploaded_index = np.flatnonzero(keep)
+            self.uploaded_count = len(self.waypoints)
+            self.upload_frame = frame
+            self.upload_tolerance = tolerance
+            self.changed_window = None
             self.mission_loaded = True
             return True
         except Exception as e:
             self.logger.error(f"Mission upload failed: {str(e)}")
             return False
     
+    def upload_mission_delta(self, tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
+        """
+        Upload only what changed since the last upload. Only the waypoints between the kept
+        anchors around the changed window are re-simplified, in the frame of the last full upload,
+        which gives the same waypoints and headings as re-simplifying the whole plan; the span
+        where the result differs from the uploaded mission is sent. Falls back to a full upload
+        when nothing has been uploaded yet.
+        """
+        if not self.connected:
+            self.logger.error("Cannot upload mission: Not connected to drone")
+            return False
+        if not self.mission_loaded or self.uploaded_index is None or len(self.uploaded_index) == 0 or len(self.waypoints) == 0:
+            return self.upload_mission(tolerance)
+            
+        try:
+            if self.changed_window is None:
+                self.upload_report = {'deltaStart': 0, 'deltaDeleteCount': 0, 'deltaInsertCount': 0, 'uploadTimeSaved': 0.0}
+                return True
+
+            # A different tolerance changes what is kept everywhere, not just around the change
+            window = self.changed_window if tolerance == self.upload_tolerance else (0, 0)
+            index, uploaded, (start, stop) = resimplify_span(
+                self.waypoints, self.uploaded_waypoints, self.uploaded_index, self.uploaded_count,
+                *window, self.upload_frame, tolerance
+            )
+            if len(uploaded) > MAX_MISSION_WAYPOINTS:
+                self.logger.error(f"Cannot upload mission: {len(uploaded)} waypoints exceeds the aircraft limit")
+                return False
+            # Re-simplified waypoints at either end of the span may still match the uploaded ones
+            replaced = self.uploaded_waypoints[start:stop]
+            head, tail = replaced.matching_ends(uploaded[start:len(uploaded) - len(self.uploaded_waypoints) + stop])
+            prefix = start + head
+            delete_count = len(replaced) - head - tail
+            insert_count = len(uploaded) - len(self.uploaded_waypoints) + delete_count
+            self.upload_report = {
+                **simplification_report(len(self.waypoints), len(uploaded)),
+                'deltaStart': prefix,
+                'deltaDeleteCount': delete_count,
+                'deltaInsertCount': insert_count,
+                # Compared with re-uploading the whole simplified mission
+                'uploadTimeSaved': (len(uploaded) - insert_count) * UPLOAD_TIME_PER_WAYPOINT
+            }
+            self.logger.info(
+                f"Uploading delta: replacing {delete_count} waypoints at {prefix} with {insert_count}"
+            )
+            
+            # This would use the DJI SDK to update the uploaded mission's waypoints
+            self.uploaded_waypoints = uploaded
+            self.uploaded_index = index
+            self.uploaded_count = len(self.waypoints)
+            self.upload_tolerance = tolerance
+            self.changed_window = None
+            return True
+        except Exception as e:
+            self.logger.error(f"Mission delta upload failed: {str(e)}")
+            return False
+    
     def start_mission(self):
         """Start mission execution"""
         if not self.connected:
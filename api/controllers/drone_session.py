@@ -0,0 +1,202 @@
+import logging
+import os
+import threading
+
+from flask import request
+
+from controllers.detection_controller import DetectionController
+from controllers.drone_controller import DroneController
+from controllers.mapping_controller import MappingController
+from controllers.mock_controller import MockController
+from services.flight_log import DEFAULT_FLIGHT_LOG_DIRECTORY, FlightLogWriter, flight_name
+from services.telemetry_replay import TelemetryReplay
+from services.telemetry_store import DEFAULT_DRONE_ID, validate_drone_id
+from services.telemetry_stream import DEFAULT_STREAM_RATE, TelemetryProducer
+
+
+def request_drone_id():
+    """Drone a request is for: `droneId` in the query string or JSON body, else the default drone"""
+    drone_id = request.args.get('droneId')
+    if drone_id is None:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            drone_id = data.get('droneId')
+    return drone_id or DEFAULT_DRONE_ID
+
+
+class DroneSession:
+    """
+    Everything the server keeps for one aircraft: its controllers, mock or production mode,
+    telemetry producer, flight log recorder and replay. Requests that change the aircraft's state
+    hold `lock`, so they run one at a time per aircraft while other aircraft proceed undisturbed.
+    """
+
+    def __init__(self, drone_id, store, broadcaster, terrain_model=None, mock_mode=True,
+                 flight_log_directory=DEFAULT_FLIGHT_LOG_DIRECTORY, rate=DEFAULT_STREAM_RATE):
+        self.logger = logging.getLogger('drone_session')
+        self.drone_id = drone_id
+        self.store = store
+        self.broadcaster = broadcaster
+        self.flight_log_directory = flight_log_directory
+        self.lock = threading.RLock()
+
+        self.drone_controller = DroneController()
+        self.mapping_controller = MappingController()
+        self.detection_controller = DetectionController()
+        self.mock_controller = MockController()
+        if terrain_model is not None:
+            self.drone_controller.set_terrain_model(terrain_model)
+            self.mapping_controller.set_terrain_model(terrain_model)
+        self.detection_controller.on_detection = self.record_detection
+        self.mock_mode = mock_mode
+        for controller in (self.drone_controller, self.mapping_controller, self.detection_controller):
+            controller.set_mock_mode(mock_mode)
+
+        # One producer reads this drone's link and pushes every sample to the history and streams
+        self.producer = TelemetryProducer(self.read_telemetry, drone_id, store, broadcaster, rate=rate)
+        # A recorded flight played back in place of the link, while one is running
+        self.replay = None
+
+    def set_mock_mode(self, mock_mode):
+        """Switch this drone between mock and production mode"""
+        if self.mock_mode == mock_mode:
+            return
+        self.mock_mode = mock_mode
+        self.logger.info(f"{self.drone_id} switched to {'MOCK' if mock_mode else 'PRODUCTION'} mode")
+        self.drone_controller.set_mock_mode(mock_mode)
+        self.mapping_controller.set_mock_mode(mock_mode)
+        self.detection_controller.set_mock_mode(mock_mode)
+        if mock_mode:
+            self.mock_controller.start()
+        else:
+            self.mock_controller.stop()
+
+    def replaying(self):
+        replay = self.replay
+        return replay is not None and replay.running
+
+    def read_telemetry(self):
+        """Latest telemetry from the replay, the mock or the real drone"""
+        replay = self.replay
+        if replay is not None and replay.running:
+            return replay.get_telemetry()
+        if self.mock_mode:
+            return self.mock_controller.get_telemetry()
+        return self.drone_controller.get_telemetry()
+
+    def start_flight_log(self):
+        """Record the producer's telemetry to a new flight log, unless one is being recorded"""
+        if self.producer.recorder is None:
+            directory = os.path.join(self.flight_log_directory, self.drone_id, flight_name())
+            self.producer.recorder = FlightLogWriter(directory)
+            self.logger.info(f"Recording flight log to {directory}")
+
+    def stop_flight_log(self):
+        recorder = self.producer.recorder
+        self.producer.recorder = None
+        if recorder is not None:
+            recorder.close()
+            self.logger.info(f"Closed flight log {recorder.directory} ({recorder.records} records)")
+
+    def record_detection(self, detection):
+        recorder = self.producer.recorder
+        if recorder is not None:
+            recorder.append_detection(detection)
+
+    def start_replay(self, log, speed=1.0, loop=False, offset=0.0):
+        """Replay a flight log in place of the link; the replayed telemetry is not recorded again"""
+
+        def publish(telemetry, timestamp):
+            self.store.append(self.drone_id, telemetry, timestamp)
+            self.broadcaster.publish(self.drone_id, telemetry, timestamp)
+
+        def detect(detection):
+            location = detection.get('location', {})
+            self.detection_controller.add_detection(detection.get('type'), detection.get('confidence', 0.0),
+                                                    location.get('lat'), location.get('lng'))
+
+        replay = TelemetryReplay(log, publish, detect, speed, loop)
+        replay.seek(replay.start_time + offset)
+        self.stop_replay()
+        self.producer.stop()
+        self.stop_flight_log()
+        self.replay = replay
+        replay.start()
+        return replay
+
+    def stop_replay(self):
+        replay = self.replay
+        self.replay = None
+        if replay is not None:
+            replay.stop()
+
+    def close(self):
+        self.stop_replay()
+        self.producer.stop()
+        self.stop_flight_log()
+
+    def status(self):
+        recorder = self.producer.recorder
+        return {
+            'droneId': self.drone_id,
+            'mockMode': self.mock_mode,
+            'connected': self.drone_controller.is_connected(),
+            'producerRunning': self.producer.running,
+            'replaying': self.replaying(),
+            'recording': recorder.directory if recorder is not None else None
+        }
+
+
+class SessionRegistry:
+    """
+    Drone sessions by drone id, created on first use. The registry lock only guards the lookup;
+    all work on a drone happens under that drone's own session lock.
+    """
+
+    def __init__(self, store, broadcaster, terrain_model=None, flight_log_directory=DEFAULT_FLIGHT_LOG_DIRECTORY,
+                 rate=DEFAULT_STREAM_RATE):
+        self.store = store
+        self.broadcaster = broadcaster
+        self.terrain_model = terrain_model
+        self.flight_log_directory = flight_log_directory
+        self.rate = rate
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, drone_id):
+        """The drone's session, created on first use; ValueError for an invalid drone id"""
+        session = self.sessions.get(validate_drone_id(drone_id))
+        if session is not None:
+            return session
+        with self.lock:
+            session = self.sessions.get(drone_id)
+            if session is None:
+                session = self.sessions[drone_id] = DroneSession(
+                    drone_id, self.store, self.broadcaster, self.terrain_model,
+                    flight_log_directory=self.flight_log_directory, rate=self.rate
+                )
+            return session
+
+    def for_request(self, create=False):
+        """
+        Session of the drone the current request is for. Only requests that set a drone up
+        (`create`) start a new session; others get None for a drone that has none yet.
+        """
+        drone_id = request_drone_id()
+        return self.get(drone_id) if create else self.find(drone_id)
+
+    def find(self, drone_id):
+        """The drone's session, or None when it has none yet; ValueError for an invalid drone id"""
+        return self.sessions.get(validate_drone_id(drone_id))
+
+    def list(self):
+        with self.lock:
+            return list(self.sessions.values())
+
+    def remove(self, drone_id):
+        with self.lock:
+            session = self.sessions.pop(drone_id, None)
+        if session is not None:
+            with session.lock:
+                session.close()
+        return session
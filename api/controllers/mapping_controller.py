@@ -2,9 +2,10 @@ import logging
 import time
 import os
 from datetime import datetime
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, abort, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, verify_jwt_in_request, get_jwt_identity
 from functools import wraps
+from services.terrain import DEFAULT_EXPORT_CELL_SIZE
 
 # Create a Blueprint for mapping routes
 mapping_bp = Blueprint('mapping', __name__)
@@ -41,11 +42,21 @@ class MappingController:
         self.area_covered = 0.0
         self.images_captured = 0
         self.mapping_start_time = None
+        self.trigger_schedule = None
+        self.terrain = None
         
     def set_mock_mode(self, mock_mode):
         """Set controller to mock or production mode"""
         self.mock_mode = mock_mode
         
+    def set_trigger_schedule(self, schedule):
+        """Use a mission's camera trigger schedule for image counts and completion estimates"""
+        self.trigger_schedule = schedule
+        
+    def set_terrain_model(self, terrain):
+        """Use a TerrainModel as the source for terrain exports"""
+        self.terrain = terrain
+        
     def start_mapping(self, mapping_mode, resolution):
         """Start terrain mapping with specified mode and resolution"""
         if self.mapping_active:
@@ -103,11 +114,17 @@ class MappingController:
             'High': '1.0 cm/px'
         }
         
-        # Mock increasing area and images over time
-        self.area_covered = min(1.0, elapsed / 600)  # Covering 1 km² over 10 minutes
-        self.images_captured = int(elapsed / self.get_capture_interval())
-        
-        remaining_seconds = max(0, 600 - elapsed)
+        if self.trigger_schedule is not None and len(self.trigger_schedule):
+            # Count photos and remaining time from the planned trigger schedule
+            duration = self.trigger_schedule.duration
+            self.area_covered = min(1.0, elapsed / duration) if duration else 1.0
+            self.images_captured = self.trigger_schedule.captured_by(elapsed)
+            remaining_seconds = max(0, duration - elapsed)
+        else:
+            # Mock increasing area and images over time
+            self.area_covered = min(1.0, elapsed / 600)  # Covering 1 km² over 10 minutes
+            self.images_captured = int(elapsed / self.get_capture_interval())
+            remaining_seconds = max(0, 600 - elapsed)
         hours = int(remaining_seconds / 3600)
         minutes = int((remaining_seconds % 3600) / 60)
         seconds = int(remaining_seconds % 60)
@@ -166,19 +183,57 @@ class MappingController:
             self.logger.error(f"Failed to export mapping data: {str(e)}")
             return {'success': False, 'message': str(e)}
 
-# Create controller instance
-mapping_controller = MappingController()
+    def export_terrain(self, bounds, format_type='ASC', cell_size=DEFAULT_EXPORT_CELL_SIZE):
+        """Export the terrain model inside (south, north, west, east) without loading whole rasters"""
+        if self.terrain is None or len(self.terrain) == 0:
+            self.logger.warning("No terrain model to export")
+            return {'success': False, 'message': "No terrain model loaded"}
+        
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            export_dir = os.path.join(os.getcwd(), 'exports')
+            os.makedirs(export_dir, exist_ok=True)
+            file_path = os.path.join(export_dir, f"terrain_export_{timestamp}.{format_type.lower()}")
+            
+            south, north, west, east = bounds
+            rows, cols = self.terrain.export(south, north, west, east, cell_size, file_path, format_type)
+            
+            self.logger.info(f"Exported {rows}x{cols} terrain grid to {file_path}")
+            return {
+                'success': True,
+                'fileLocation': file_path,
+                'format': format_type,
+                'rows': rows,
+                'cols': cols,
+                'cellSize': cell_size,
+                'timestamp': timestamp
+            }
+        except Exception as e:
+            self.logger.error(f"Failed to export terrain model: {str(e)}")
+            return {'success': False, 'message': str(e)}
+
+def session_mapping_controller():
+    """Mapping controller of the drone session the request is for (droneId, default drone otherwise)"""
+    try:
+        session = current_app.extensions['drone_sessions'].for_request()
+    except ValueError as e:
+        abort(400, description=str(e))
+    if session is None:
+        abort(404, description="Unknown drone")
+    return session.mapping_controller
 
 @mapping_bp.route('/status', methods=['GET'])
 @flexible_jwt_required()
 def get_mapping_status():
     """Get current mapping status"""
+    mapping_controller = session_mapping_controller()
     return jsonify(mapping_controller.get_mapping_stats())
 
 @mapping_bp.route('/start', methods=['POST'])
 @flexible_jwt_required()
 def start_mapping():
     """Start a new mapping session"""
+    mapping_controller = session_mapping_controller()
     data = request.get_json()
     mapping_mode = data.get('mode', '2D Map')
     resolution = data.get('resolution', 'Medium')
@@ -201,6 +256,7 @@ def start_mapping():
 @flexible_jwt_required()
 def stop_mapping():
     """Stop the current mapping session"""
+    mapping_controller = session_mapping_controller()
     success = mapping_controller.stop_mapping()
     
     if success:
@@ -218,6 +274,7 @@ def stop_mapping():
 @flexible_jwt_required()
 def export_mapping():
     """Export mapping data in requested format"""
+    mapping_controller = session_mapping_controller()
     data = request.get_json()
     format_type = data.get('format', 'Terra')
     
@@ -238,6 +295,7 @@ def export_mapping():
 @flexible_jwt_required()
 def set_mock_mode():
     """Set controller to mock or production mode"""
+    mapping_controller = session_mapping_controller()
     data = request.get_json()
     mock_mode = data.get('mock', True)
     
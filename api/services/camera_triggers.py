@@ -0,0 +1,140 @@
+import numpy as np
+
+from services.geo import LocalFrame, turn_fractions
+from services.search_grid import DEFAULT_TURN_TIME
+from services.waypoint_array import CAPTURE_DIRECTIONAL, CAPTURE_PHOTO, CAPTURE_TRIGGER
+
+# Camera bits in the schedule's `camera` column
+CAMERA_FRONT = 0x01
+CAMERA_LEFT = 0x02
+CAMERA_RIGHT = 0x04
+CAMERA_ALL = CAMERA_FRONT | CAMERA_LEFT | CAMERA_RIGHT
+
+# 3-directional capture fires one camera per trigger in this order
+DIRECTIONAL_SEQUENCE = np.array([CAMERA_FRONT, CAMERA_LEFT, CAMERA_RIGHT], dtype=np.uint8)
+
+# Nadir-equivalent field of view of each camera (degrees) used for footprint and overlap
+DEFAULT_HFOV = 73.7
+DEFAULT_VFOV = 53.1
+
+
+class TriggerSchedule:
+    """Every planned photo along a mission: when and where it is taken, on which heading and by which cameras"""
+
+    def __init__(self, time, distance, lat, lon, alt, heading, camera, duration, forward_overlap, side_overlap):
+        self.time = time
+        self.distance = distance
+        self.lat = lat
+        self.lon = lon
+        self.alt = alt
+        self.heading = heading
+        self.camera = camera
+        self.duration = duration
+        self.forward_overlap = forward_overlap
+        self.side_overlap = side_overlap
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def empty(cls, duration=0.0):
+        nothing = np.empty(0)
+        return cls(nothing, nothing, nothing, nothing, nothing, nothing, np.empty(0, dtype=np.uint8),
+                   duration, None, None)
+
+    def captured_by(self, elapsed):
+        """Number of photos taken `elapsed` seconds into the mission"""
+        return int(np.searchsorted(self.time, elapsed, side='right'))
+
+    def summary(self):
+        return {
+            'imagesPlanned': len(self),
+            'scheduleDuration': self.duration,
+            'forwardOverlap': self.forward_overlap,
+            'sideOverlap': self.side_overlap
+        }
+
+    def to_dict(self):
+        return {
+            **self.summary(),
+            'time': self.time.tolist(),
+            'lat': self.lat.tolist(),
+            'lon': self.lon.tolist(),
+            'alt': self.alt.tolist(),
+            'heading': self.heading.tolist(),
+            'camera': self.camera.tolist()
+        }
+
+
+def footprint(altitude, hfov=DEFAULT_HFOV, vfov=DEFAULT_VFOV):
+    """Ground footprint (across-track, along-track) in meters of a nadir photo from `altitude`"""
+    return (2.0 * altitude * np.tan(np.radians(hfov) / 2.0),
+            2.0 * altitude * np.tan(np.radians(vfov) / 2.0))
+
+
+def plan_trigger_schedule(waypoints, speed, capture_interval, track_spacing=None,
+                          turn_time=DEFAULT_TURN_TIME, hfov=DEFAULT_HFOV, vfov=DEFAULT_VFOV):
+    """
+    Walk the mission path at `speed` and emit a trigger every `capture_interval` seconds on legs that
+    start at a CAPTURE_PHOTO waypoint, plus one at every CAPTURE_TRIGGER waypoint.
+    Overlaps are fractions of the footprint (negative values mean gaps between photos).
+    """
+    count = len(waypoints)
+    if count < 2 or speed <= 0:
+        return TriggerSchedule.empty()
+
+    frame = LocalFrame.around(np.column_stack((waypoints.lat, waypoints.lon)))
+    x, y = frame.to_local(waypoints.lat, waypoints.lon)
+    z = waypoints.alt
+    leg = np.hypot(np.diff(x), np.diff(y))
+    along = np.concatenate(([0.0], np.cumsum(leg)))
+    total = along[-1]
+
+    # Turn time spent before flying each leg, so trigger times include the turn dwell
+    headings = np.degrees(np.arctan2(np.diff(x), np.diff(y)))
+    turns = np.concatenate(([0.0], np.cumsum(turn_fractions(x, y) * turn_time)))
+    duration = float(total / speed + turns[-1])
+
+    if capture_interval > 0:
+        step = speed * capture_interval
+        distance = np.arange(0.0, total + 1e-9, step)
+    else:
+        distance = np.empty(0)
+    index = np.clip(np.searchsorted(along, distance, side='right') - 1, 0, count - 2)
+    active = (waypoints.capture[index] & CAPTURE_PHOTO) != 0
+    distance = distance[active]
+    index = index[active]
+
+    # Explicit photo points are fired exactly at their waypoint
+    explicit = np.flatnonzero(waypoints.capture & CAPTURE_TRIGGER)
+    distance = np.concatenate((distance, along[explicit]))
+    index = np.concatenate((index, np.minimum(explicit, count - 2)))
+    order = np.argsort(distance, kind='stable')
+    distance = distance[order]
+    index = index[order]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(leg[index] > 0, (distance - along[index]) / leg[index], 0.0)
+    tx = x[index] + t * (x[index + 1] - x[index])
+    ty = y[index] + t * (y[index + 1] - y[index])
+    tz = z[index] + t * (z[index + 1] - z[index])
+    lat, lon = frame.to_geodetic(tx, ty)
+    heading = headings[index] % 360.0
+    time = distance / speed + turns[index]
+
+    # Directional capture cycles front/left/right; omni-directional fires everything at once
+    directional = (waypoints.capture[index] & CAPTURE_DIRECTIONAL) != 0
+    camera = np.where(directional, DIRECTIONAL_SEQUENCE[np.arange(len(index)) % 3], CAMERA_ALL).astype(np.uint8)
+
+    forward_overlap = None
+    side_overlap = None
+    if len(index):
+        across_fp, along_fp = footprint(float(np.mean(tz)), hfov, vfov)
+        if capture_interval > 0:
+            # Consecutive photos from the same camera are three triggers apart in directional mode
+            same_camera = speed * capture_interval * (3 if directional.any() else 1)
+            forward_overlap = float(1.0 - same_camera / along_fp)
+        if track_spacing:
+            side_overlap = float(1.0 - track_spacing / across_fp)
+
+    return TriggerSchedule(time, distance, lat, lon, tz, heading, camera, duration, forward_overlap, side_overlap)
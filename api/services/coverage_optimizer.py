@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services.search_grid import DECOMPOSITIONS, DEFAULT_TURN_TIME, SearchArea
+
+
+class CoverageResult:
+    """Best coverage plan found by the optimizer, along with the default-heading baseline"""
+
+    def __init__(self, plan, decomposition, flight_time, baseline_time, candidates):
+        self.plan = plan
+        self.decomposition = decomposition
+        self.flight_time = flight_time
+        self.baseline_time = baseline_time
+        self.candidates = candidates
+
+    @property
+    def heading(self):
+        return self.plan.heading
+
+    @property
+    def time_saved(self):
+        return max(0.0, self.baseline_time - self.flight_time)
+
+    def to_dict(self):
+        return {
+            'heading': self.heading,
+            'decomposition': self.decomposition,
+            'turns': self.plan.turn_count,
+            'pathLength': self.plan.path_length(),
+            'estimatedFlightTime': self.flight_time,
+            'baselineFlightTime': self.baseline_time,
+            'timeSaved': self.time_saved,
+            'candidatesEvaluated': self.candidates
+        }
+
+
+def candidate_headings(search_area, angle_step=5.0, default_heading=0.0):
+    """Evenly spaced headings over half a turn plus the bearings of the polygon's own edges"""
+    headings = np.concatenate((
+        np.arange(0.0, 180.0, angle_step),
+        search_area.edge_headings(),
+        [default_heading % 180.0]
+    ))
+    return np.unique(np.round(headings, 3))
+
+
+def optimize_coverage(area, spacing, speed, holes=None, default_heading=0.0,
+                      turn_time=DEFAULT_TURN_TIME, angle_step=5.0, max_workers=None):
+    """
+    Pick the sweep heading and decomposition with the lowest estimated flight time.
+    Candidates are evaluated concurrently; the area is projected once and shared between them.
+    A candidate with a leg through one of the area's holes is never picked.
+    """
+    if speed <= 0:
+        raise ValueError("Speed must be positive")
+
+    search_area = area if isinstance(area, SearchArea) else SearchArea(area, holes)
+
+    def evaluate(candidate):
+        heading, decomposition = candidate
+        plan = search_area.sweep(spacing, heading, decomposition)
+        if search_area.legs_through_holes(plan):
+            # Never fly over a no-fly zone, however much time it would save
+            return plan, decomposition, np.inf
+        return plan, decomposition, plan.estimate_flight_time(speed, turn_time)
+
+    headings = candidate_headings(search_area, angle_step, default_heading)
+    candidates = [(heading, decomposition) for heading in headings for decomposition in DECOMPOSITIONS]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(evaluate, candidates))
+
+    baseline = evaluate((default_heading, 'lanes'))
+    best = min(results, key=lambda result: result[2])
+    if best[2] >= baseline[2]:
+        best = baseline
+
+    plan, decomposition, flight_time = best
+    return CoverageResult(plan, decomposition, flight_time, baseline[2], len(candidates))
@@ -0,0 +1,113 @@
+import numpy as np
+
+# Downsampling methods accepted by the history endpoint
+DOWNSAMPLE_METHODS = ('lttb', 'minmax')
+
+# Long series are first reduced to the minima and maxima of this many buckets per output point
+# before LTTB runs (MinMaxLTTB). The extremes contain the points LTTB would pick in practice, and
+# the reduction is a single pass, so huge windows cost little more than reading them once.
+MINMAX_PRESELECT_RATIO = 4
+
+# Series up to this length are downsampled with exact LTTB, which stays within a few milliseconds
+EXACT_LTTB_LIMIT = 100000
+
+
+def minmax(y, threshold):
+    """
+    Indices of each bucket's minimum and maximum, in order: at most `threshold` points that keep
+    every spike of the series visible
+    """
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold == 1:
+        # No room for a min and a max; keep the latest point, as LTTB does
+        return np.array([n - 1])
+    buckets = threshold // 2
+    width = n // buckets
+    y = np.asarray(y)
+
+    # Equal buckets are a reshaped view; the remainder joins the last bucket
+    main = y[:(buckets - 1) * width].reshape(buckets - 1, width)
+    offsets = np.arange(buckets - 1) * width
+    tail = y[(buckets - 1) * width:]
+    tail_offset = (buckets - 1) * width
+    low = np.append(offsets + main.argmin(axis=1), tail_offset + tail.argmin())
+    high = np.append(offsets + main.argmax(axis=1), tail_offset + tail.argmax())
+    return np.unique(np.concatenate((low, high)))
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps out of (x, y), at most `threshold`
+    of them, always including the first and last point (only the last when `threshold` is 1).
+    Each bucket keeps the point forming the largest triangle with the point kept from the
+    previous bucket and the next bucket's mean.
+    """
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold == 1:
+        return np.array([n - 1])
+    if threshold == 2:
+        return np.array([0, n - 1])
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = threshold - 2
+    edges = np.linspace(1, n - 1, buckets + 1).astype(np.int64)
+    start, stop = edges[:-1], edges[1:]
+    sizes = stop - start
+
+    # Mean of each bucket, and of the one after it (the last point follows the final bucket)
+    mean_x = np.add.reduceat(x[1:n - 1], start - 1) / sizes
+    mean_y = np.add.reduceat(y[1:n - 1], start - 1) / sizes
+    cx = np.append(mean_x[1:], x[-1])
+    cy = np.append(mean_y[1:], y[-1])
+
+    # One row of candidates per bucket; short rows repeat their last point
+    index = np.minimum(start[:, None] + np.arange(int(sizes.max())), (stop - 1)[:, None])
+    bx = x[index]
+    by = y[index]
+
+    # The point kept in a bucket depends on the one kept before it. Instead of walking the
+    # buckets one by one, every bucket is solved at once against the previous bucket's current
+    # choice (starting from its mean), and then only buckets whose predecessor changed are
+    # solved again. Bucket 0's anchor is the fixed first point, so the fixed point reached is
+    # exactly the sequential result; in practice it takes a handful of rounds.
+    kept = np.full(buckets, -1, dtype=np.int64)
+    ax = np.concatenate(([x[0]], mean_x[:-1]))
+    ay = np.concatenate(([y[0]], mean_y[:-1]))
+    rows = np.arange(buckets)
+    while len(rows):
+        # Twice the triangle area is |u * By + v * Bx - w| for candidate B
+        u = (ax[rows] - cx[rows])[:, None]
+        v = (cy[rows] - ay[rows])[:, None]
+        w = u * ay[rows][:, None] + ax[rows][:, None] * v
+        best = np.abs(u * by[rows] + v * bx[rows] - w).argmax(axis=1)
+        chosen = index[rows, best]
+        changed = rows[chosen != kept[rows]]
+        kept[rows] = chosen
+
+        rows = changed + 1
+        rows = rows[rows < buckets]
+        ax[rows] = x[kept[rows - 1]]
+        ay[rows] = y[kept[rows - 1]]
+    return np.concatenate(([0], kept, [n - 1]))
+
+
+def downsample(x, y, threshold, method='lttb'):
+    """Indices of at most `threshold` representative points of the series"""
+    if threshold <= 0:
+        raise ValueError("maxPoints must be positive")
+    if method == 'minmax':
+        return minmax(y, threshold)
+    if method != 'lttb':
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    if len(x) > max(EXACT_LTTB_LIMIT, threshold * MINMAX_PRESELECT_RATIO * 2):
+        # Candidates: the extremes of finer buckets plus the end points LTTB always keeps
+        candidates = minmax(y, threshold * MINMAX_PRESELECT_RATIO * 2)
+        candidates = np.union1d(candidates, [0, len(x) - 1])
+        return candidates[lttb(x[candidates], y[candidates], threshold)]
+    return lttb(x, y, threshold)
@@ -0,0 +1,175 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from services.coverage_optimizer import optimize_coverage
+from services.geo import sweep_axes
+from services.search_grid import DEFAULT_TURN_TIME, SearchArea, sweep_segments
+
+# Process pool shared by every fleet request; started on first use, since spawning one per
+# request costs more than planning most fleets
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def clip_ring(u, v, limit, keep_above):
+    """Clip one ring against the half-plane v >= limit (or v <= limit) in a single vectorized pass"""
+    d = (v - limit) if keep_above else (limit - v)
+    inside = d >= 0
+    d_next = np.roll(d, -1)
+    crossing = inside != np.roll(inside, -1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(crossing, d / (d - d_next), 0.0)
+    cross_u = u + t * (np.roll(u, -1) - u)
+    cross_v = np.full_like(v, limit)
+
+    # Row-major masking keeps each vertex followed by its edge's crossing point, in ring order
+    mask = np.column_stack((inside, crossing))
+    return np.column_stack((u, cross_u))[mask], np.column_stack((v, cross_v))[mask]
+
+
+def _clip_strip(u, v, rings, low, high):
+    """Rings of the polygon restricted to low <= v <= high; returns a list of (u, v) rings"""
+    clipped = []
+    for start, stop in rings:
+        ring_u, ring_v = u[start:stop], v[start:stop]
+        ring_u, ring_v = clip_ring(ring_u, ring_v, low, True)
+        if len(ring_u) >= 3:
+            ring_u, ring_v = clip_ring(ring_u, ring_v, high, False)
+        clipped.append((ring_u, ring_v) if len(ring_u) >= 3 else None)
+    return clipped
+
+
+def partition_area(search_area, weights, spacing, heading=0.0):
+    """
+    Split the area into strips parallel to the lanes, one per weight, so that each strip's
+    total lane length is proportional to its weight. Returns a list of (outer, holes) lat/lon rings.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if len(weights) == 0 or np.any(weights <= 0):
+        raise ValueError("Partition weights must be positive")
+
+    along, across = sweep_axes(heading)
+    u = search_area.x * along[0] + search_area.y * along[1]
+    v = search_area.x * across[0] + search_area.y * across[1]
+
+    offsets, seg_lane, seg_start, seg_end = sweep_segments(u, v, search_area.rings, spacing)
+    lane_length = np.bincount(seg_lane, weights=seg_end - seg_start, minlength=len(offsets))
+    cumulative = np.cumsum(lane_length)
+
+    # Lane index at which each partition ends, then cut midway between neighbouring lanes
+    targets = np.cumsum(weights)[:-1] / weights.sum() * cumulative[-1]
+    last_lane = np.searchsorted(cumulative, targets)
+    cuts = np.concatenate((
+        [v.min() - spacing],
+        offsets[np.minimum(last_lane, len(offsets) - 1)] + spacing / 2.0,
+        [v.max() + spacing]
+    ))
+
+    partitions = []
+    for low, high in zip(cuts[:-1], cuts[1:]):
+        rings = _clip_strip(u, v, search_area.rings, low, high)
+        if rings[0] is None:
+            partitions.append(None)
+            continue
+        latlon_rings = []
+        for ring in rings:
+            if ring is None:
+                continue
+            ring_u, ring_v = ring
+            x = ring_u * along[0] + ring_v * across[0]
+            y = ring_u * along[1] + ring_v * across[1]
+            lat, lon = search_area.frame.to_geodetic(x, y)
+            latlon_rings.append(np.column_stack((lat, lon)))
+        partitions.append((latlon_rings[0], latlon_rings[1:]))
+    return partitions
+
+
+def _plan_partition(job):
+    """Process-pool worker: sweep one partition and return its path as plain arrays"""
+    outer, holes, spacing, heading, altitude, speed, optimize = job
+    search_area = SearchArea(outer, holes)
+    if optimize:
+        result = optimize_coverage(search_area, spacing, speed, default_heading=heading, max_workers=1)
+        plan = result.plan
+        heading = result.heading
+    else:
+        plan = search_area.sweep(spacing, heading)
+    return {
+        'waypoints': plan.to_waypoint_array(altitude, speed=speed),
+        'heading': heading,
+        'lanes': plan.lane_count,
+        'turns': plan.turn_count,
+        'pathLength': plan.path_length(),
+        'estimatedFlightTime': plan.estimate_flight_time(speed, DEFAULT_TURN_TIME)
+    }
+
+
+def _process_pool():
+    """
+    The shared process pool, one worker per CPU, started on first use. Workers are spawned rather
+    than forked, since a fork of the multi-threaded server copies locks other threads hold (logging,
+    telemetry) into workers that can never release them.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def drone_weight(drone):
+    """Relative amount of area a drone should take: cruise speed times usable battery"""
+    return float(drone.get('speed', 5)) * max(float(drone.get('battery', 100)), 1.0)
+
+
+def plan_fleet(area, drones, spacing, altitude, heading=0.0, holes=None, optimize=False, max_workers=None):
+    """
+    Plan one search mission per drone over a shared area.
+    drones is a list of dicts with 'id', 'speed' (m/s) and 'battery' (%). A plain sweep takes
+    milliseconds and is planned in-process; with `optimize` every partition is planned concurrently
+    in a shared process pool, so the call takes about as long as the largest partition
+    (max_workers=1 plans them one after another in-process instead).
+    """
+    if not drones:
+        raise ValueError("At least one drone is required")
+
+    search_area = SearchArea(area, holes)
+    partitions = partition_area(search_area, [drone_weight(d) for d in drones], spacing, heading)
+
+    jobs = []
+    for drone, partition in zip(drones, partitions):
+        if partition is not None:
+            outer, hole_rings = partition
+            jobs.append((outer, hole_rings, spacing, heading, altitude, float(drone.get('speed', 5)), optimize))
+
+    workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    if optimize and len(jobs) > 1 and workers > 1:
+        results = iter(list(_process_pool().map(_plan_partition, jobs)))
+    else:
+        results = iter([_plan_partition(job) for job in jobs])
+
+    mission_id = datetime.now().strftime('FLEET-%Y%m%d-%H%M%S')
+    missions = []
+    for index, (drone, partition) in enumerate(zip(drones, partitions)):
+        drone_id = drone.get('id', f'drone-{index + 1}')
+        if partition is None:
+            missions.append({'id': f'{mission_id}-{index + 1}', 'droneId': drone_id, 'type': 'Search Grid',
+                             'waypoints': [], 'area': [], 'stats': {}})
+            continue
+        result = next(results)
+        missions.append({
+            'id': f'{mission_id}-{index + 1}',
+            'droneId': drone_id,
+            'type': 'Search Grid',
+            'area': partition[0].tolist(),
+            'waypoints': result['waypoints'].to_dicts(),
+            'stats': {key: value for key, value in result.items() if key != 'waypoints'}
+        })
+    return missions
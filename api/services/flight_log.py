@@ -0,0 +1,352 @@
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from services.telemetry_store import TELEMETRY_DTYPE, TELEMETRY_FIELDS, telemetry_row, to_columns, to_series
+
+# A flight log is a directory of numbered segments. Each segment file is a header followed by
+# fixed-width records, so record i sits at HEADER_SIZE + i * RECORD_DTYPE.itemsize and a whole
+# segment maps straight onto a numpy array. Next to each segment, an index file holds the time
+# of every INDEX_STRIDE-th record, enough to narrow a time lookup to one stride without reading
+# the segment. Segments are only ever appended to; a torn record at the end after a crash is
+# ignored when reading. Detections, which are few and free-form, go to one JSON-lines file.
+MAGIC = b'FLOG'
+SCHEMA_VERSION = 1
+SEGMENT_HEADER = struct.Struct('<4sBxHI')
+HEADER_SIZE = 64
+RECORD_DTYPE = TELEMETRY_DTYPE.newbyteorder('<')
+INDEX_DTYPE = np.dtype([('time', '<f8'), ('record', '<u8')])
+SEGMENT_SUFFIX = '.seg'
+INDEX_SUFFIX = '.idx'
+DETECTIONS_FILE = 'detections.jsonl'
+
+# Flight logs are kept under FLIGHT_LOG_DIRECTORY/<drone id>/<flight>
+DEFAULT_FLIGHT_LOG_DIRECTORY = 'flight_logs'
+
+# Records per segment: an hour at 10 Hz, about 2 MB
+DEFAULT_SEGMENT_RECORDS = 36000
+
+# Records between index entries; a lookup reads at most this many timestamps from a segment
+INDEX_STRIDE = 256
+
+# Buffered records are written and fsynced together once there are this many of them or the
+# oldest has waited this many seconds, whichever comes first. A crash loses at most that much.
+DEFAULT_SYNC_RECORDS = 50
+DEFAULT_SYNC_INTERVAL = 1.0
+
+
+def segment_name(number):
+    return f"{number:06d}"
+
+
+def flight_name(timestamp=None):
+    """Directory name of a flight starting at `timestamp`"""
+    return time.strftime('%Y%m%d-%H%M%S', time.localtime(timestamp))
+
+
+class FlightLogWriter:
+    """
+    Appends telemetry to a flight log directory. Records are buffered and written in batches,
+    each batch followed by one fsync of the segment and then of its index, so durability costs
+    one sync per batch rather than per sample. Opening an existing log starts a new segment.
+    """
+
+    def __init__(self, directory, segment_records=DEFAULT_SEGMENT_RECORDS,
+                 sync_records=DEFAULT_SYNC_RECORDS, sync_interval=DEFAULT_SYNC_INTERVAL):
+        if segment_records <= 0:
+            raise ValueError("Segment size must be positive")
+        self.directory = directory
+        self.segment_records = segment_records
+        self.sync_records = sync_records
+        self.sync_interval = sync_interval
+        os.makedirs(directory, exist_ok=True)
+
+        numbers = [int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(directory)
+                   if name.endswith(SEGMENT_SUFFIX) and name[:-len(SEGMENT_SUFFIX)].isdigit()]
+        self.segment_number = max(numbers, default=0)
+        self.segment = None
+        self.index = None
+        self.segment_count = 0
+        self.detections = None
+
+        self.pending = []
+        self.pending_since = None
+        self.last_time = None
+        self.records = 0
+        self.syncs = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def _open_segment(self):
+        self.segment_number += 1
+        path = os.path.join(self.directory, segment_name(self.segment_number))
+        self.segment = open(path + SEGMENT_SUFFIX, 'xb')
+        header = SEGMENT_HEADER.pack(MAGIC, SCHEMA_VERSION, RECORD_DTYPE.itemsize, self.segment_number)
+        self.segment.write(header.ljust(HEADER_SIZE, b'\0'))
+        self.index = open(path + INDEX_SUFFIX, 'xb')
+        self.segment_count = 0
+
+    def _close_segment(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.index.close()
+            self.segment = None
+            self.index = None
+
+    def append(self, sample, timestamp=None):
+        """Record a telemetry dict; samples appended after close() are ignored"""
+        row = telemetry_row(sample, timestamp)
+        with self.lock:
+            if self.closed:
+                return
+            if self.last_time is not None and row[0] < self.last_time:
+                # Keep time sorted across the log, as the telemetry ring does
+                row = (self.last_time,) + row[1:]
+            self.last_time = row[0]
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.append(row)
+            if len(self.pending) >= self.sync_records or time.monotonic() - self.pending_since >= self.sync_interval:
+                self._flush()
+
+    def append_detection(self, detection, timestamp=None):
+        """Record a detection dict; it is synced with the next batch of telemetry"""
+        line = json.dumps({'time': time.time() if timestamp is None else timestamp, 'detection': detection},
+                          separators=(',', ':'))
+        with self.lock:
+            if self.closed:
+                return
+            if self.detections is None:
+                self.detections = open(os.path.join(self.directory, DETECTIONS_FILE), 'a')
+            self.detections.write(line + '\n')
+
+    def flush(self):
+        """Write and fsync every buffered record"""
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.detections is not None:
+            self.detections.flush()
+            os.fsync(self.detections.fileno())
+        if not self.pending:
+            return
+        records = np.array(self.pending, dtype=RECORD_DTYPE)
+        self.pending = []
+        while len(records):
+            if self.segment is None or self.segment_count >= self.segment_records:
+                self._sync()
+                self._close_segment()
+                self._open_segment()
+            batch = records[:self.segment_records - self.segment_count]
+            records = records[len(batch):]
+
+            # Index entries for the records of this batch that fall on the stride
+            first = -self.segment_count % INDEX_STRIDE
+            indexed = np.arange(first, len(batch), INDEX_STRIDE)
+            entries = np.empty(len(indexed), dtype=INDEX_DTYPE)
+            entries['time'] = batch['time'][indexed]
+            entries['record'] = self.segment_count + indexed
+
+            self.segment.write(batch.tobytes())
+            self.index.write(entries.tobytes())
+            self.segment_count += len(batch)
+            self.records += len(batch)
+        self._sync()
+
+    def _sync(self):
+        if self.segment is None:
+            return
+        # Records before the index, so an index entry never points past the synced records
+        self.segment.flush()
+        os.fsync(self.segment.fileno())
+        self.index.flush()
+        os.fsync(self.index.fileno())
+        self.syncs += 1
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self._flush()
+            self._close_segment()
+            if self.detections is not None:
+                self.detections.close()
+            self.closed = True
+
+    def stats(self):
+        with self.lock:
+            return {
+                'directory': self.directory,
+                'records': self.records,
+                'pending': len(self.pending),
+                'segments': self.segment_number,
+                'syncs': self.syncs
+            }
+
+
+class FlightLogSegment:
+    """One segment file, memory-mapped on first access"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path + SEGMENT_SUFFIX, 'rb') as f:
+            magic, version, record_size, number = SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"Not a flight log segment: {path}{SEGMENT_SUFFIX}")
+        if version != SCHEMA_VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"Unsupported flight log schema version {version}")
+        self.number = number
+        # Whole records only: a crash may have left part of one at the end
+        self.count = (os.path.getsize(path + SEGMENT_SUFFIX) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+
+        self._records = None
+        index = np.fromfile(path + INDEX_SUFFIX, dtype=INDEX_DTYPE) if os.path.exists(path + INDEX_SUFFIX) else None
+        if index is None or (self.count and (len(index) == 0 or index['record'][0] != 0)):
+            index = self._rebuild_index()
+        self.index = index[index['record'] < self.count]
+
+    def _rebuild_index(self):
+        """Index of a segment whose index file is missing or damaged, read from the records"""
+        indexed = np.arange(0, self.count, INDEX_STRIDE)
+        index = np.empty(len(indexed), dtype=INDEX_DTYPE)
+        index['time'] = self.records['time'][indexed]
+        index['record'] = indexed
+        return index
+
+    @property
+    def records(self):
+        """The segment's records as a read-only array backed by the file"""
+        if self._records is None:
+            if self.count == 0:
+                self._records = np.empty(0, dtype=RECORD_DTYPE)
+            else:
+                self._records = np.memmap(self.path + SEGMENT_SUFFIX, dtype=RECORD_DTYPE, mode='r',
+                                          offset=HEADER_SIZE, shape=(self.count,))
+        return self._records
+
+    @property
+    def start_time(self):
+        return float(self.index['time'][0]) if self.count else None
+
+    @property
+    def end_time(self):
+        return float(self.records['time'][-1]) if self.count else None
+
+    def _bound(self, value, side):
+        """Record position of `value` in the time column, reading only one stride of it"""
+        block = int(np.searchsorted(self.index['time'], value, side=side))
+        lo = int(self.index['record'][block - 1]) if block > 0 else 0
+        hi = int(self.index['record'][block]) if block < len(self.index) else self.count
+        return lo + int(np.searchsorted(np.ascontiguousarray(self.records['time'][lo:hi]), value, side=side))
+
+    def window(self, start=None, stop=None):
+        """Records with start <= time <= stop, as a view of the mapped file"""
+        records = self.records
+        lo = 0 if start is None else self._bound(start, 'left')
+        hi = self.count if stop is None else self._bound(stop, 'right')
+        return records[lo:max(lo, hi)]
+
+    def close(self):
+        """Drop the mapping; it is unmapped once no window of it is left"""
+        self._records = None
+
+
+class FlightLog:
+    """
+    Read access to a flight log directory. Opening reads only segment headers and index files,
+    so a long flight opens immediately; records are mapped from disk as queries touch them.
+    """
+
+    def __init__(self, directory):
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"No flight log at {directory}")
+        self.directory = directory
+        names = sorted(name[:-len(SEGMENT_SUFFIX)] for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+        self.segments = [FlightLogSegment(os.path.join(directory, name)) for name in names]
+
+    def __len__(self):
+        return sum(segment.count for segment in self.segments)
+
+    @property
+    def start_time(self):
+        for segment in self.segments:
+            if segment.count:
+                return segment.start_time
+        return None
+
+    @property
+    def end_time(self):
+        for segment in reversed(self.segments):
+            if segment.count:
+                return segment.end_time
+        return None
+
+    def windows(self, start=None, stop=None):
+        """Zero-copy views of the records between start and stop, one per segment, oldest first"""
+        views = []
+        for segment in self.segments:
+            if not segment.count:
+                continue
+            if start is not None and segment.end_time < start:
+                continue
+            if stop is not None and segment.start_time > stop:
+                break
+            view = segment.window(start, stop)
+            if len(view):
+                views.append(view)
+        return views
+
+    def window(self, start=None, stop=None):
+        """Copy of the records between start and stop"""
+        views = self.windows(start, stop)
+        return np.concatenate(views) if views else np.empty(0, dtype=RECORD_DTYPE)
+
+    def columns(self, start=None, stop=None, fields=TELEMETRY_FIELDS):
+        """Contiguous copies of the time column and the given fields between start and stop"""
+        views = self.windows(start, stop)
+        return {
+            field: np.concatenate([view[field] for view in views]) if views else np.empty(0, dtype=RECORD_DTYPE[field])
+            for field in ('time',) + tuple(fields)
+        }
+
+    def detections(self, start=None, stop=None):
+        """Recorded detections as {'time', 'detection'} dicts in time order; a torn last line is skipped"""
+        path = os.path.join(self.directory, DETECTIONS_FILE)
+        if not os.path.exists(path):
+            return []
+        entries = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if (start is None or entry['time'] >= start) and (stop is None or entry['time'] <= stop):
+                    entries.append(entry)
+        entries.sort(key=lambda entry: entry['time'])
+        return entries
+
+    def history(self, start=None, stop=None, fields=None):
+        return to_columns(self.window(start, stop), fields)
+
+    def series(self, start=None, stop=None, fields=None, max_points=1000, method='lttb'):
+        fields = fields or TELEMETRY_FIELDS
+        return to_series(self.columns(start, stop, fields), fields, max_points, method)
+
+    def summary(self):
+        return {
+            'records': len(self),
+            'segments': len(self.segments),
+            'bytes': sum(os.path.getsize(segment.path + SEGMENT_SUFFIX) for segment in self.segments),
+            'start': self.start_time,
+            'end': self.end_time
+        }
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
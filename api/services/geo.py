@@ -0,0 +1,92 @@
+import numpy as np
+
+# Mean Earth radius in meters
+EARTH_RADIUS = 6371008.8
+
+# Default home point used when a request does not supply one
+DEFAULT_HOME = (37.7749, -122.4194)
+
+# Course changes sharper than this count as turns (degrees)
+TURN_THRESHOLD = 20.0
+
+
+def as_latlon_array(points):
+    """Convert a sequence of (lat, lon) pairs or waypoint dicts to an (N, 2) float64 array"""
+    if isinstance(points, np.ndarray):
+        return np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+    coords = []
+    for point in points:
+        if isinstance(point, dict):
+            lon = point['lon'] if 'lon' in point else point['lng']
+            coords.append((point['lat'], lon))
+        else:
+            coords.append((point[0], point[1]))
+    return np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+
+def square_area(origin, size):
+    """Build a square search area of `size` meters per side with its south-west corner at `origin`"""
+    frame = LocalFrame(origin[0], origin[1])
+    x = np.array([0.0, size, size, 0.0])
+    y = np.array([0.0, 0.0, size, size])
+    lat, lon = frame.to_geodetic(x, y)
+    return np.column_stack((lat, lon))
+
+
+class LocalFrame:
+    """
+    Equirectangular east/north projection around a reference point.
+    Accurate to well under a meter across the tens of kilometers a search area spans.
+    """
+
+    def __init__(self, ref_lat, ref_lon):
+        self.ref_lat = float(ref_lat)
+        self.ref_lon = float(ref_lon)
+        self.m_per_deg_lat = np.pi * EARTH_RADIUS / 180.0
+        self.m_per_deg_lon = self.m_per_deg_lat * np.cos(np.radians(self.ref_lat))
+
+    @classmethod
+    def around(cls, latlon):
+        """Create a frame centered on the bounding box of an (N, 2) lat/lon array"""
+        lo = latlon.min(axis=0)
+        hi = latlon.max(axis=0)
+        return cls((lo[0] + hi[0]) / 2.0, (lo[1] + hi[1]) / 2.0)
+
+    def to_local(self, lat, lon):
+        """Project latitude/longitude arrays to east/north meters"""
+        x = (np.asarray(lon, dtype=np.float64) - self.ref_lon) * self.m_per_deg_lon
+        y = (np.asarray(lat, dtype=np.float64) - self.ref_lat) * self.m_per_deg_lat
+        return x, y
+
+    def to_geodetic(self, x, y):
+        """Project east/north meter arrays back to latitude/longitude"""
+        lat = self.ref_lat + np.asarray(y, dtype=np.float64) / self.m_per_deg_lat
+        lon = self.ref_lon + np.asarray(x, dtype=np.float64) / self.m_per_deg_lon
+        return lat, lon
+
+
+def sweep_axes(heading):
+    """Unit vectors (east, north) along and across lanes flown on the given compass heading"""
+    theta = np.radians(heading)
+    along = np.array([np.sin(theta), np.cos(theta)])
+    across = np.array([np.cos(theta), -np.sin(theta)])
+    return along, across
+
+
+def leg_headings(x, y):
+    """Compass heading of the leg leaving each point of a path; the last point keeps the final leg's heading"""
+    if len(x) < 2:
+        return np.zeros(len(x))
+    headings = np.degrees(np.arctan2(np.diff(x), np.diff(y))) % 360.0
+    return np.append(headings, headings[-1])
+
+
+def turn_fractions(x, y, threshold=TURN_THRESHOLD):
+    """
+    Turn at each interior vertex of a path as a fraction of a full 180 degree turn; changes below
+    `threshold` degrees count as straight. A lane change (two 90 degree corners) adds up to one turn.
+    """
+    headings = np.degrees(np.arctan2(np.diff(x), np.diff(y)))
+    change = np.abs((np.diff(headings) + 180.0) % 360.0 - 180.0)
+    return np.where(change > threshold, change / 180.0, 0.0)
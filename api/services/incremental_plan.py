@@ -0,0 +1,221 @@
+import numpy as np
+
+from services.geo import sweep_axes
+from services.search_grid import DEFAULT_TURN_TIME, order_boustrophedon, route_around_holes, sweep_segments
+from services.waypoint_array import WaypointArray
+
+# Edge endpoints are compared after rounding to this many meters, so re-sent but unchanged
+# vertices do not count as changes
+EDGE_PRECISION = 0.01
+
+
+def _edge_keys(search_area):
+    """Every ring edge as an integer row (x0, y0, x1, y1) with endpoints in a canonical order"""
+    keys = []
+    for start, stop in search_area.rings:
+        x = np.round(search_area.x[start:stop] / EDGE_PRECISION).astype(np.int64)
+        y = np.round(search_area.y[start:stop] / EDGE_PRECISION).astype(np.int64)
+        a = np.column_stack((x, y))
+        b = np.roll(a, -1, axis=0)
+        swap = (a[:, 0] > b[:, 0]) | ((a[:, 0] == b[:, 0]) & (a[:, 1] > b[:, 1]))
+        keys.append(np.where(swap[:, None], np.hstack((b, a)), np.hstack((a, b))))
+    return np.concatenate(keys)
+
+
+def changed_edges(old_area, new_area):
+    """Edges (x0, y0, x1, y1 in meters) present in only one of two areas sharing a frame"""
+    rows, counts = np.unique(np.concatenate((_edge_keys(old_area), _edge_keys(new_area))),
+                             axis=0, return_counts=True)
+    return rows[counts == 1] * EDGE_PRECISION
+
+
+def _transitions(x, y, start, stop):
+    """Length and number of intermediate points of the path stretches from start[i] to stop[i]"""
+    distance = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    return distance[stop] - distance[start], stop - start - 1
+
+
+class LanePlan:
+    """
+    A lane-by-lane sweep mission kept at segment level so that it can be re-planned in place.
+    Segments are in flight order; lane k flies at across-track offset anchor + k * spacing, and
+    entry_wp/exit_wp give the waypoint index of each segment's entry and exit point. transit and
+    detours hold the length and the number of hole-avoiding corners of the leg into each segment.
+    """
+
+    def __init__(self, search_area, heading, spacing, anchor, seg_lane, seg_entry, seg_exit,
+                 waypoints, entry_wp, exit_wp, builder, transit=None, detours=None):
+        self.search_area = search_area
+        self.heading = heading
+        self.spacing = spacing
+        self.anchor = anchor
+        self.seg_lane = seg_lane
+        self.seg_entry = seg_entry
+        self.seg_exit = seg_exit
+        self.waypoints = waypoints
+        self.entry_wp = entry_wp
+        self.exit_wp = exit_wp
+        self.builder = builder
+        if transit is None:
+            entry_v = anchor + seg_lane * spacing
+            transit = np.concatenate(([0.0], np.hypot(seg_entry[1:] - seg_exit[:-1], np.diff(entry_v))))
+        self.transit = transit
+        self.detours = np.zeros(len(seg_lane), dtype=np.int64) if detours is None else detours
+
+    @classmethod
+    def from_sweep(cls, search_area, plan, builder):
+        """Build the mission waypoints for a SweepPlan and keep its segments for later re-plans"""
+        along, _ = sweep_axes(plan.heading)
+        u = plan.x * along[0] + plan.y * along[1]
+        waypoints, index = builder.build(plan.lat, plan.lon, plan.x, plan.y)
+        entry, exit_ = plan.entry_index, plan.exit_index
+        transit, detours = _transitions(plan.x, plan.y, exit_[:-1], entry[1:])
+        return cls(search_area, plan.heading, plan.spacing, plan.anchor, plan.lane, u[entry], u[exit_],
+                   waypoints, index[entry], index[exit_], builder,
+                   np.concatenate(([0.0], transit)), np.concatenate(([0], detours)))
+
+    def __len__(self):
+        return len(self.seg_lane)
+
+    @property
+    def lane_ordered(self):
+        """True when lanes are flown in increasing order, which in-place re-planning relies on"""
+        return bool(np.all(np.diff(self.seg_lane) >= 0))
+
+    def _points(self, u, v):
+        """Planning-frame x/y and lat/lon of sweep-frame points"""
+        along, across = sweep_axes(self.heading)
+        x = u * along[0] + v * across[0]
+        y = u * along[1] + v * across[1]
+        lat, lon = self.search_area.frame.to_geodetic(x, y)
+        return lat, lon, x, y
+
+    def stats(self, speed, turn_time=DEFAULT_TURN_TIME):
+        """Same figures as a fresh sweep plan reports, computed from the segments"""
+        sweep = np.abs(self.seg_exit - self.seg_entry).sum()
+        transit = self.transit.sum()
+        turns = max(0, len(self) - 1) + int(self.detours.sum())
+        return {
+            'turns': turns,
+            'pathLength': float(sweep + transit),
+            'estimatedFlightTime': float((sweep + transit) / speed + turns * turn_time),
+            'lanes': int(len(np.unique(self.seg_lane)))
+        }
+
+    def replan(self, search_area, flown=0):
+        """
+        Re-plan for a changed area (same frame) with `flown` waypoints already flown.
+        Only lanes crossed by edges that differ between the old and new area are re-intersected;
+        the unflown segments on those lanes are swapped for the new ones and everything else is
+        kept, so the work is proportional to the change. New coverage on lanes already flown past
+        would need backtracking and is left out (counted as skippedSegments).
+        Returns the new LanePlan, the waypoint splice (start, deleteCount, waypoints) and stats.
+        """
+        along, across = sweep_axes(self.heading)
+        edges = changed_edges(self.search_area, search_area)
+        if len(edges):
+            v = np.concatenate((edges[:, 0] * across[0] + edges[:, 1] * across[1],
+                                edges[:, 2] * across[0] + edges[:, 3] * across[1]))
+            k_lo = int(np.ceil((v.min() - self.anchor) / self.spacing))
+            k_hi = int(np.floor((v.max() - self.anchor) / self.spacing))
+        else:
+            k_lo, k_hi = 0, -1
+
+        count = len(self)
+        # Segments the drone has started are kept as flown; new lanes start after the last of them
+        kept = int(np.searchsorted(self.entry_wp, flown, side='left'))
+        first_lane = max(k_lo, int(self.seg_lane[kept - 1]) + 1 if kept else k_lo)
+        p = kept + int(np.searchsorted(self.seg_lane[kept:], first_lane, side='left'))
+        q = kept + int(np.searchsorted(self.seg_lane[kept:], k_hi, side='right'))
+        q = max(p, q)
+
+        if k_hi < k_lo:
+            lane = np.empty(0, dtype=np.int64)
+            start = end = np.empty(0)
+        else:
+            u = search_area.x * along[0] + search_area.y * along[1]
+            v = search_area.x * across[0] + search_area.y * across[1]
+            _, lane, start, end = sweep_segments(
+                u, v, search_area.rings, self.spacing,
+                lanes=(self.anchor + k_lo * self.spacing, k_hi - k_lo + 1)
+            )
+            lane = lane + k_lo
+        skipped = int(np.count_nonzero(lane < first_lane))
+        active = lane >= first_lane
+
+        # Keep alternating direction from the segment flown before the block
+        reverse_first = bool(p > 0 and self.seg_exit[p - 1] > self.seg_entry[p - 1])
+        new_lane, new_entry, new_exit = order_boustrophedon(lane[active], start[active], end[active], reverse_first)
+
+        if k_hi < k_lo or (q == p and len(new_lane) == 0):
+            # Nothing to re-plan; the area still changes for the next diff
+            plan = LanePlan(search_area, self.heading, self.spacing, self.anchor, self.seg_lane, self.seg_entry,
+                            self.seg_exit, self.waypoints, self.entry_wp, self.exit_wp, self.builder,
+                            self.transit, self.detours)
+            return plan, {'start': len(self.waypoints), 'deleteCount': 0, 'waypoints': WaypointArray.empty()}, {
+                'affectedLanes': 0, 'replacedSegments': 0, 'newSegments': 0, 'skippedSegments': skipped
+            }
+
+        # Rebuild from the exit of the segment before the block (its transition leg changes) up to
+        # the entry of the segment after it (kept, but needed for the last heading and transition)
+        path_lane = np.repeat(new_lane, 2)
+        path_u = np.column_stack((new_entry, new_exit)).ravel()
+        has_prev = p > 0
+        has_next = q < count
+        if has_prev:
+            path_lane = np.concatenate(([self.seg_lane[p - 1]], path_lane))
+            path_u = np.concatenate(([self.seg_exit[p - 1]], path_u))
+        if has_next:
+            path_lane = np.concatenate((path_lane, [self.seg_lane[q]]))
+            path_u = np.concatenate((path_u, [self.seg_entry[q]]))
+        # Transitions of the block go around the new area's holes
+        ring_u = search_area.x * along[0] + search_area.y * along[1]
+        ring_v = search_area.x * across[0] + search_area.y * across[1]
+        path_u, path_v, keep = route_around_holes(path_u, self.anchor + path_lane * self.spacing,
+                                                  ring_u, ring_v, search_area.rings)
+        built, index = self.builder.build(*self._points(path_u, path_v))
+        index = index[keep]
+        # Legs into the block's segments, and into the kept segment after it
+        first_leg = 0 if has_prev else 1
+        transit, detours = _transitions(path_u, path_v, keep[first_leg:-1:2], keep[first_leg + 1::2])
+        if not has_prev and len(keep) > 0:
+            transit, detours = np.concatenate(([0.0], transit)), np.concatenate(([0], detours))
+
+        block_index = index[1:] if has_prev else index
+        splice_start = int(self.exit_wp[p - 1]) if has_prev else 0
+        trim = 0
+        if has_prev and splice_start < flown:
+            # Already past the previous exit: fly straight from the current position to the new block
+            if len(new_lane):
+                trim = int(block_index[0])
+            else:
+                trim = int(index[-1]) if has_next else len(built)
+            splice_start = flown
+        built = built[trim:int(index[-1])] if has_next else built[trim:]
+        splice_stop = int(self.entry_wp[q]) if has_next else len(self.waypoints)
+        shift = len(built) - (splice_stop - splice_start)
+
+        waypoints = WaypointArray.concatenate((
+            self.waypoints[:splice_start], built, self.waypoints[splice_stop:]
+        ))
+        block_entry = splice_start - trim + block_index[0:2 * len(new_lane):2]
+        block_exit = splice_start - trim + block_index[1:2 * len(new_lane):2]
+        plan = LanePlan(
+            search_area, self.heading, self.spacing, self.anchor,
+            np.concatenate((self.seg_lane[:p], new_lane, self.seg_lane[q:])),
+            np.concatenate((self.seg_entry[:p], new_entry, self.seg_entry[q:])),
+            np.concatenate((self.seg_exit[:p], new_exit, self.seg_exit[q:])),
+            waypoints,
+            np.concatenate((self.entry_wp[:p], block_entry, self.entry_wp[q:] + shift)),
+            np.concatenate((self.exit_wp[:p], block_exit, self.exit_wp[q:] + shift)),
+            self.builder,
+            np.concatenate((self.transit[:p], transit, self.transit[q + 1:])),
+            np.concatenate((self.detours[:p], detours, self.detours[q + 1:]))
+        )
+        delta = {'start': splice_start, 'deleteCount': splice_stop - splice_start, 'waypoints': built}
+        return plan, delta, {
+            'affectedLanes': max(0, k_hi - first_lane + 1),
+            'replacedSegments': q - p,
+            'newSegments': len(new_lane),
+            'skippedSegments': skipped
+        }
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# Numbers are rounded to 7 decimals (~1 cm in latitude) before hashing, so parameters that differ
+# only by float noise, or by int vs float in JSON, share a cache entry.
+FLOAT_DECIMALS = 7
+
+
+def _canonical(value):
+    """Normalize parameters into a JSON-stable structure"""
+    if isinstance(value, dict):
+        if 'lat' in value and ('lon' in value or 'lng' in value):
+            lon = value['lon'] if 'lon' in value else value['lng']
+            return [round(float(value['lat']), FLOAT_DECIMALS), round(float(lon), FLOAT_DECIMALS)]
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if hasattr(value, 'tolist'):
+        return _canonical(value.tolist())
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), FLOAT_DECIMALS)
+    return str(value)
+
+
+def mission_key(**params):
+    """Canonical SHA-256 hash of mission parameters and area geometry"""
+    payload = json.dumps(_canonical(params), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MissionPlanCache:
+    """
+    Bounded LRU cache of generated mission plans keyed by mission_key().
+    Every key also includes the current geofence and terrain versions, so bumping either one
+    invalidates all plans computed against the old world state.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.versions = {'geofence': 0, 'terrain': 0}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, **params):
+        with self.lock:
+            versions = dict(self.versions)
+        return mission_key(_versions=versions, **params)
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, params, factory):
+        """Return the cached plan for params, building and storing it with factory() on a miss"""
+        key = self.key(**params)
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, reason=None):
+        """Drop every cached plan; reason 'geofence' or 'terrain' also bumps that version"""
+        with self.lock:
+            if reason in self.versions:
+                self.versions[reason] += 1
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'maxEntries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': self.hits / lookups if lookups else 0.0,
+                'geofenceVersion': self.versions['geofence'],
+                'terrainVersion': self.versions['terrain']
+            }
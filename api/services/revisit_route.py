@@ -0,0 +1,173 @@
+import time
+
+import numpy as np
+
+from services.geo import DEFAULT_HOME, LocalFrame, as_latlon_array
+from services.search_grid import PathPlan
+
+# Wall-clock seconds the local search may spend improving the route
+DEFAULT_TIME_BUDGET = 0.5
+
+# Longest run of consecutive stops Or-opt tries to move elsewhere in the route
+OR_OPT_LENGTHS = (1, 2, 3)
+
+# Moves must shorten the route by more than this many meters, so float noise cannot cycle
+IMPROVEMENT_EPSILON = 1e-7
+
+
+def distance_matrix(x, y):
+    """Pairwise distances between points given in local meters"""
+    return np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+
+
+def tour_length(tour, dist):
+    """Length of the closed tour (back to tour[0])"""
+    return float(dist[tour, np.roll(tour, -1)].sum())
+
+
+def nearest_neighbour(dist, start=0):
+    """Greedy tour from `start` that always flies to the closest unvisited point"""
+    n = len(dist)
+    tour = np.empty(n, dtype=np.int64)
+    visited = np.zeros(n, dtype=bool)
+    tour[0] = start
+    visited[start] = True
+    for k in range(1, n):
+        row = np.where(visited, np.inf, dist[tour[k - 1]])
+        tour[k] = int(np.argmin(row))
+        visited[tour[k]] = True
+    return tour
+
+
+def two_opt_pass(tour, dist, deadline):
+    """
+    One sweep of 2-opt over a closed tour with tour[0] fixed: for each edge, the best exchange
+    with every later edge is evaluated at once and applied if it shortens the tour.
+    Returns the number of improving moves made.
+    """
+    n = len(tour)
+    moves = 0
+    for i in range(n - 2):
+        if time.perf_counter() > deadline:
+            break
+        nxt = np.roll(tour, -1)
+        # Replace edges (a, b) and (c, d) by (a, c) and (b, d), for every later edge (c, d)
+        j = np.arange(i + 2, n if i > 0 else n - 1)
+        if len(j) == 0:
+            continue
+        a, b = tour[i], nxt[i]
+        gain = dist[a, tour[j]] + dist[b, nxt[j]] - dist[a, b] - dist[tour[j], nxt[j]]
+        best = int(np.argmin(gain))
+        if gain[best] < -IMPROVEMENT_EPSILON:
+            k = int(j[best])
+            tour[i + 1:k + 1] = tour[i + 1:k + 1][::-1].copy()
+            moves += 1
+    return moves
+
+
+def or_opt_pass(tour, dist, deadline):
+    """
+    One sweep of Or-opt: every run of 1-3 consecutive stops is tried at every other edge of the
+    tour, in both directions, and moved to the best place if that shortens the tour.
+    Returns the number of improving moves made.
+    """
+    n = len(tour)
+    moves = 0
+    for length in OR_OPT_LENGTHS:
+        i = 1
+        while i + length <= n:
+            if time.perf_counter() > deadline:
+                return moves
+            nxt = np.roll(tour, -1)
+            first, last = tour[i], tour[i + length - 1]
+            before, after = tour[i - 1], nxt[i + length - 1]
+            removed = dist[before, first] + dist[last, after] - dist[before, after]
+
+            # Insertion between c and e for every edge (c, e) not touching the run
+            j = np.concatenate((np.arange(0, i - 1), np.arange(i + length, n)))
+            if len(j) == 0:
+                i += 1
+                continue
+            c, e = tour[j], nxt[j]
+            forward = dist[c, first] + dist[last, e] - dist[c, e]
+            backward = dist[c, last] + dist[first, e] - dist[c, e]
+            cost = np.minimum(forward, backward)
+            best = int(np.argmin(cost))
+            if cost[best] < removed - IMPROVEMENT_EPSILON:
+                run = tour[i:i + length].copy()
+                if backward[best] < forward[best]:
+                    run = run[::-1]
+                rest = np.delete(tour, np.arange(i, i + length))
+                k = int(j[best])
+                position = k + 1 if k < i else k + 1 - length
+                tour[:] = np.insert(rest, position, run)
+                moves += 1
+            else:
+                i += 1
+    return moves
+
+
+def improve_tour(tour, dist, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Alternate 2-opt and Or-opt passes until neither finds an improving move or the time budget
+    runs out. tour[0] stays in place. Returns the improved tour and whether it converged.
+    """
+    tour = tour.copy()
+    deadline = time.perf_counter() + time_budget
+    while time.perf_counter() < deadline:
+        moves = two_opt_pass(tour, dist, deadline)
+        moves += or_opt_pass(tour, dist, deadline)
+        if moves == 0:
+            return tour, True
+    return tour, False
+
+
+class RevisitRoute:
+    """Closed route from home through a set of target points, in visit order"""
+
+    def __init__(self, plan, order, initial_length, converged, solve_time):
+        self.plan = plan
+        self.order = order
+        self.initial_length = initial_length
+        self.converged = converged
+        self.solve_time = solve_time
+
+    def to_dict(self):
+        length = self.plan.path_length()
+        return {
+            'targets': len(self.order),
+            'visitOrder': self.order.tolist(),
+            'turns': self.plan.turn_count,
+            'pathLength': length,
+            'initialPathLength': self.initial_length,
+            'improvement': self.initial_length - length,
+            'converged': self.converged,
+            'solveTime': self.solve_time
+        }
+
+
+def plan_revisit_route(targets, home=DEFAULT_HOME, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Shortest route found within `time_budget` seconds that leaves home, visits every target
+    [lat, lon] once and returns home: nearest neighbour construction refined by 2-opt and Or-opt.
+    """
+    started = time.perf_counter()
+    targets = as_latlon_array(targets)
+    if len(targets) == 0:
+        raise ValueError("No targets to revisit")
+
+    frame = LocalFrame(home[0], home[1])
+    lat = np.concatenate(([home[0]], targets[:, 0]))
+    lon = np.concatenate(([home[1]], targets[:, 1]))
+    x, y = frame.to_local(lat, lon)
+    dist = distance_matrix(x, y)
+
+    # Node 0 is home and stays first, so the tour is the route out and back
+    tour = nearest_neighbour(dist)
+    initial_length = tour_length(tour, dist)
+    tour, converged = improve_tour(tour, dist, time_budget)
+
+    path = np.append(tour, 0)
+    plan = PathPlan(lat[path], lon[path], x[path], y[path])
+    return RevisitRoute(plan, tour[1:] - 1, initial_length, converged, time.perf_counter() - started)
+
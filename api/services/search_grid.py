@@ -0,0 +1,461 @@
+import numpy as np
+
+from services.geo import LocalFrame, as_latlon_array, leg_headings, sweep_axes
+from services.waypoint_array import WaypointArray
+
+# Seconds lost per turn to decelerate, yaw and accelerate back to cruise speed
+DEFAULT_TURN_TIME = 6.0
+
+# Distance (meters) below which points count as the same when routing around holes
+ROUTE_EPSILON = 1e-6
+
+
+class PathPlan:
+    """
+    Flight path stored as flat NumPy arrays: geodetic lat/lon plus the local east/north
+    meters (x/y) of the frame the path was planned in.
+    """
+
+    def __init__(self, lat, lon, x, y):
+        self.lat = lat
+        self.lon = lon
+        self.x = x
+        self.y = y
+
+    def __len__(self):
+        return len(self.lat)
+
+    @property
+    def turn_count(self):
+        """Number of course changes along the path"""
+        return max(0, len(self.lat) - 2)
+
+    def path_length(self):
+        """Total flown distance in meters"""
+        if len(self.x) < 2:
+            return 0.0
+        return float(np.hypot(np.diff(self.x), np.diff(self.y)).sum())
+
+    def estimate_flight_time(self, speed, turn_time=DEFAULT_TURN_TIME):
+        """Estimated seconds to fly the plan: cruise time plus a fixed penalty per turn"""
+        return self.path_length() / speed + self.turn_count * turn_time
+
+    def leg_headings(self):
+        """Compass heading of the leg leaving each waypoint; the last waypoint keeps the final leg's heading"""
+        return leg_headings(self.x, self.y)
+
+    def to_waypoint_array(self, altitude, speed=0.0, gimbal_pitch=-90.0, capture=0):
+        """Columnar waypoints for the path with the given per-mission action settings"""
+        return WaypointArray.from_columns(
+            self.lat, self.lon, alt=altitude, speed=speed, heading=self.leg_headings(),
+            gimbal_pitch=gimbal_pitch, capture=capture
+        )
+
+    def to_waypoints(self, altitude):
+        """Materialize the plan as the list of waypoint dicts used by the mission API"""
+        return self.to_waypoint_array(altitude).to_dicts()
+
+
+class SweepPlan(PathPlan):
+    """
+    Boustrophedon (lawnmower) coverage path.
+    Waypoints are the sweep segments' entry and exit points in flight order, plus the corners of
+    any detour a transition takes around a hole. `lane` holds the lane index of each segment, and
+    entry_index/exit_index the waypoint at which each segment starts and ends.
+    """
+
+    def __init__(self, lat, lon, x, y, lane, spacing, heading, anchor=0.0, entry_index=None, exit_index=None):
+        super().__init__(lat, lon, x, y)
+        self.lane = lane
+        self.spacing = spacing
+        self.heading = heading
+        # Across-track offset of lane 0; lane k flies at anchor + k * spacing
+        self.anchor = anchor
+        self.entry_index = np.arange(0, 2 * len(lane), 2) if entry_index is None else entry_index
+        self.exit_index = self.entry_index + 1 if exit_index is None else exit_index
+
+    @property
+    def lane_count(self):
+        return int(len(np.unique(self.lane)))
+
+    @property
+    def turn_count(self):
+        """Number of transitions between sweep segments, plus the corners of detours around holes"""
+        detours = len(self.lat) - 2 * len(self.lane)
+        return max(0, len(self.lane) - 1) + detours
+
+
+def _ring_edges(u, v, rings):
+    """Start/end coordinates of every edge of every closed ring"""
+    u0, v0, u1, v1 = [], [], [], []
+    for start, stop in rings:
+        ring_u = u[start:stop]
+        ring_v = v[start:stop]
+        u0.append(ring_u)
+        v0.append(ring_v)
+        u1.append(np.roll(ring_u, -1))
+        v1.append(np.roll(ring_v, -1))
+    return np.concatenate(u0), np.concatenate(v0), np.concatenate(u1), np.concatenate(v1)
+
+
+def sweep_segments(u, v, rings, spacing, lanes=None):
+    """
+    Intersect evenly spaced lanes (constant v) with the polygon rings in a single batched pass.
+    Returns the lane offsets and, per covered segment, its lane index and entry/exit along-track positions.
+    `lanes` = (first offset, lane count) sweeps a given run of lanes instead of centering them on the area.
+    """
+    if lanes is None:
+        outer_start, outer_stop = rings[0]
+        v_min = v[outer_start:outer_stop].min()
+        v_max = v[outer_start:outer_stop].max()
+        extent = v_max - v_min
+
+        # Center the lanes across the area so both edges get half a spacing of margin
+        lane_count = max(1, int(np.ceil(extent / spacing)))
+        first = v_min + (extent - (lane_count - 1) * spacing) / 2.0
+    else:
+        first, lane_count = lanes
+    offsets = first + spacing * np.arange(lane_count)
+
+    eu0, ev0, eu1, ev1 = _ring_edges(u, v, rings)
+    lo = np.minimum(ev0, ev1)
+    hi = np.maximum(ev0, ev1)
+
+    # Each edge crosses the lanes with lo <= offset < hi; the half-open test counts shared vertices once
+    k_start = np.clip(np.ceil((lo - first) / spacing), 0, lane_count).astype(np.int64)
+    k_stop = np.clip(np.ceil((hi - first) / spacing), 0, lane_count).astype(np.int64)
+    counts = np.maximum(k_stop - k_start, 0)
+    total = int(counts.sum())
+    empty = np.empty(0, dtype=np.float64)
+    if total == 0:
+        return offsets, np.empty(0, dtype=np.int64), empty, empty
+
+    edge = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    lane = k_start[edge] + within
+
+    t = (offsets[lane] - ev0[edge]) / (ev1[edge] - ev0[edge])
+    cross = eu0[edge] + t * (eu1[edge] - eu0[edge])
+
+    order = np.lexsort((cross, lane))
+    lane = lane[order]
+    cross = cross[order]
+
+    # Even-odd rule: crossings pair up into inside segments. Drop any lane left with an odd
+    # count by a degenerate vertex so the pairing stays aligned.
+    per_lane = np.bincount(lane, minlength=lane_count)
+    valid = (per_lane % 2 == 0)[lane]
+    lane = lane[valid]
+    cross = cross[valid]
+
+    return offsets, lane[0::2], cross[0::2], cross[1::2]
+
+
+def order_boustrophedon(seg_lane, seg_start, seg_end, reverse_first=False):
+    """Order segments lane by lane, reversing direction on every other covered lane"""
+    if len(seg_lane) == 0:
+        return seg_lane, seg_start, seg_end
+
+    _, rank = np.unique(seg_lane, return_inverse=True)
+    reverse = ((rank % 2) == 1) != reverse_first
+    key = np.where(reverse, -seg_start, seg_start)
+    order = np.lexsort((key, seg_lane))
+
+    seg_lane = seg_lane[order]
+    reverse = reverse[order]
+    entry = np.where(reverse, seg_end[order], seg_start[order])
+    exit_ = np.where(reverse, seg_start[order], seg_end[order])
+    return seg_lane, entry, exit_
+
+
+def decompose_cells(seg_lane, seg_start, seg_end):
+    """
+    Boustrophedon cell decomposition of the sweep segments.
+    A new cell starts wherever the number of segments per lane changes (a critical point of the
+    polygon or a hole) or a segment stops overlapping its neighbour on the previous lane.
+    Returns the cell id of every segment; ids increase with lane order.
+    """
+    if len(seg_lane) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    lanes, first, counts = np.unique(seg_lane, return_index=True, return_counts=True)
+    lane_of_seg = np.repeat(np.arange(len(lanes)), counts)
+    pos = np.arange(len(seg_lane)) - first[lane_of_seg]
+
+    breaks = np.ones(len(lanes), dtype=bool)
+    breaks[1:] = (counts[1:] != counts[:-1]) | (np.diff(lanes) != 1)
+
+    # Segments on a continuing lane pair up by position with the previous lane's segments
+    continuing = np.nonzero(~breaks[lane_of_seg])[0]
+    prev = continuing - counts[lane_of_seg[continuing] - 1]
+    overlaps = (seg_start[continuing] < seg_end[prev]) & (seg_end[continuing] > seg_start[prev])
+    breaks[lane_of_seg[continuing[~overlaps]]] = True
+
+    band = np.cumsum(breaks) - 1
+    key = band[lane_of_seg] * int(counts.max()) + pos
+    _, cell = np.unique(key, return_inverse=True)
+    return cell
+
+
+def order_cells(seg_lane, seg_start, seg_end, offsets):
+    """
+    Order segments cell by cell, sweeping each cell as its own boustrophedon.
+    Each cell is entered at whichever of its four corners is closest to where the previous one ended.
+    """
+    if len(seg_lane) == 0:
+        return seg_lane, seg_start, seg_end
+
+    cell = decompose_cells(seg_lane, seg_start, seg_end)
+    order = np.lexsort((seg_lane, cell))
+    seg_lane = seg_lane[order]
+    seg_start = seg_start[order]
+    seg_end = seg_end[order]
+    bounds = np.flatnonzero(np.diff(cell[order])) + 1
+
+    lanes_out, entry_out, exit_out = [], [], []
+    cursor = None
+    for lane, start, end in zip(np.split(seg_lane, bounds), np.split(seg_start, bounds), np.split(seg_end, bounds)):
+        reverse = (np.arange(len(lane)) % 2) == 1
+        if cursor is not None:
+            first_v, last_v = offsets[lane[0]], offsets[lane[-1]]
+            corners = np.array([
+                np.hypot(start[0] - cursor[0], first_v - cursor[1]),
+                np.hypot(end[0] - cursor[0], first_v - cursor[1]),
+                np.hypot(start[-1] - cursor[0], last_v - cursor[1]),
+                np.hypot(end[-1] - cursor[0], last_v - cursor[1]),
+            ])
+            corner = int(np.argmin(corners))
+            if corner >= 2:
+                lane, start, end = lane[::-1], start[::-1], end[::-1]
+            if corner % 2 == 1:
+                reverse = ~reverse
+
+        entry = np.where(reverse, end, start)
+        exit_ = np.where(reverse, start, end)
+        cursor = (exit_[-1], offsets[lane[-1]])
+        lanes_out.append(lane)
+        entry_out.append(entry)
+        exit_out.append(exit_)
+
+    return np.concatenate(lanes_out), np.concatenate(entry_out), np.concatenate(exit_out)
+
+
+def _inside_ring(pu, pv, ring_u, ring_v):
+    """Even-odd test of points against one ring; points on the boundary are outside"""
+    au, av = ring_u[None, :], ring_v[None, :]
+    bu, bv = np.roll(ring_u, -1)[None, :], np.roll(ring_v, -1)[None, :]
+    pu, pv = pu[:, None], pv[:, None]
+    straddles = (av > pv) != (bv > pv)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_u = au + (pv - av) / (bv - av) * (bu - au)
+    inside = np.count_nonzero(straddles & (pu < cross_u), axis=1) % 2 == 1
+
+    # Distance to the nearest edge, to tell boundary points from inside ones
+    eu, ev = bu - au, bv - av
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(((pu - au) * eu + (pv - av) * ev) / (eu * eu + ev * ev), 0.0, 1.0)
+    t = np.nan_to_num(t)
+    distance = np.hypot(pu - au - t * eu, pv - av - t * ev).min(axis=1)
+    return inside & (distance > ROUTE_EPSILON)
+
+
+def _ring_crossing(p, q, ring_u, ring_v):
+    """
+    Where the leg p-q runs through the inside of a ring: (t_in, edge_in, t_out, edge_out) with t the
+    fraction along the leg and edge the ring edge crossed there, or None if it stays outside.
+    Legs that only touch the ring, or run along its boundary, stay outside.
+    """
+    du, dv = q[0] - p[0], q[1] - p[1]
+    length = np.hypot(du, dv)
+    if length < ROUTE_EPSILON:
+        return None
+    eu = np.roll(ring_u, -1) - ring_u
+    ev = np.roll(ring_v, -1) - ring_v
+    wu = ring_u - p[0]
+    wv = ring_v - p[1]
+    denom = du * ev - dv * eu
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (wu * ev - wv * eu) / denom
+        s = (wu * dv - wv * du) / denom
+    tolerance = ROUTE_EPSILON / length
+    hit = np.isfinite(t) & (t >= -tolerance) & (t <= 1 + tolerance) & (s >= -1e-9) & (s <= 1 + 1e-9)
+    if not hit.any():
+        return None
+
+    edges = np.flatnonzero(hit)
+    t = np.clip(t[hit], 0.0, 1.0)
+    # The leg is inside between some pair of consecutive crossings; test the middle of each stretch
+    breaks = np.unique(np.concatenate(([0.0, 1.0], t)))
+    middle = (breaks[:-1] + breaks[1:]) / 2.0
+    inside = _inside_ring(p[0] + middle * du, p[1] + middle * dv, ring_u, ring_v)
+    inside &= np.diff(breaks) > tolerance
+    if not inside.any():
+        return None
+    stretches = np.flatnonzero(inside)
+    t_in, t_out = breaks[stretches[0]], breaks[stretches[-1] + 1]
+    return t_in, int(edges[np.argmin(np.abs(t - t_in))]), t_out, int(edges[np.argmin(np.abs(t - t_out))])
+
+
+def _around_ring(p, q, ring_u, ring_v):
+    """Points to fly between p and q so the leg follows the ring's boundary instead of crossing it"""
+    crossing = _ring_crossing(p, q, ring_u, ring_v)
+    if crossing is None:
+        return []
+    t_in, edge_in, t_out, edge_out = crossing
+    count = len(ring_u)
+    if edge_in == edge_out:
+        return []
+    entry = (p[0] + t_in * (q[0] - p[0]), p[1] + t_in * (q[1] - p[1]))
+    exit_ = (p[0] + t_out * (q[0] - p[0]), p[1] + t_out * (q[1] - p[1]))
+
+    # Vertices passed going either way round, from the entry edge to the exit edge
+    forward = (edge_in + 1 + np.arange((edge_out - edge_in) % count)) % count
+    backward = (edge_in - np.arange((edge_in - edge_out) % count)) % count
+    routes = []
+    for vertices in (forward, backward):
+        route_u = np.concatenate(([entry[0]], ring_u[vertices], [exit_[0]]))
+        route_v = np.concatenate(([entry[1]], ring_v[vertices], [exit_[1]]))
+        routes.append((np.hypot(np.diff(route_u), np.diff(route_v)).sum(), route_u, route_v))
+    _, route_u, route_v = min(routes, key=lambda route: route[0])
+
+    # The entry and exit points are dropped where they coincide with the leg's own ends
+    points = list(zip(route_u.tolist(), route_v.tolist()))
+    if np.hypot(points[0][0] - p[0], points[0][1] - p[1]) < ROUTE_EPSILON:
+        points = points[1:]
+    if np.hypot(points[-1][0] - q[0], points[-1][1] - q[1]) < ROUTE_EPSILON:
+        points = points[:-1]
+    return points
+
+
+def route_around_holes(path_u, path_v, u, v, rings):
+    """
+    Add waypoints so that no leg of a path crosses a hole of the area: a leg through a hole takes
+    the shorter way around the hole's boundary instead. Works in any frame the rings are given in.
+    Returns the routed u and v and the position every input point ended up at.
+    """
+    count = len(path_u)
+    keep = np.arange(count)
+    if len(rings) < 2 or count < 2:
+        return path_u, path_v, keep
+
+    holes = [(u[start:stop], v[start:stop]) for start, stop in rings[1:]]
+    box = np.array([(ring_u.min(), ring_u.max(), ring_v.min(), ring_v.max()) for ring_u, ring_v in holes])
+    lo_u, hi_u = np.minimum(path_u[:-1], path_u[1:]), np.maximum(path_u[:-1], path_u[1:])
+    lo_v, hi_v = np.minimum(path_v[:-1], path_v[1:]), np.maximum(path_v[:-1], path_v[1:])
+    # Only legs whose bounding box overlaps a hole's can cross it
+    near = ((lo_u[:, None] < box[:, 1]) & (hi_u[:, None] > box[:, 0])
+            & (lo_v[:, None] < box[:, 3]) & (hi_v[:, None] > box[:, 2]))
+
+    inserted = {}
+    for leg in np.flatnonzero(near.any(axis=1)):
+        route = [(path_u[leg], path_v[leg]), (path_u[leg + 1], path_v[leg + 1])]
+        for hole in np.flatnonzero(near[leg]):
+            routed = [route[0]]
+            for p, q in zip(route[:-1], route[1:]):
+                routed.extend(_around_ring(p, q, *holes[hole]))
+                routed.append(q)
+            route = routed
+        if len(route) > 2:
+            inserted[int(leg)] = route[1:-1]
+    if not inserted:
+        return path_u, path_v, keep
+
+    legs = sorted(inserted)
+    points = np.array([point for leg in legs for point in inserted[leg]])
+    before = np.repeat([leg + 1 for leg in legs], [len(inserted[leg]) for leg in legs])
+    added = np.zeros(count, dtype=np.int64)
+    added[[leg + 1 for leg in legs]] = [len(inserted[leg]) for leg in legs]
+    return np.insert(path_u, before, points[:, 0]), np.insert(path_v, before, points[:, 1]), keep + np.cumsum(added)
+
+
+class SearchArea:
+    """
+    Search polygon (outer ring plus optional hole rings) projected once into a local metric frame,
+    so several sweeps over the same area do not repeat the projection.
+    """
+
+    def __init__(self, area, holes=None, frame=None):
+        rings = []
+        bounds = []
+        start = 0
+        for ring in [area] + list(holes or []):
+            ring = as_latlon_array(ring)
+            # Accept explicitly closed rings as well as open ones
+            if len(ring) > 1 and np.array_equal(ring[0], ring[-1]):
+                ring = ring[:-1]
+            if len(ring) < 3:
+                raise ValueError("Search area rings need at least 3 distinct vertices")
+            rings.append(ring)
+            bounds.append((start, start + len(ring)))
+            start += len(ring)
+
+        self.latlon = np.concatenate(rings)
+        self.rings = bounds
+        outer_start, outer_stop = bounds[0]
+        self.frame = frame or LocalFrame.around(self.latlon[outer_start:outer_stop])
+        self.x, self.y = self.frame.to_local(self.latlon[:, 0], self.latlon[:, 1])
+
+    def edge_headings(self):
+        """Compass bearing (0-180) of every outer-ring edge, longest first"""
+        outer_start, outer_stop = self.rings[0]
+        x = self.x[outer_start:outer_stop]
+        y = self.y[outer_start:outer_stop]
+        dx = np.roll(x, -1) - x
+        dy = np.roll(y, -1) - y
+        order = np.argsort(-np.hypot(dx, dy))
+        return np.degrees(np.arctan2(dx, dy))[order] % 180.0
+
+    def legs_through_holes(self, plan):
+        """Number of legs of a plan (in this area's frame) that pass through the inside of a hole"""
+        if len(self.rings) < 2 or len(plan) < 2:
+            return 0
+        _, _, keep = route_around_holes(plan.x, plan.y, self.x, self.y, self.rings)
+        return int(np.count_nonzero(np.diff(keep) > 1))
+
+    def sweep(self, spacing, heading=0.0, decomposition='lanes'):
+        """Build the coverage path for one lane spacing, heading and decomposition"""
+        if spacing <= 0:
+            raise ValueError("Track spacing must be positive")
+        if decomposition not in DECOMPOSITIONS:
+            raise ValueError(f"Unknown decomposition: {decomposition}")
+
+        along, across = sweep_axes(heading)
+        u = self.x * along[0] + self.y * along[1]
+        v = self.x * across[0] + self.y * across[1]
+
+        offsets, seg_lane, seg_start, seg_end = sweep_segments(u, v, self.rings, spacing)
+        if decomposition == 'cells':
+            seg_lane, entry, exit_ = order_cells(seg_lane, seg_start, seg_end, offsets)
+        else:
+            seg_lane, entry, exit_ = order_boustrophedon(seg_lane, seg_start, seg_end)
+
+        # Interleave entry/exit so each segment contributes two consecutive waypoints; transitions
+        # that would cut across a hole go around it
+        wp_u = np.column_stack((entry, exit_)).ravel()
+        wp_v = np.repeat(offsets[seg_lane], 2)
+        wp_u, wp_v, keep = route_around_holes(wp_u, wp_v, u, v, self.rings)
+        wp_x = wp_u * along[0] + wp_v * across[0]
+        wp_y = wp_u * along[1] + wp_v * across[1]
+        lat, lon = self.frame.to_geodetic(wp_x, wp_y)
+
+        return SweepPlan(lat, lon, wp_x, wp_y, seg_lane, float(spacing), float(heading),
+                         anchor=float(offsets[0]), entry_index=keep[0::2], exit_index=keep[1::2])
+
+
+# 'lanes' sweeps the whole area lane by lane; 'cells' sweeps each boustrophedon cell in turn
+DECOMPOSITIONS = ('lanes', 'cells')
+
+
+def generate_search_grid(area, spacing, heading=0.0, holes=None, decomposition='lanes'):
+    """
+    Build a lawnmower coverage path over a polygon.
+
+    area          -- outer boundary as (lat, lon) pairs or waypoint dicts, or a SearchArea
+    spacing       -- distance between adjacent lanes in meters
+    heading       -- compass bearing of the lanes in degrees (0 flies north/south lanes)
+    holes         -- optional list of rings to leave uncovered (no-fly zones, cleared sectors)
+    decomposition -- 'lanes' or 'cells' (see DECOMPOSITIONS)
+    """
+    if not isinstance(area, SearchArea):
+        area = SearchArea(area, holes)
+    return area.sweep(spacing, heading, decomposition)
@@ -0,0 +1,103 @@
+from functools import lru_cache
+
+import numpy as np
+
+from services.geo import LocalFrame
+from services.search_grid import PathPlan
+
+# Unit templates are laid out in a local frame where +y is the commence heading and +x is to its right.
+# They depend only on their integer shape parameters, so each is built once and reused for every datum.
+
+
+def _freeze(points):
+    points = np.asarray(points, dtype=np.float64)
+    points.setflags(write=False)
+    return points
+
+
+def _turtle(lengths, turn):
+    """Vertices of a path that starts at the origin heading +y and turns right by `turn` degrees after each leg"""
+    bearings = np.radians(turn * np.arange(len(lengths)))
+    steps = np.column_stack((np.sin(bearings), np.cos(bearings))) * np.asarray(lengths, dtype=np.float64)[:, None]
+    return np.vstack(([0.0, 0.0], np.cumsum(steps, axis=0)))
+
+
+@lru_cache(maxsize=128)
+def expanding_square_template(legs):
+    """Expanding square (SS): legs of 1, 1, 2, 2, 3, 3, ... track spacings, turning right 90 degrees"""
+    return _freeze(_turtle((np.arange(legs) // 2) + 1, 90.0))
+
+
+@lru_cache(maxsize=8)
+def sector_template():
+    """Sector search (VS): three 120-degree sectors of unit radius, returning to the datum"""
+    return _freeze(_turtle([1, 1, 2, 1, 2, 1, 1], 120.0))
+
+
+@lru_cache(maxsize=128)
+def creeping_line_template(legs):
+    """Creeping line (CS): unit-length legs across the heading, advancing one spacing per leg, centered on the datum"""
+    advance = np.repeat(np.arange(legs) - (legs - 1) / 2.0, 2)
+    across = np.tile([-0.5, 0.5, 0.5, -0.5], (legs + 1) // 2)[:2 * legs]
+    return _freeze(np.column_stack((across, advance)))
+
+
+@lru_cache(maxsize=128)
+def track_line_template(legs):
+    """Track line (TS): unit-length lanes along the track, spaced one apart and centered on it"""
+    offset = np.repeat(np.arange(legs) - (legs - 1) / 2.0, 2)
+    along = np.tile([0.0, 1.0, 1.0, 0.0], (legs + 1) // 2)[:2 * legs]
+    return _freeze(np.column_stack((offset, along)))
+
+
+def place_template(template, datum, heading, scale_x, scale_y):
+    """Scale a unit template, rotate it onto a compass heading and translate it to the datum"""
+    theta = np.radians(heading)
+    sx = template[:, 0] * scale_x
+    sy = template[:, 1] * scale_y
+    x = sx * np.cos(theta) + sy * np.sin(theta)
+    y = -sx * np.sin(theta) + sy * np.cos(theta)
+    frame = LocalFrame(datum[0], datum[1])
+    lat, lon = frame.to_geodetic(x, y)
+    return PathPlan(lat, lon, x, y)
+
+
+def expanding_square(datum, spacing, extent, heading=0.0):
+    """Expanding square covering roughly an `extent` x `extent` box around the datum"""
+    legs = 2 * max(1, int(np.ceil(extent / spacing)))
+    return place_template(expanding_square_template(legs), datum, heading, spacing, spacing)
+
+
+def sector_search(datum, spacing, extent, heading=0.0):
+    """Sector search of radius extent / 2 (spacing is implied by the pattern geometry)"""
+    radius = extent / 2.0
+    return place_template(sector_template(), datum, heading, radius, radius)
+
+
+def creeping_line(datum, spacing, extent, heading=0.0):
+    """Creeping line over an `extent` square centered on the datum, advancing along the heading"""
+    legs = max(1, int(np.ceil(extent / spacing)))
+    return place_template(creeping_line_template(legs), datum, heading, extent, spacing)
+
+
+def track_line(datum, spacing, extent, heading=0.0, legs=2):
+    """Track line search along `extent` meters of intended track starting at the datum (return variant by default)"""
+    return place_template(track_line_template(legs), datum, heading, spacing, extent)
+
+
+# Mission types handled by the pattern generators
+PATTERNS = {
+    'Expanding Square': expanding_square,
+    'Sector Search': sector_search,
+    'Creeping Line': creeping_line,
+    'Track Line': track_line,
+}
+
+
+def generate_pattern(pattern, datum, spacing, extent, heading=0.0):
+    """Generate a named IAMSAR search pattern around the datum (lat, lon)"""
+    if pattern not in PATTERNS:
+        raise ValueError(f"Unknown search pattern: {pattern}")
+    if spacing <= 0 or extent <= 0:
+        raise ValueError("Track spacing and extent must be positive")
+    return PATTERNS[pattern](datum, spacing, extent, heading)
@@ -0,0 +1,253 @@
+import math
+
+import numpy as np
+
+from services.geo import DEFAULT_HOME, LocalFrame, turn_fractions
+from services.search_grid import DEFAULT_TURN_TIME
+from services.waypoint_array import WaypointArray
+
+# Sortie ends are searched in growing windows starting at this many waypoints, so each sortie
+# costs time proportional to its own length and the whole segmentation stays linear
+SEARCH_WINDOW = 64
+
+
+class BatteryModel:
+    """
+    Energy budget of one battery set, in watt-hours.
+    `reserve` is the fraction of capacity that must still be left on landing.
+    Raises ValueError for a budget no path can be planned with.
+    """
+
+    def __init__(self, capacity=548.0, per_meter=0.02, per_turn=0.5, reserve=0.25):
+        self.capacity = float(capacity)
+        self.per_meter = float(per_meter)
+        self.per_turn = float(per_turn)
+        self.reserve = float(reserve)
+        # Written as `not ... > 0` so that NaN is rejected too; ranges are converted to meters by
+        # dividing by per_meter
+        if not self.capacity > 0:
+            raise ValueError("Battery capacity must be positive")
+        if not self.per_meter > 0:
+            raise ValueError("Battery perMeter must be positive")
+        if not self.per_turn >= 0:
+            raise ValueError("Battery perTurn must not be negative")
+        if not 0 <= self.reserve < 1:
+            raise ValueError("Battery reserve must be at least 0 and below 1")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a model from the API's {'capacity', 'perMeter', 'perTurn', 'reserve'} dict"""
+        defaults = cls()
+        return cls(
+            capacity=data.get('capacity', defaults.capacity),
+            per_meter=data.get('perMeter', defaults.per_meter),
+            per_turn=data.get('perTurn', defaults.per_turn),
+            reserve=data.get('reserve', defaults.reserve)
+        )
+
+    @property
+    def usable(self):
+        return self.capacity * (1.0 - self.reserve)
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'perMeter': self.per_meter,
+            'perTurn': self.per_turn,
+            'reserve': self.reserve
+        }
+
+
+class Sortie:
+    """
+    One battery's worth of a mission, from path position `start` to `stop` plus the legs to and
+    from home. Positions are waypoint indices with a fraction along the next leg (2.5 is halfway
+    between waypoints 2 and 3), since a battery rarely runs out exactly at a waypoint.
+    """
+
+    def __init__(self, start, stop, outbound, survey, inbound, turns, energy, flight_time):
+        self.start = start
+        self.stop = stop
+        self.outbound = outbound
+        self.survey = survey
+        self.inbound = inbound
+        self.turns = turns
+        self.energy = energy
+        self.flight_time = flight_time
+
+    def to_dict(self):
+        return {
+            'start': self.start,
+            'stop': self.stop,
+            'outboundDistance': self.outbound,
+            'surveyDistance': self.survey,
+            'returnDistance': self.inbound,
+            'turns': self.turns,
+            'energy': self.energy,
+            'estimatedFlightTime': self.flight_time
+        }
+
+
+class MissionProfile:
+    """
+    Distance, turn and home-distance profile of a mission path, computed once.
+    segment() then only does arithmetic on these arrays, so re-evaluating the same path under
+    another battery model (wind, altitude, payload) is cheap.
+    """
+
+    def __init__(self, waypoints, home=DEFAULT_HOME):
+        self.home = (float(home[0]), float(home[1]))
+        x, y = LocalFrame(*self.home).to_local(waypoints.lat, waypoints.lon)
+        z = waypoints.alt
+        # Positions are interpolated along legs, so a single waypoint is treated as a zero-length leg
+        if len(x) == 1:
+            x, y, z = np.repeat(x, 2), np.repeat(y, 2), np.repeat(z, 2)
+
+        # Cumulative survey distance to each waypoint, turns up to and including each one, and the
+        # straight-line distance from home (at ground level) to each one, climb included
+        leg = np.sqrt(np.diff(x) ** 2 + np.diff(y) ** 2 + np.diff(z) ** 2)
+        self.along = np.concatenate(([0.0], np.cumsum(leg)))
+        vertex_turns = np.zeros(len(x))
+        if len(x) >= 3:
+            vertex_turns[1:-1] = turn_fractions(x, y)
+        self.turns = np.cumsum(vertex_turns)
+        self.home_distances = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+
+        # Segmentation does a handful of scalar lookups per sortie; plain lists avoid NumPy's
+        # per-call overhead there
+        self._points = list(zip(x.tolist(), y.tolist(), z.tolist(), self.along.tolist()))
+        self._turns = self.turns.tolist()
+
+    def __len__(self):
+        return len(self._points)
+
+    def _point(self, position):
+        """(x, y, z, distance along the path) at a fractional path position"""
+        index = min(int(position), len(self) - 2)
+        fraction = position - index
+        a = self._points[index]
+        b = self._points[index + 1]
+        return tuple(p + fraction * (q - p) for p, q in zip(a, b))
+
+    def home_distance(self, position):
+        x, y, z, _ = self._point(position)
+        return math.sqrt(x * x + y * y + z * z)
+
+    def turns_between(self, start, stop):
+        """Turns made at the waypoints strictly between two path positions"""
+        return max(self._turns[max(math.ceil(stop) - 1, 0)] - self._turns[int(start)], 0.0)
+
+    def energy(self, battery, start, stop):
+        """Energy to fly home -> start -> ... -> stop -> home"""
+        distance = self.home_distance(start) + self._point(stop)[3] - self._point(start)[3] + self.home_distance(stop)
+        return distance * battery.per_meter + self.turns_between(start, stop) * battery.per_turn
+
+    def _last_reachable(self, battery, start):
+        """Farthest path position the drone can fly to from `start` and still get home"""
+        end = len(self) - 1
+        sx, sy, sz, s_along = self._point(start)
+        # Energy budget left for the survey and return, in meters of flight
+        budget = battery.usable / battery.per_meter - math.sqrt(sx * sx + sy * sy + sz * sz) + s_along
+        turn_cost = battery.per_turn / battery.per_meter
+        start_turns = self._turns[int(start)]
+
+        # Gallop over whole waypoints for the first one it could not return from
+        first = int(start) + 1
+        window = SEARCH_WINDOW
+        limit = None
+        while first <= end:
+            stops = slice(first, min(first + window, end + 1))
+            turns = np.maximum(self.turns[first - 1:stops.stop - 1] - start_turns, 0.0)
+            over = np.flatnonzero(self.along[stops] + self.home_distances[stops] + turns * turn_cost > budget)
+            if len(over):
+                limit = first + int(over[0])
+                break
+            first = stops.stop
+            window *= 2
+        if limit is None:
+            return float(end)
+
+        # The battery runs out on the leg A -> B into `limit`. Flying to A + t(B - A) leaves
+        # `remaining` meters for the rest of the leg and the return, so |A + t(B - A)| = remaining - t|B - A|;
+        # squaring both sides leaves an equation linear in t.
+        index = limit - 1
+        ax, ay, az, a_along = self._points[index]
+        bx, by, bz, b_along = self._points[limit]
+        dx, dy, dz = bx - ax, by - ay, bz - az
+        remaining = budget - a_along - self.turns_between(start, float(limit)) * turn_cost
+        denominator = 2.0 * (ax * dx + ay * dy + az * dz + remaining * (b_along - a_along))
+        if denominator <= 0:
+            return max(start, float(index))
+        t = (remaining * remaining - (ax * ax + ay * ay + az * az)) / denominator
+        return max(start, index + min(max(t, 0.0), 1.0))
+
+    def segment(self, battery, speed, turn_time=DEFAULT_TURN_TIME):
+        """
+        Split the path into sorties that each fit the battery's usable energy, greedily flying
+        every sortie as far as it can while still making it home. Raises ValueError when part of
+        the path cannot be reached and returned from on a full battery.
+        """
+        if speed <= 0:
+            raise ValueError("Speed must be positive")
+        if len(self) == 0:
+            return []
+
+        end = float(len(self) - 1)
+        sorties = []
+        start = 0.0
+        while True:
+            stop = self._last_reachable(battery, start)
+            if self.energy(battery, start, start) > battery.usable or (stop <= start and start < end):
+                raise ValueError(f"Path position {start:.2f} is out of range of home on one battery")
+
+            outbound = self.home_distance(start)
+            survey = self._point(stop)[3] - self._point(start)[3]
+            inbound = self.home_distance(stop)
+            turns = self.turns_between(start, stop)
+            sorties.append(Sortie(
+                start, stop, outbound, survey, inbound, turns, self.energy(battery, start, stop),
+                (outbound + survey + inbound) / speed + turns * turn_time
+            ))
+            if stop >= end:
+                return sorties
+            # The next sortie resumes where this one turned home
+            start = stop
+
+
+def _point_at(waypoints, position):
+    """A waypoint at a fractional path position, carrying the actions of the leg it lies on"""
+    index = min(int(np.floor(position)), len(waypoints) - 1)
+    fraction = position - index
+    point = waypoints[index:index + 1]
+    if fraction > 0 and index + 1 < len(waypoints):
+        columns = point.columns.copy()
+        columns[:3, 0] += fraction * (waypoints.columns[:3, index + 1] - columns[:3, 0])
+        point = WaypointArray(columns, point.capture.copy())
+    return point
+
+
+def sortie_waypoints(waypoints, sortie, home=DEFAULT_HOME):
+    """Waypoints of one sortie with a return-to-home leg appended (no capture on the way home)"""
+    parts = [_point_at(waypoints, sortie.start)]
+    first = int(np.floor(sortie.start)) + 1
+    last = int(np.ceil(sortie.stop)) - 1
+    if last >= first:
+        parts.append(waypoints[first:last + 1])
+    if sortie.stop > sortie.start and len(waypoints) > 1:
+        parts.append(_point_at(waypoints, sortie.stop))
+
+    stop = parts[-1]
+    parts.append(WaypointArray.from_columns(
+        [home[0]], [home[1]], alt=stop.alt[0], speed=stop.speed[0],
+        heading=stop.heading[0], gimbal_pitch=stop.gimbal_pitch[0], capture=0
+    ))
+    return WaypointArray.concatenate(parts)
+
+
+def sortie_report(sorties, battery):
+    return {
+        'battery': battery.to_dict(),
+        'sortieCount': len(sorties),
+        'totalFlightTime': sum(s.flight_time for s in sorties),
+        'sorties': [s.to_dict() for s in sorties]
+    }
@@ -0,0 +1,226 @@
+import struct
+
+from services.telemetry_store import GNSS_LEVELS
+
+# Binary telemetry frame:
+#   header  magic 'TF', schema version (u8), flags (u8), sequence (u32), field mask (u16)
+#   drone   drone id as a length (u8) and UTF-8 bytes
+#   body    one zigzag varint per field whose mask bit is set, in FIELDS order
+# Values are fixed-point integers (value * scale). A keyframe carries every field as an absolute
+# value; other frames carry only the fields that changed, as differences from the previous frame
+# of the same drone in the same stream, so one stream can carry several drones. The boolean
+# 'connected' field travels in the header flags of every frame. Little-endian throughout.
+MAGIC = b'TF'
+SCHEMA_VERSION = 2
+HEADER = struct.Struct('<2sBBIH')
+DRONE_ID_LENGTH = struct.Struct('<B')
+FLAG_KEYFRAME = 0x01
+# Set when the telemetry has a 'connected' field; FLAG_CONNECTED then carries its value
+FLAG_HAS_CONNECTED = 0x02
+FLAG_CONNECTED = 0x04
+
+CONTENT_TYPE = 'application/x-telemetry-frame'
+# Streams are frames each prefixed with their length as a u16
+STREAM_CONTENT_TYPE = 'application/x-telemetry-stream'
+LENGTH = struct.Struct('<H')
+
+# A full frame is sent at least this often, so a stream can be joined or recovered from errors
+DEFAULT_KEYFRAME_INTERVAL = 50
+
+# (payload key, fixed-point scale); the frame timestamp travels as field 0 in milliseconds
+FIELDS = (
+    ('time', 1000),
+    ('latitude', 10 ** 7),
+    ('longitude', 10 ** 7),
+    ('altitude', 100),
+    ('speed', 100),
+    ('battery', 10),
+    ('heading', 100),
+    ('roll', 100),
+    ('pitch', 100),
+    ('yaw', 100),
+    ('gnssSignal', 1),
+    ('satellites', 1),
+    ('temperature', 10),
+    ('distance', 10),
+    ('flightTime', 1)
+)
+FULL_MASK = (1 << len(FIELDS)) - 1
+
+_GNSS_CODES = {level: code for code, level in enumerate(GNSS_LEVELS)}
+
+
+def _flight_seconds(value):
+    """Seconds from an 'HH:MM:SS' flight time (numbers pass through)"""
+    if isinstance(value, str):
+        seconds = 0
+        for part in value.split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    return int(value or 0)
+
+
+def _flight_time(seconds):
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def quantize(telemetry, timestamp):
+    """Fixed-point integers of a telemetry dict, in FIELDS order"""
+    values = [round(timestamp * 1000)]
+    for key, scale in FIELDS[1:]:
+        value = telemetry.get(key)
+        if key == 'gnssSignal':
+            values.append(_GNSS_CODES.get(value, 0) if isinstance(value, str) else int(value or 0))
+        elif key == 'flightTime':
+            values.append(_flight_seconds(value))
+        else:
+            values.append(round((value or 0) * scale))
+    return values
+
+
+def dequantize(values):
+    """(timestamp, telemetry dict) from fixed-point integers in FIELDS order"""
+    telemetry = {}
+    for (key, scale), value in zip(FIELDS[1:], values[1:]):
+        if key == 'gnssSignal':
+            telemetry[key] = GNSS_LEVELS[value] if 0 <= value < len(GNSS_LEVELS) else GNSS_LEVELS[0]
+        elif key == 'flightTime':
+            telemetry[key] = _flight_time(value)
+        elif scale == 1:
+            telemetry[key] = value
+        else:
+            telemetry[key] = value / scale
+    return values[0] / 1000, telemetry
+
+
+def status_flags(telemetry):
+    """Header flags of the telemetry's boolean fields"""
+    connected = telemetry.get('connected')
+    if connected is None:
+        return 0
+    return FLAG_HAS_CONNECTED | (FLAG_CONNECTED if connected else 0)
+
+
+def _write_varint(out, value):
+    # Zigzag maps small negative and positive numbers alike to small unsigned ones
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buffer, offset):
+    result = 0
+    shift = 0
+    while True:
+        if offset >= len(buffer):
+            raise ValueError("Truncated telemetry frame")
+        byte = buffer[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (result >> 1) ^ -(result & 1), offset
+
+
+class TelemetryEncoder:
+    """Encodes one stream of telemetry frames; keeps each drone's previous frame to delta against"""
+
+    def __init__(self, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.previous = {}
+        self.since_keyframe = {}
+
+    def encode(self, sequence, telemetry, timestamp, drone_id=''):
+        values = quantize(telemetry, timestamp)
+        previous = self.previous.get(drone_id)
+        since_keyframe = self.since_keyframe.get(drone_id, 0)
+        keyframe = previous is None or since_keyframe >= self.keyframe_interval
+        out = bytearray()
+        mask = 0
+        if keyframe:
+            mask = FULL_MASK
+            for value in values:
+                _write_varint(out, value)
+            self.since_keyframe[drone_id] = 0
+        else:
+            for index, (value, last) in enumerate(zip(values, previous)):
+                if value != last:
+                    mask |= 1 << index
+                    _write_varint(out, value - last)
+            self.since_keyframe[drone_id] = since_keyframe + 1
+        self.previous[drone_id] = values
+        flags = (FLAG_KEYFRAME if keyframe else 0) | status_flags(telemetry)
+        header = HEADER.pack(MAGIC, SCHEMA_VERSION, flags, sequence & 0xFFFFFFFF, mask)
+        drone = drone_id.encode('utf-8')
+        if len(drone) > 0xFF:
+            raise ValueError(f"Drone id too long for a telemetry frame: {drone_id!r}")
+        return header + DRONE_ID_LENGTH.pack(len(drone)) + drone + bytes(out)
+
+
+def encode_frame(sequence, telemetry, timestamp, drone_id=''):
+    """A single self-contained (key) frame, for one-off responses"""
+    return TelemetryEncoder().encode(sequence, telemetry, timestamp, drone_id)
+
+
+class TelemetryDecoder:
+    """
+    Decodes the frames of one stream in order. decode() returns (sequence, drone id, timestamp,
+    telemetry); a delta frame arriving before any keyframe of its drone raises ValueError.
+    """
+
+    def __init__(self):
+        self.previous = {}
+        self.pending = b''
+
+    def decode(self, frame):
+        magic, version, flags, sequence, mask = HEADER.unpack_from(frame, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a telemetry frame")
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported telemetry schema version {version}")
+        offset = HEADER.size
+        (length,) = DRONE_ID_LENGTH.unpack_from(frame, offset)
+        offset += DRONE_ID_LENGTH.size
+        if offset + length > len(frame):
+            raise ValueError("Truncated telemetry frame")
+        drone_id = bytes(frame[offset:offset + length]).decode('utf-8')
+        offset += length
+
+        keyframe = bool(flags & FLAG_KEYFRAME)
+        previous = self.previous.get(drone_id)
+        if not keyframe and previous is None:
+            raise ValueError("Delta frame received before a keyframe")
+        values = [0] * len(FIELDS) if keyframe else list(previous)
+        for index in range(len(FIELDS)):
+            if mask & (1 << index):
+                value, offset = _read_varint(frame, offset)
+                values[index] = value if keyframe else values[index] + value
+        self.previous[drone_id] = values
+        timestamp, telemetry = dequantize(values)
+        if flags & FLAG_HAS_CONNECTED:
+            telemetry['connected'] = bool(flags & FLAG_CONNECTED)
+        return sequence, drone_id, timestamp, telemetry
+
+    def feed(self, chunk):
+        """Decode every complete length-prefixed frame of a stream chunk; partial frames are kept, keepalives skipped"""
+        buffer = self.pending + chunk
+        frames = []
+        offset = 0
+        while offset + LENGTH.size <= len(buffer):
+            (length,) = LENGTH.unpack_from(buffer, offset)
+            if offset + LENGTH.size + length > len(buffer):
+                break
+            start = offset + LENGTH.size
+            if length:
+                frames.append(self.decode(buffer[start:start + length]))
+            offset = start + length
+        self.pending = buffer[offset:]
+        return frames
+
+
+def stream_frame(frame):
+    """A frame with its length prefix, as sent on a telemetry stream"""
+    return LENGTH.pack(len(frame)) + frame
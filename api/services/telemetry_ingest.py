@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from services.telemetry_store import parse_timestamp, validate_drone_id
+
+# Frames queued per drone before the oldest are dropped: a few seconds at 50 Hz. Only the newest
+# telemetry matters, so a drone that outpaces the store loses its oldest samples first.
+DEFAULT_QUEUE_SIZE = 128
+
+# Frames queued across all drones before new ones are refused. TCP links are then not read,
+# polling every OVERLOAD_BACKOFF seconds, which pushes back on the sender through the socket
+# window; HTTP pushes are answered with 503.
+DEFAULT_MAX_PENDING = 8192
+OVERLOAD_BACKOFF = 0.05
+
+# Longest accepted line on a TCP link
+MAX_LINE = 64 * 1024
+
+
+def normalize_frame(frame, received=None):
+    """
+    (drone id, telemetry, timestamp) of an ingested frame {'droneId', 'telemetry', 'timestamp'};
+    the timestamp (Unix seconds or ISO 8601) defaults to `received`. Raises ValueError when malformed.
+    """
+    if not isinstance(frame, dict):
+        raise ValueError("Telemetry frame must be an object")
+    drone_id = validate_drone_id(frame.get('droneId'))
+    telemetry = frame.get('telemetry')
+    if not isinstance(telemetry, dict):
+        raise ValueError("Telemetry frame needs a telemetry object")
+    try:
+        timestamp = parse_timestamp(frame.get('timestamp'))
+    except TypeError:
+        raise ValueError("Invalid telemetry timestamp")
+    if timestamp is None:
+        timestamp = time.time() if received is None else received
+    return drone_id, telemetry, timestamp
+
+
+class DroneQueue:
+    """One drone's bounded frame queue and counters; used on the ingest loop only"""
+
+    def __init__(self, drone_id, queue_size):
+        self.drone_id = drone_id
+        self.frames = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.received = 0
+        self.stored = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_seen = None
+        self.task = None
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'stored': self.stored,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queued': len(self.frames),
+            'lastSeen': self.last_seen
+        }
+
+
+class TelemetryIngest:
+    """
+    Accepts telemetry from any number of drone links on an asyncio loop of its own and writes it
+    to the telemetry store (and broadcaster, when given). Links connect over TCP and send one
+    JSON frame per line, the same {'droneId', 'timestamp', 'telemetry'} shape the stream sends
+    out; the request path hands frames over with submit(), which never blocks.
+
+    Each drone has its own bounded queue and consumer, so a busy or stalled drone cannot delay
+    the others, and the total queued across drones is capped.
+    """
+
+    def __init__(self, store, broadcaster=None, queue_size=DEFAULT_QUEUE_SIZE, max_pending=DEFAULT_MAX_PENDING):
+        self.logger = logging.getLogger('telemetry_ingest')
+        self.store = store
+        self.broadcaster = broadcaster
+        self.queue_size = queue_size
+        self.max_pending = max_pending
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.address = None
+        self.lock = threading.Lock()
+
+        self.queues = {}
+        self.pending = 0
+        self.connections = 0
+        self.received = 0
+        self.rejected = 0
+        self.malformed = 0
+        self.throttled = 0
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Start the ingest loop thread if it is not already running"""
+        with self.lock:
+            if self.running:
+                return
+            started = threading.Event()
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self._run, args=(started,), name='telemetry-ingest', daemon=True)
+            self.thread.start()
+            started.wait()
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(started.set)
+        self.loop.run_forever()
+
+    def listen(self, host, port):
+        """Accept TCP links on host:port unless already listening; returns the bound (host, port)"""
+        self.start()
+        with self.lock:
+            if self.server is None:
+                future = asyncio.run_coroutine_threadsafe(
+                    asyncio.start_server(self._handle_link, host, port, limit=MAX_LINE), self.loop
+                )
+                self.server = future.result()
+                self.address = self.server.sockets[0].getsockname()[:2]
+                self.logger.info(f"Accepting telemetry links on {self.address[0]}:{self.address[1]}")
+            return self.address
+
+    def stop(self):
+        if not self.running:
+            return
+
+        async def shutdown():
+            if self.server is not None:
+                self.server.close()
+                await self.server.wait_closed()
+            for queue in self.queues.values():
+                queue.task.cancel()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.server = None
+
+    def submit(self, frames):
+        """
+        Queue frames from another thread. Returns (accepted, malformed) counts; accepted is 0
+        when the pipeline is overloaded and the frames were refused.
+        """
+        self.start()
+        normalized = []
+        received = time.time()
+        for frame in frames:
+            try:
+                normalized.append(normalize_frame(frame, received))
+            except ValueError:
+                pass
+        malformed = len(frames) - len(normalized)
+        with self.lock:
+            self.malformed += malformed
+            # Checked against the loop's count without waiting for it; close enough for a cap
+            if normalized and self.pending + len(normalized) > self.max_pending:
+                self.rejected += len(normalized)
+                return 0, malformed
+        self.loop.call_soon_threadsafe(self._enqueue_all, normalized)
+        return len(normalized), malformed
+
+    def _enqueue_all(self, frames):
+        for frame in frames:
+            self._enqueue(*frame)
+
+    def _enqueue(self, drone_id, telemetry, timestamp):
+        """Queue one frame on the loop"""
+        self.received += 1
+        queue = self.queues.get(drone_id)
+        if queue is None:
+            queue = self.queues[drone_id] = DroneQueue(drone_id, self.queue_size)
+            queue.task = self.loop.create_task(self._consume(queue))
+        if len(queue.frames) == queue.frames.maxlen:
+            queue.dropped += 1
+            self.pending -= 1
+        queue.frames.append((telemetry, timestamp))
+        queue.received += 1
+        queue.last_seen = time.time()
+        self.pending += 1
+        queue.ready.set()
+
+    async def _consume(self, queue):
+        while True:
+            await queue.ready.wait()
+            queue.ready.clear()
+            # Drain everything queued so far, then let the links run again
+            while queue.frames:
+                telemetry, timestamp = queue.frames.popleft()
+                self.pending -= 1
+                try:
+                    self.store.append(queue.drone_id, telemetry, timestamp)
+                    if self.broadcaster is not None:
+                        self.broadcaster.publish(queue.drone_id, telemetry, timestamp)
+                    queue.stored += 1
+                except Exception:
+                    queue.errors += 1
+            await asyncio.sleep(0)
+
+    async def _handle_link(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        self.connections += 1
+        self.logger.info(f"Telemetry link connected from {peer}")
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_LINE; the rest of the stream cannot be framed reliably
+                    with self.lock:
+                        self.malformed += 1
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    frame = normalize_frame(json.loads(line), time.time())
+                except ValueError:
+                    with self.lock:
+                        self.malformed += 1
+                    continue
+                if self.pending >= self.max_pending:
+                    self.throttled += 1
+                    while self.pending >= self.max_pending:
+                        await asyncio.sleep(OVERLOAD_BACKOFF)
+                self._enqueue(*frame)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            self.logger.info(f"Telemetry link from {peer} closed")
+
+    def stats(self):
+        queues = list(self.queues.values())
+        return {
+            'running': self.running,
+            'address': list(self.address) if self.address else None,
+            'connections': self.connections,
+            'received': self.received,
+            'stored': sum(queue.stored for queue in queues),
+            'dropped': sum(queue.dropped for queue in queues),
+            'rejected': self.rejected,
+            'throttled': self.throttled,
+            'malformed': self.malformed,
+            'pending': self.pending,
+            'maxPending': self.max_pending,
+            'drones': {queue.drone_id: queue.stats() for queue in queues}
+        }
@@ -0,0 +1,207 @@
+import bisect
+import threading
+import time
+
+import numpy as np
+
+from services.telemetry_store import telemetry_dict
+
+# Speed accepted in place of a multiplier to replay as fast as possible
+MAX_SPEED = 'max'
+
+
+def parse_speed(value):
+    """Replay speed multiplier from a number or 'max' (None: as fast as possible)"""
+    if value == MAX_SPEED:
+        return None
+    speed = float(value)
+    if not speed > 0:
+        raise ValueError("Replay speed must be positive")
+    return speed
+
+
+def _flight_time(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class TelemetryReplay:
+    """
+    Plays a recorded flight back into `sink(telemetry, timestamp)`, keeping the recorded spacing
+    between samples divided by `speed` (None replays as fast as possible). Detections go to
+    `on_detection(detection)` at their recorded place among the samples. Playback runs on its own
+    thread and can be paused, sped up, moved to any point of the flight and looped.
+
+    Samples are scheduled against the wall clock from an anchor that is reset on every seek,
+    resume and speed change, so timing errors do not accumulate; how late each sample went out
+    is kept in the stats.
+    """
+
+    def __init__(self, log, sink, on_detection=None, speed=1.0, loop=False):
+        self.views = log.windows()
+        if not self.views:
+            raise ValueError("Flight log has no telemetry")
+        self.offsets = np.cumsum([0] + [len(view) for view in self.views])
+        self.count = int(self.offsets[-1])
+        self.start_time = float(self.views[0]['time'][0])
+        self.end_time = float(self.views[-1]['time'][-1])
+        self.detections = log.detections()
+        self.detection_times = [entry['time'] for entry in self.detections]
+
+        self.sink = sink
+        self.on_detection = on_detection
+        self.speed = speed
+        self.loop = loop
+
+        self.condition = threading.Condition()
+        self.thread = None
+        self.paused = False
+        self.stopped = False
+        self.finished = False
+        self.current = None
+        self.emitted = 0
+        self.loops = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self._seek(self.start_time)
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _record(self, index):
+        view = int(np.searchsorted(self.offsets, index, side='right')) - 1
+        return self.views[view][index - self.offsets[view]]
+
+    def _seek(self, position):
+        """Move to the first sample at or after `position`; call with the condition held"""
+        position = min(max(position, self.start_time), self.end_time)
+        self.index = self.count
+        for view, offset in zip(self.views, self.offsets):
+            if view['time'][-1] >= position:
+                self.index = int(offset) + int(np.searchsorted(np.ascontiguousarray(view['time']), position))
+                break
+        self.detection_index = bisect.bisect_left(self.detection_times, position)
+        self.position = position
+        self._anchor()
+
+    def _anchor(self):
+        self.anchor_wall = time.monotonic()
+        self.anchor_position = self.position
+
+    def start(self):
+        with self.condition:
+            if self.running:
+                return
+            self.stopped = False
+            self.finished = False
+            self._anchor()
+            self.thread = threading.Thread(target=self._run, name='telemetry-replay', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def join(self, timeout=None):
+        """Wait for playback to reach the end (never, while looping) or be stopped"""
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def pause(self):
+        with self.condition:
+            self.paused = True
+            self.condition.notify_all()
+
+    def resume(self):
+        with self.condition:
+            if self.paused:
+                self.paused = False
+                self._anchor()
+                self.condition.notify_all()
+
+    def seek(self, position):
+        """Continue playback from `position` (recorded Unix seconds)"""
+        with self.condition:
+            self._seek(position)
+            self.condition.notify_all()
+
+    def set_speed(self, speed):
+        with self.condition:
+            self.speed = speed
+            self._anchor()
+            self.condition.notify_all()
+
+    def get_telemetry(self):
+        """Latest replayed sample; stands in for DroneController.get_telemetry"""
+        return self.current
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                if self.paused:
+                    self.condition.wait()
+                    continue
+                if self.index >= self.count:
+                    if not self.loop:
+                        self.finished = True
+                        return
+                    self.loops += 1
+                    self._seek(self.start_time)
+
+                record = self._record(self.index)
+                recorded = float(record['time'])
+                lag = 0.0
+                if self.speed is not None:
+                    due = self.anchor_wall + (recorded - self.anchor_position) / self.speed
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        # Woken early by any control change, which may move the schedule
+                        self.condition.wait(delay)
+                        continue
+                    lag = -delay
+
+                self.index += 1
+                self.position = recorded
+                end = bisect.bisect_right(self.detection_times, recorded, lo=self.detection_index)
+                detections = self.detections[self.detection_index:end]
+                self.detection_index = end
+
+                telemetry = telemetry_dict(record)
+                telemetry['flightTime'] = _flight_time(recorded - self.start_time)
+                telemetry['recordedTime'] = recorded
+                self.current = telemetry
+                self.emitted += 1
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+
+            if self.on_detection is not None:
+                for entry in detections:
+                    self.on_detection(entry['detection'])
+            self.sink(telemetry, time.time())
+
+    def status(self):
+        with self.condition:
+            return {
+                'running': self.running,
+                'paused': self.paused,
+                'finished': self.finished,
+                'speed': MAX_SPEED if self.speed is None else self.speed,
+                'loop': self.loop,
+                'start': self.start_time,
+                'end': self.end_time,
+                'position': self.position,
+                'offset': self.position - self.start_time,
+                'samples': self.count,
+                'emitted': self.emitted,
+                'loops': self.loops,
+                'lag': {
+                    'mean': self.lag_total / self.emitted if self.emitted else 0.0,
+                    'max': self.lag_max
+                }
+            }
@@ -0,0 +1,274 @@
+import math
+import threading
+from collections import deque
+
+# Windows (seconds) the operator trends are read from
+CLIMB_WINDOW = 10.0
+GROUND_SPEED_WINDOW = 60.0
+BATTERY_WINDOW = 120.0
+
+# Rolling windows kept per field by default; each field may have any number of windows
+DEFAULT_WINDOWS = {
+    'altitude': (CLIMB_WINDOW,),
+    'speed': (GROUND_SPEED_WINDOW,),
+    'battery': (BATTERY_WINDOW,)
+}
+
+# Time constant (seconds) of each field's exponentially weighted average
+DEFAULT_EWMA_TIME_CONSTANT = 5.0
+
+# Battery percentage treated as the landing reserve; matches the sortie planner's default reserve
+BATTERY_RESERVE = 25.0
+
+
+def _number(value):
+    """The value as a float, or None for missing and non-numeric values"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def window_key(window):
+    """Payload key of a window length, e.g. '60s'"""
+    return f"{window:g}s"
+
+
+class RollingWindow:
+    """
+    Mean, min, max and least-squares slope of the samples taken in the last `window` seconds,
+    updated in amortized O(1) per sample: running sums are added to and subtracted from as
+    samples enter and leave, and min/max come from monotonic deques. Times in the sums are
+    relative to an origin that follows the window, so they stay small and the slope keeps its
+    precision over long flights.
+    """
+
+    def __init__(self, window):
+        if window <= 0:
+            raise ValueError("Window must be positive")
+        self.window = float(window)
+        self.samples = deque()
+        self.minima = deque()
+        self.maxima = deque()
+        self.origin = None
+        self.sum_v = 0.0
+        self.sum_t = 0.0
+        self.sum_tt = 0.0
+        self.sum_tv = 0.0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, t, value):
+        if self.origin is None:
+            self.origin = t
+        self.samples.append((t, value))
+        while self.minima and self.minima[-1][1] >= value:
+            self.minima.pop()
+        self.minima.append((t, value))
+        while self.maxima and self.maxima[-1][1] <= value:
+            self.maxima.pop()
+        self.maxima.append((t, value))
+        self._accumulate(t - self.origin, value, 1.0)
+
+        cutoff = t - self.window
+        while self.samples[0][0] < cutoff:
+            old_t, old_value = self.samples.popleft()
+            self._accumulate(old_t - self.origin, old_value, -1.0)
+            self.evicted += 1
+        while self.minima[0][0] < cutoff:
+            self.minima.popleft()
+        while self.maxima[0][0] < cutoff:
+            self.maxima.popleft()
+
+        if self.evicted >= len(self.samples):
+            # Subtracting leaves rounding behind; summing the window afresh once per window's
+            # worth of evictions keeps it bounded at no more than O(1) per sample
+            self._resum()
+        elif self.samples[0][0] - self.origin > self.window:
+            self._rebase(self.samples[0][0])
+
+    def _accumulate(self, t, value, sign):
+        self.sum_v += sign * value
+        self.sum_t += sign * t
+        self.sum_tt += sign * t * t
+        self.sum_tv += sign * t * value
+
+    def _rebase(self, origin):
+        """Move the time origin, adjusting the sums in place"""
+        shift = origin - self.origin
+        n = len(self.samples)
+        self.sum_tt += -2.0 * shift * self.sum_t + n * shift * shift
+        self.sum_tv -= shift * self.sum_v
+        self.sum_t -= n * shift
+        self.origin = origin
+
+    def _resum(self):
+        self.origin = self.samples[0][0]
+        self.sum_v = self.sum_t = self.sum_tt = self.sum_tv = 0.0
+        for t, value in self.samples:
+            self._accumulate(t - self.origin, value, 1.0)
+        self.evicted = 0
+
+    def mean(self):
+        return self.sum_v / len(self.samples) if self.samples else None
+
+    def minimum(self):
+        return self.minima[0][1] if self.minima else None
+
+    def maximum(self):
+        return self.maxima[0][1] if self.maxima else None
+
+    def slope(self):
+        """Least-squares change per second, or None until the window spans some time"""
+        n = len(self.samples)
+        if n < 2:
+            return None
+        denominator = n * self.sum_tt - self.sum_t * self.sum_t
+        if denominator <= 1e-12 * n * n:
+            return None
+        return (n * self.sum_tv - self.sum_t * self.sum_v) / denominator
+
+    def snapshot(self):
+        return {
+            'count': len(self.samples),
+            'mean': self.mean(),
+            'min': self.minimum(),
+            'max': self.maximum(),
+            'slope': self.slope()
+        }
+
+
+class FieldStats:
+    """One telemetry field's latest value, time-aware EWMA and rolling windows"""
+
+    def __init__(self, windows, time_constant=DEFAULT_EWMA_TIME_CONSTANT):
+        self.windows = [RollingWindow(window) for window in sorted(set(windows))]
+        self.time_constant = time_constant
+        self.latest = None
+        self.ewma = None
+        self.last_time = None
+
+    def add(self, t, value):
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            # Irregular sample spacing weighs each sample by the time it covers
+            alpha = 1.0 - math.exp(-(t - self.last_time) / self.time_constant)
+            self.ewma += alpha * (value - self.ewma)
+        self.latest = value
+        self.last_time = t
+        for window in self.windows:
+            window.add(t, value)
+
+    def window(self, length):
+        for window in self.windows:
+            if window.window == length:
+                return window
+        return None
+
+    def snapshot(self):
+        return {
+            'latest': self.latest,
+            'ewma': self.ewma,
+            'windows': {window_key(window.window): window.snapshot() for window in self.windows}
+        }
+
+
+class TelemetryStats:
+    """
+    Rolling statistics of one drone's telemetry, updated with each sample as it is published,
+    so the trends never rescan the history. `windows` maps telemetry fields to the window
+    lengths (seconds) kept for them.
+    """
+
+    def __init__(self, windows=None, time_constant=DEFAULT_EWMA_TIME_CONSTANT, reserve=BATTERY_RESERVE):
+        self.fields = {
+            field: FieldStats(lengths, time_constant)
+            for field, lengths in (windows or DEFAULT_WINDOWS).items()
+        }
+        self.reserve = reserve
+        self.last_time = None
+        self.samples = 0
+        self.lock = threading.Lock()
+
+    def update(self, telemetry, timestamp):
+        """Add one sample (a telemetry payload dict) and return the new snapshot"""
+        with self.lock:
+            if self.last_time is not None and timestamp < self.last_time:
+                # Late samples are filed at the latest time seen, as in the telemetry history
+                timestamp = self.last_time
+            self.last_time = timestamp
+            self.samples += 1
+            for field, stats in self.fields.items():
+                value = _number(telemetry.get(field))
+                if value is not None:
+                    stats.add(timestamp, value)
+            return self._snapshot()
+
+    def snapshot(self):
+        with self.lock:
+            return self._snapshot()
+
+    def _window(self, field, length):
+        stats = self.fields.get(field)
+        return stats.window(length) if stats is not None else None
+
+    def _snapshot(self):
+        altitude = self._window('altitude', CLIMB_WINDOW)
+        speed = self._window('speed', GROUND_SPEED_WINDOW)
+        battery = self._window('battery', BATTERY_WINDOW)
+
+        climb_rate = altitude.slope() if altitude is not None else None
+        ground_speed = speed.mean() if speed is not None else None
+        drain = battery.slope() if battery is not None else None
+        drain = -drain if drain is not None else None
+        time_to_reserve = None
+        if drain is not None:
+            remaining = self.fields['battery'].latest - self.reserve
+            if remaining <= 0:
+                time_to_reserve = 0.0
+            elif drain > 0:
+                time_to_reserve = remaining / drain
+
+        return {
+            'time': self.last_time,
+            'samples': self.samples,
+            # m/s, positive climbing
+            'climbRate': climb_rate,
+            # m/s over the last GROUND_SPEED_WINDOW seconds
+            'groundSpeedAvg': ground_speed,
+            # %/min, positive draining
+            'batteryDrainRate': drain * 60.0 if drain is not None else None,
+            # Seconds until the battery reaches the reserve at the current drain rate
+            'timeToReserve': time_to_reserve,
+            'fields': {field: stats.snapshot() for field, stats in self.fields.items()}
+        }
+
+
+class TelemetryStatsRegistry:
+    """Rolling statistics for every drone, created on first sample"""
+
+    def __init__(self, windows=None, time_constant=DEFAULT_EWMA_TIME_CONSTANT, reserve=BATTERY_RESERVE):
+        self.windows = windows or DEFAULT_WINDOWS
+        self.time_constant = time_constant
+        self.reserve = reserve
+        self.drones = {}
+        self.lock = threading.Lock()
+
+    def stats(self, drone_id):
+        """The drone's statistics, created on first use"""
+        with self.lock:
+            stats = self.drones.get(drone_id)
+            if stats is None:
+                stats = self.drones[drone_id] = TelemetryStats(self.windows, self.time_constant, self.reserve)
+            return stats
+
+    def update(self, drone_id, telemetry, timestamp):
+        return self.stats(drone_id).update(telemetry, timestamp)
+
+    def snapshot(self, drone_id):
+        """The drone's latest statistics, or None before its first sample"""
+        stats = self.drones.get(drone_id)
+        return stats.snapshot() if stats is not None else None
@@ -0,0 +1,258 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from services.downsample import downsample
+
+# Samples kept per drone: an hour at 10 Hz, about 3 MB of telemetry
+DEFAULT_CAPACITY = 36000
+
+# Drone id used for the single connected drone; matches the fleet planner's default ids
+DEFAULT_DRONE_ID = 'drone-1'
+
+# Longest accepted drone id; ids also name flight log directories
+MAX_DRONE_ID = 64
+
+# Telemetry payloads carry GNSS quality as a word; the buffer stores its index in this tuple
+GNSS_LEVELS = ('None', 'Poor', 'Fair', 'Good', 'Excellent')
+
+# One row per sample; field names match the /api/telemetry payload keys
+TELEMETRY_DTYPE = np.dtype([
+    ('time', 'f8'),
+    ('latitude', 'f8'),
+    ('longitude', 'f8'),
+    ('altitude', 'f4'),
+    ('speed', 'f4'),
+    ('battery', 'f4'),
+    ('heading', 'f4'),
+    ('roll', 'f4'),
+    ('pitch', 'f4'),
+    ('yaw', 'f4'),
+    ('gnssSignal', 'u1'),
+    ('satellites', 'u1'),
+    ('temperature', 'f4'),
+    ('distance', 'f4')
+])
+
+TELEMETRY_FIELDS = TELEMETRY_DTYPE.names[1:]
+
+_GNSS_CODES = {level: code for code, level in enumerate(GNSS_LEVELS)}
+_GNSS_NAMES = np.array(GNSS_LEVELS, dtype=object)
+
+
+def validate_drone_id(drone_id):
+    """The drone id if it is a non-empty string usable as a single path component, else ValueError"""
+    if (not isinstance(drone_id, str) or not drone_id or len(drone_id) > MAX_DRONE_ID
+            or drone_id.startswith('.') or '/' in drone_id or '\\' in drone_id):
+        raise ValueError(f"Invalid drone id: {drone_id!r}")
+    return drone_id
+
+
+def _gnss_code(value):
+    if isinstance(value, str):
+        return _GNSS_CODES.get(value, 0)
+    return int(value or 0)
+
+
+def telemetry_row(sample, timestamp=None):
+    """A telemetry dict as a TELEMETRY_DTYPE row tuple; missing keys read 0"""
+    if timestamp is None:
+        timestamp = time.time()
+    return (
+        timestamp,
+        sample.get('latitude', 0.0),
+        sample.get('longitude', 0.0),
+        sample.get('altitude', 0.0),
+        sample.get('speed', 0.0),
+        sample.get('battery', 0.0),
+        sample.get('heading', 0.0),
+        sample.get('roll', 0.0),
+        sample.get('pitch', 0.0),
+        sample.get('yaw', 0.0),
+        _gnss_code(sample.get('gnssSignal')),
+        sample.get('satellites', 0),
+        sample.get('temperature', 0.0),
+        sample.get('distance', 0.0)
+    )
+
+
+def telemetry_dict(row):
+    """A TELEMETRY_DTYPE row back as a telemetry payload dict (without the time)"""
+    telemetry = {field: row[field].item() for field in TELEMETRY_FIELDS}
+    telemetry['gnssSignal'] = GNSS_LEVELS[min(telemetry['gnssSignal'], len(GNSS_LEVELS) - 1)]
+    return telemetry
+
+
+class TelemetryRing:
+    """
+    Fixed-size history of one drone's telemetry in a preallocated structured array.
+    Appends overwrite the oldest sample once the buffer is full, so memory never grows. Samples
+    are assumed to arrive in time order; the time column of each of the two runs the ring
+    splits into is then sorted, and time-range queries are binary searches plus slices.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        self.buffer = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self.capacity = capacity
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes
+
+    def append(self, sample, timestamp=None):
+        """Record a telemetry dict (payload keys; missing ones read 0) taken at `timestamp` (Unix seconds)"""
+        row = telemetry_row(sample, timestamp)
+        with self.lock:
+            if self.count and row[0] < self.buffer['time'][(self.count - 1) % self.capacity]:
+                # Keep the time column sorted; a late sample is filed at the latest time seen
+                row = (float(self.buffer['time'][(self.count - 1) % self.capacity]),) + row[1:]
+            self.buffer[self.count % self.capacity] = row
+            self.count += 1
+
+    def _runs(self):
+        """The buffer's contents as up to two slices, oldest first"""
+        if self.count <= self.capacity:
+            return (slice(0, self.count),)
+        head = self.count % self.capacity
+        return slice(head, self.capacity), slice(0, head)
+
+    def _window_slices(self, start, stop):
+        """Buffer slices holding the samples with start <= time <= stop, oldest first"""
+        slices = []
+        for run in self._runs():
+            times = self.buffer['time'][run]
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = len(times) if stop is None else int(np.searchsorted(times, stop, side='right'))
+            if hi > lo:
+                slices.append(slice(run.start + lo, run.start + hi))
+        return slices
+
+    def window(self, start=None, stop=None):
+        """Copy of the samples with start <= time <= stop, oldest first"""
+        with self.lock:
+            parts = [self.buffer[part] for part in self._window_slices(start, stop)]
+            if not parts:
+                return np.empty(0, dtype=TELEMETRY_DTYPE)
+            return np.concatenate(parts)
+
+    def columns(self, start=None, stop=None, fields=TELEMETRY_FIELDS):
+        """
+        Contiguous copies of the time column and the given fields between start and stop.
+        Cheaper than window() for long windows, since only the requested columns are copied.
+        """
+        with self.lock:
+            slices = self._window_slices(start, stop)
+            return {
+                field: np.concatenate([self.buffer[field][part] for part in slices])
+                if slices else np.empty(0, dtype=TELEMETRY_DTYPE[field])
+                for field in ('time',) + tuple(fields)
+            }
+
+    def latest(self):
+        """Most recent sample as a one-row array, or None when empty"""
+        with self.lock:
+            if self.count == 0:
+                return None
+            index = (self.count - 1) % self.capacity
+            return self.buffer[index:index + 1].copy()
+
+
+def _values(field, values):
+    """A column as a JSON list; GNSS quality goes back to words"""
+    if field == 'gnssSignal':
+        return _GNSS_NAMES[np.minimum(values, len(GNSS_LEVELS) - 1)].tolist()
+    return values.tolist()
+
+
+def to_columns(samples, fields=None):
+    """Samples as {'time': [...], field: [...]} lists for JSON"""
+    columns = {'time': samples['time'].tolist()}
+    for field in fields or TELEMETRY_FIELDS:
+        columns[field] = _values(field, samples[field])
+    return columns
+
+
+def to_series(columns, fields, max_points, method='lttb'):
+    """
+    Columns as one {'time', 'values'} series per field, each downsampled to at most `max_points`
+    points independently so every series keeps its own shape
+    """
+    times = columns['time']
+    series = {}
+    for field in fields:
+        keep = downsample(times, columns[field], max_points, method)
+        series[field] = {'time': times[keep].tolist(), 'values': _values(field, columns[field][keep])}
+    return series
+
+
+def parse_timestamp(value):
+    """Unix seconds from a number or ISO 8601 string; None passes through"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def parse_fields(fields):
+    """Validate a comma-separated field list; None or empty selects every field"""
+    if not fields:
+        return list(TELEMETRY_FIELDS)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in TELEMETRY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown telemetry fields: {', '.join(unknown)}")
+    return names
+
+
+class TelemetryStore:
+    """Telemetry history for every drone, one fixed-size ring each"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.rings = {}
+        self.lock = threading.Lock()
+
+    def ring(self, drone_id):
+        """The drone's ring, created on first use"""
+        with self.lock:
+            ring = self.rings.get(drone_id)
+            if ring is None:
+                ring = self.rings[drone_id] = TelemetryRing(self.capacity)
+            return ring
+
+    def append(self, drone_id, sample, timestamp=None):
+        self.ring(drone_id).append(sample, timestamp)
+
+    def history(self, drone_id, start=None, stop=None, fields=None):
+        """Columns of the drone's samples between start and stop (Unix seconds, inclusive)"""
+        ring = self.rings.get(drone_id)
+        samples = ring.window(start, stop) if ring is not None else np.empty(0, dtype=TELEMETRY_DTYPE)
+        return to_columns(samples, fields)
+
+    def series(self, drone_id, start=None, stop=None, fields=None, max_points=1000, method='lttb'):
+        """Each field between start and stop as its own series of at most `max_points` points"""
+        fields = fields or TELEMETRY_FIELDS
+        ring = self.rings.get(drone_id)
+        if ring is None:
+            return {field: {'time': [], 'values': []} for field in fields}
+        return to_series(ring.columns(start, stop, fields), fields, max_points, method)
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'drones': {
+                drone_id: {'samples': len(ring), 'recorded': ring.count, 'bytes': ring.nbytes}
+                for drone_id, ring in list(self.rings.items())
+            }
+        }
@@ -0,0 +1,261 @@
+import json
+import threading
+import time
+from collections import deque
+
+from services.telemetry_codec import TelemetryEncoder, stream_frame
+
+# Telemetry frames pushed per second; the aircraft link reports at about this rate
+DEFAULT_STREAM_RATE = 10.0
+
+# Frames a slow client may fall behind by before its oldest ones are dropped
+DEFAULT_QUEUE_SIZE = 4
+
+# Largest queue a client may ask for (about a minute of one drone at the default rate)
+MAX_QUEUE_SIZE = 600
+
+# Seconds between SSE comments sent to idle clients, so proxies keep the connection open and
+# disconnected clients are noticed
+HEARTBEAT_INTERVAL = 15.0
+
+
+def parse_queue_size(value):
+    """Queue size from a query parameter; None keeps the default, ValueError outside 1..MAX_QUEUE_SIZE"""
+    if value is None:
+        return None
+    try:
+        size = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid queue size: {value}")
+    if not 1 <= size <= MAX_QUEUE_SIZE:
+        raise ValueError(f"Queue size must be between 1 and {MAX_QUEUE_SIZE}")
+    return size
+
+
+class TelemetryFrame:
+    """One published sample; its JSON form is built on first use and shared by every client"""
+
+    def __init__(self, sequence, drone_id, timestamp, telemetry, stats=None):
+        self.sequence = sequence
+        self.drone_id = drone_id
+        self.timestamp = timestamp
+        self.telemetry = telemetry
+        self.stats = stats
+        self._json = None
+
+    def json(self):
+        if self._json is None:
+            payload = {
+                'droneId': self.drone_id,
+                'seq': self.sequence,
+                'timestamp': self.timestamp,
+                'telemetry': self.telemetry
+            }
+            if self.stats is not None:
+                payload['stats'] = self.stats
+            self._json = json.dumps(payload, separators=(',', ':'))
+        return self._json
+
+
+class Subscription:
+    """
+    One client's bounded frame queue, of one drone's frames or (drone_id None) every drone's.
+    When the client falls behind, the oldest frame is dropped so it always catches up to the
+    latest telemetry instead of replaying stale frames.
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, drone_id=None):
+        self.drone_id = drone_id
+        self.frames = deque(maxlen=queue_size)
+        self.condition = threading.Condition()
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, frame):
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(frame)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Next frame, or None after `timeout` seconds without one or once closed"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.frames or self.closed, timeout):
+                return None
+            if not self.frames:
+                return None
+            self.delivered += 1
+            return self.frames.popleft()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class TelemetryBroadcaster:
+    """
+    Fans frames out to every subscribed client; each frame is serialized to JSON once for all of them.
+    With a TelemetryStatsRegistry as `stats`, every published sample also updates the drone's
+    rolling statistics, and the frames carry them.
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE, stats=None):
+        self.queue_size = queue_size
+        self.stats_registry = stats
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+        self.sequence = 0
+        self.published = 0
+        # Latest frame of each drone
+        self.latest = {}
+        # Totals of clients that have already disconnected
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, queue_size=None, drone_id=None):
+        """Subscribe to one drone's frames, or to every drone's when drone_id is None"""
+        subscription = Subscription(queue_size or self.queue_size, drone_id)
+        with self.lock:
+            self.subscriptions.add(subscription)
+            # New clients get the current state immediately instead of waiting for the next frame
+            if drone_id is None:
+                for frame in sorted(self.latest.values(), key=lambda frame: frame.sequence):
+                    subscription.put(frame)
+            elif drone_id in self.latest:
+                subscription.put(self.latest[drone_id])
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self.lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.discard(subscription)
+                self.delivered += subscription.delivered
+                self.dropped += subscription.dropped
+
+    def publish(self, drone_id, telemetry, timestamp=None):
+        """Queue a telemetry frame for every client"""
+        if timestamp is None:
+            timestamp = time.time()
+        # Outside the broadcaster lock: each drone's statistics have a lock of their own
+        stats = self.stats_registry.update(drone_id, telemetry, timestamp) if self.stats_registry is not None else None
+        with self.lock:
+            self.sequence += 1
+            frame = TelemetryFrame(self.sequence, drone_id, timestamp, telemetry, stats)
+            self.latest[drone_id] = frame
+            self.published += 1
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            if subscription.drone_id is None or subscription.drone_id == drone_id:
+                subscription.put(frame)
+
+    def stats(self):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+            delivered, dropped = self.delivered, self.dropped
+        return {
+            'subscribers': len(subscriptions),
+            'published': self.published,
+            'delivered': delivered + sum(s.delivered for s in subscriptions),
+            'dropped': dropped + sum(s.dropped for s in subscriptions)
+        }
+
+
+def sse_events(broadcaster, subscription, heartbeat=HEARTBEAT_INTERVAL):
+    """Server-sent event stream for one subscription; unsubscribes when the client goes away"""
+    try:
+        # Clients reconnect after this many milliseconds if the stream drops
+        yield 'retry: 2000\n\n'
+        while not subscription.closed:
+            frame = subscription.get(timeout=heartbeat)
+            if frame is None:
+                yield ': keepalive\n\n'
+                continue
+            yield f'id: {frame.sequence}\nevent: telemetry\ndata: {frame.json()}\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+def binary_events(broadcaster, subscription, heartbeat=HEARTBEAT_INTERVAL):
+    """
+    Length-prefixed binary telemetry frames for one subscription. Each frame names its drone and
+    deltas are taken against the frames of that drone this client actually received, so several
+    drones can share a stream and frames dropped for a slow client never break its decoding.
+    An empty frame is the keepalive.
+    """
+    encoder = TelemetryEncoder()
+    try:
+        while not subscription.closed:
+            frame = subscription.get(timeout=heartbeat)
+            if frame is None:
+                yield stream_frame(b'')
+                continue
+            yield stream_frame(encoder.encode(frame.sequence, frame.telemetry, frame.timestamp, frame.drone_id))
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+class TelemetryProducer:
+    """
+    The single reader of the drone link: samples `source` at a fixed rate, records each sample in
+    the telemetry store (and the flight log `recorder`, while one is set) and publishes it. Server
+    work depends on the link rate, not on how many clients listen or how often they would
+    otherwise poll.
+    """
+
+    def __init__(self, source, drone_id, store, broadcaster, rate=DEFAULT_STREAM_RATE):
+        self.source = source
+        self.drone_id = drone_id
+        self.store = store
+        self.broadcaster = broadcaster
+        self.interval = 1.0 / rate
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.errors = 0
+        self.recorder = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Start the producer thread if it is not already running"""
+        with self.lock:
+            if self.running:
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name='telemetry-producer', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self.stop_event.is_set():
+            try:
+                telemetry = self.source()
+            except Exception:
+                telemetry = None
+                self.errors += 1
+            if telemetry:
+                timestamp = time.time()
+                self.store.append(self.drone_id, telemetry, timestamp)
+                recorder = self.recorder
+                if recorder is not None:
+                    recorder.append(telemetry, timestamp)
+                self.broadcaster.publish(self.drone_id, telemetry, timestamp)
+
+            # Fixed-rate schedule that does not drift with the time spent reading the link
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self.stop_event.wait(delay)
@@ -0,0 +1,308 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from services.geo import LocalFrame
+from services.waypoint_array import CAPTURE_TRIGGER, WaypointArray
+
+# Directory scanned for elevation tiles when DEM_DIRECTORY is not set
+DEFAULT_DEM_DIRECTORY = 'dem'
+
+# Open tiles kept memory-mapped at once; a 1 arc-second SRTM tile maps 25 MB of address space
+DEFAULT_MAX_TILES = 16
+
+# Terrain-following legs are resampled at this spacing so ridges between waypoints are not missed (meters)
+DEFAULT_SAMPLE_SPACING = 30.0
+
+# Rows of the output grid produced per step when exporting, bounding export memory use
+EXPORT_CHUNK_ROWS = 256
+EXPORT_FORMATS = ('ASC', 'NPY')
+
+# Exports default to 1 arc-second cells (~30 m), the resolution of SRTM tiles
+DEFAULT_EXPORT_CELL_SIZE = 1.0 / 3600
+
+# Largest export grid (cells): 4000 x 4000, 64 MB as NPY, about 130 MB as ASC
+MAX_EXPORT_CELLS = 16000000
+
+# SRTM void value, and the tile naming convention N37W123.hgt (south-west corner)
+HGT_VOID = -32768
+HGT_NAME = re.compile(r'^([NS])(\d{2})([EW])(\d{3})\.hgt$', re.IGNORECASE)
+
+
+class DemTile:
+    """
+    One elevation raster, memory-mapped so only the pages that are sampled are read from disk.
+    Row 0 is the northern edge; (north, west) is the center of the first cell.
+    """
+
+    def __init__(self, data, north, west, lat_step, lon_step, nodata=None):
+        self.data = data
+        self.north = float(north)
+        self.west = float(west)
+        self.lat_step = float(lat_step)
+        self.lon_step = float(lon_step)
+        self.nodata = nodata
+
+    @property
+    def bounds(self):
+        """(south, north, west, east) covered by the cell centers"""
+        rows, cols = self.data.shape
+        return (self.north - (rows - 1) * self.lat_step, self.north,
+                self.west, self.west + (cols - 1) * self.lon_step)
+
+    def sample(self, lat, lon):
+        """Bilinear elevation at lat/lon arrays inside the tile; voids come back as NaN"""
+        rows, cols = self.data.shape
+        row = (self.north - lat) / self.lat_step
+        col = (lon - self.west) / self.lon_step
+        r0 = np.clip(np.floor(row).astype(np.int64), 0, rows - 2)
+        c0 = np.clip(np.floor(col).astype(np.int64), 0, cols - 2)
+        fr = np.clip(row - r0, 0.0, 1.0)
+        fc = np.clip(col - c0, 0.0, 1.0)
+
+        # Fancy indexing on the memmap reads just the pages holding these cells
+        corners = np.stack((
+            self.data[r0, c0], self.data[r0, c0 + 1],
+            self.data[r0 + 1, c0], self.data[r0 + 1, c0 + 1]
+        )).astype(np.float64)
+        if self.nodata is not None:
+            corners[corners == self.nodata] = np.nan
+        top = corners[0] + fc * (corners[1] - corners[0])
+        bottom = corners[2] + fc * (corners[3] - corners[2])
+        return top + fr * (bottom - top)
+
+
+def open_hgt(path):
+    """SRTM .hgt tile: square big-endian int16 grid covering one degree, named after its south-west corner"""
+    match = HGT_NAME.match(os.path.basename(path))
+    if not match:
+        raise ValueError(f"Not an SRTM tile name: {path}")
+    lat = int(match.group(2)) * (1 if match.group(1).upper() == 'N' else -1)
+    lon = int(match.group(4)) * (1 if match.group(3).upper() == 'E' else -1)
+    size = int(round(np.sqrt(os.path.getsize(path) / 2)))
+    data = np.memmap(path, dtype='>i2', mode='r', shape=(size, size))
+    step = 1.0 / (size - 1)
+    return DemTile(data, lat + 1, lon, step, step, nodata=HGT_VOID)
+
+
+def open_npy(path):
+    """
+    Raw .npy grid with a JSON sidecar of the same name giving
+    {'north', 'west', 'latStep', 'lonStep', 'nodata'} for the first cell center.
+    """
+    with open(os.path.splitext(path)[0] + '.json') as f:
+        meta = json.load(f)
+    data = np.load(path, mmap_mode='r')
+    return DemTile(data, meta['north'], meta['west'], meta['latStep'], meta['lonStep'], meta.get('nodata'))
+
+
+def open_geotiff(path):
+    """Uncompressed, single-band GeoTIFF in geographic coordinates"""
+    import tifffile
+
+    with tifffile.TiffFile(path) as tif:
+        page = tif.pages[0]
+        scale = page.tags['ModelPixelScaleTag'].value
+        tiepoint = page.tags['ModelTiepointTag'].value
+        nodata = page.tags['GDALNoDataTag'].value if 'GDALNoDataTag' in page.tags else None
+        geokeys = tif.geotiff_metadata or {}
+
+    west = tiepoint[3] - tiepoint[0] * scale[0]
+    north = tiepoint[4] + tiepoint[1] * scale[1]
+    if geokeys.get('GTRasterTypeGeoKey', 1) in (1, 'RasterPixelIsArea'):
+        # Tie point is the corner of the first cell; samples sit at cell centers
+        west += scale[0] / 2.0
+        north -= scale[1] / 2.0
+    try:
+        data = tifffile.memmap(path, mode='r')
+    except ValueError:
+        raise ValueError(f"{path} is compressed or tiled; convert it to an uncompressed GeoTIFF to memory-map it")
+    if nodata is not None:
+        nodata = float(str(nodata).strip('\x00 '))
+    return DemTile(data, north, west, scale[1], scale[0], nodata)
+
+
+TILE_OPENERS = {
+    '.hgt': open_hgt,
+    '.npy': open_npy,
+    '.tif': open_geotiff,
+    '.tiff': open_geotiff
+}
+
+
+def export_shape(south, north, west, east, cell_size):
+    """(rows, cols) of the export grid over a lat/lon box; ValueError for a bad or oversized grid"""
+    if not np.isfinite(cell_size) or cell_size <= 0:
+        raise ValueError("Cell size must be positive")
+    rows = int(np.floor((north - south) / cell_size)) + 1
+    cols = int(np.floor((east - west) / cell_size)) + 1
+    if rows * cols > MAX_EXPORT_CELLS:
+        raise ValueError(f"Export of {rows}x{cols} cells exceeds the {MAX_EXPORT_CELLS} cell limit; use a larger cell size")
+    return rows, cols
+
+
+class TerrainModel:
+    """
+    Elevation lookups over a directory of DEM tiles.
+    Tiles are indexed by their bounds once, opened on first use and kept in an LRU of
+    memory-mapped tiles, so sampling a mission touches only the tiles (and pages) it crosses.
+    """
+
+    def __init__(self, directory=None, max_tiles=DEFAULT_MAX_TILES):
+        self.logger = logging.getLogger('terrain')
+        self.directory = directory or os.getenv('DEM_DIRECTORY', DEFAULT_DEM_DIRECTORY)
+        self.max_tiles = max_tiles
+        self.lock = threading.Lock()
+        self.open_tiles = OrderedDict()
+        self.version = 0
+        self.reload()
+
+    def reload(self):
+        """Rescan the tile directory; bumps `version` so plans built on old terrain can be dropped"""
+        paths = []
+        bounds = []
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                opener = TILE_OPENERS.get(os.path.splitext(name)[1].lower())
+                if opener is None:
+                    continue
+                try:
+                    # Opening only maps the file; this reads headers, not elevations
+                    bounds.append(opener(path).bounds)
+                    paths.append(path)
+                except Exception as e:
+                    self.logger.warning(f"Skipping DEM tile {path}: {str(e)}")
+
+        with self.lock:
+            self.paths = paths
+            self.bounds = np.array(bounds, dtype=np.float64).reshape(-1, 4)
+            self.open_tiles.clear()
+            self.version += 1
+        self.logger.info(f"Indexed {len(paths)} DEM tiles in {self.directory}")
+        return len(paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _tile(self, index):
+        with self.lock:
+            tile = self.open_tiles.get(index)
+            if tile is not None:
+                self.open_tiles.move_to_end(index)
+                return tile
+        path = self.paths[index]
+        tile = TILE_OPENERS[os.path.splitext(path)[1].lower()](path)
+        with self.lock:
+            self.open_tiles[index] = tile
+            while len(self.open_tiles) > self.max_tiles:
+                self.open_tiles.popitem(last=False)
+        return tile
+
+    def elevation(self, lat, lon):
+        """Terrain elevation (meters) at lat/lon arrays in one batched call; NaN where no tile covers a point"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        result = np.full(lat.shape, np.nan)
+        pending = np.ones(lat.shape, dtype=bool)
+        for index, (south, north, west, east) in enumerate(self.bounds):
+            inside = pending & (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+            if inside.any():
+                result[inside] = self._tile(index).sample(lat[inside], lon[inside])
+                pending &= ~inside
+                if not pending.any():
+                    break
+        return result
+
+    def stats(self):
+        with self.lock:
+            return {
+                'directory': self.directory,
+                'tiles': len(self.paths),
+                'openTiles': len(self.open_tiles),
+                'maxOpenTiles': self.max_tiles,
+                'version': self.version
+            }
+
+    def export(self, south, north, west, east, cell_size, path, format_type='ASC'):
+        """
+        Write the terrain inside a lat/lon box on a regular grid of `cell_size` degrees.
+        The grid is sampled and written EXPORT_CHUNK_ROWS rows at a time, so memory stays bounded
+        however large the export is. Returns the grid's (rows, cols).
+        """
+        if format_type not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported terrain export format: {format_type}")
+        rows, cols = export_shape(south, north, west, east, cell_size)
+        lons = west + np.arange(cols) * cell_size
+
+        if format_type == 'NPY':
+            out = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(rows, cols))
+            with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+                json.dump({'north': north, 'west': west, 'latStep': cell_size, 'lonStep': cell_size,
+                           'nodata': None}, f)
+            for start in range(0, rows, EXPORT_CHUNK_ROWS):
+                lats = north - np.arange(start, min(start + EXPORT_CHUNK_ROWS, rows)) * cell_size
+                grid_lat, grid_lon = np.meshgrid(lats, lons, indexing='ij')
+                out[start:start + len(lats)] = self.elevation(grid_lat, grid_lon)
+            out.flush()
+            del out
+        else:
+            # ESRI ASCII grid; the header gives the lower-left cell center
+            with open(path, 'w') as f:
+                f.write(f"ncols {cols}\nnrows {rows}\n")
+                f.write(f"xllcenter {west}\nyllcenter {north - (rows - 1) * cell_size}\n")
+                f.write(f"cellsize {cell_size}\nNODATA_value -9999\n")
+                for start in range(0, rows, EXPORT_CHUNK_ROWS):
+                    lats = north - np.arange(start, min(start + EXPORT_CHUNK_ROWS, rows)) * cell_size
+                    grid_lat, grid_lon = np.meshgrid(lats, lons, indexing='ij')
+                    elevation = np.nan_to_num(self.elevation(grid_lat, grid_lon), nan=-9999.0)
+                    np.savetxt(f, elevation, fmt='%.2f')
+        return rows, cols
+
+
+def densify(waypoints, spacing):
+    """
+    Insert points along every leg so no leg is longer than `spacing` meters (copies).
+    Returns the dense waypoints and the index each original waypoint moved to.
+    """
+    count = len(waypoints)
+    if count < 2:
+        return waypoints, np.arange(count)
+    frame = LocalFrame.around(np.column_stack((waypoints.lat, waypoints.lon)))
+    x, y = frame.to_local(waypoints.lat, waypoints.lon)
+    pieces = np.maximum(np.ceil(np.hypot(np.diff(x), np.diff(y)) / spacing).astype(np.int64), 1)
+
+    # Each leg i contributes pieces[i] points at fractions 0, 1/pieces, ...; the final waypoint closes the path
+    leg = np.repeat(np.arange(count - 1), pieces)
+    offsets = np.cumsum(pieces) - pieces
+    fraction = (np.arange(len(leg)) - offsets[leg]) / pieces[leg]
+
+    columns = np.repeat(waypoints.columns[:, :-1], pieces, axis=1)
+    delta = waypoints.columns[:3, 1:] - waypoints.columns[:3, :-1]
+    columns[:3] += fraction * delta[:, leg]
+    # Explicit photo points stay single; interpolated points inherit only the leg's ongoing actions
+    capture = np.repeat(waypoints.capture[:-1], pieces)
+    capture[fraction > 0] &= ~np.uint8(CAPTURE_TRIGGER)
+    dense = WaypointArray.concatenate((WaypointArray(columns, capture), waypoints[count - 1:]))
+    return dense, np.append(offsets, len(dense) - 1)
+
+
+def terrain_following(waypoints, terrain, clearance, home, spacing=DEFAULT_SAMPLE_SPACING):
+    """
+    Resample the path every `spacing` meters and set each point's altitude to `clearance` meters
+    above the terrain below it, relative to the takeoff elevation at `home` (waypoint altitudes are
+    takeoff-relative). Straight stretches over even ground are collapsed again by the upload
+    simplifier. Returns the dense waypoints and the index each original waypoint moved to.
+    Raises ValueError where the DEM has no coverage.
+    """
+    dense, index = densify(waypoints, spacing)
+    elevation = terrain.elevation(np.append(dense.lat, home[0]), np.append(dense.lon, home[1]))
+    if np.isnan(elevation).any():
+        raise ValueError("Mission area is not fully covered by the terrain model")
+    dense.columns[2] = elevation[:-1] + clearance - elevation[-1]
+    return dense, index
@@ -0,0 +1,158 @@
+import json
+import struct
+
+import numpy as np
+
+# Per-waypoint action flags stored in the `capture` column
+CAPTURE_PHOTO = 0x01        # Interval capture is running from this waypoint on
+CAPTURE_DIRECTIONAL = 0x02  # 3-directional capture instead of omni-directional
+CAPTURE_TRIGGER = 0x04      # Take a photo exactly at this waypoint
+SPOTLIGHT_ON = 0x08         # AL1 spotlight enabled
+
+# Binary layout: magic, format version, float column count, waypoint count, then each float64
+# column contiguously and finally the uint8 capture column. Little-endian throughout.
+MAGIC = b'WPTA'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+CONTENT_TYPE = 'application/x-waypoint-array'
+
+
+class WaypointArray:
+    """
+    Columnar mission waypoints: float64 columns for position and per-waypoint actions plus a
+    uint8 capture-flag column. Slicing returns views, and the binary encoding is the raw columns,
+    so neither slicing nor decoding copies waypoint data.
+    """
+
+    FIELDS = ('lat', 'lon', 'alt', 'speed', 'heading', 'gimbal_pitch')
+    JSON_KEYS = ('lat', 'lon', 'alt', 'speed', 'heading', 'gimbalPitch')
+
+    def __init__(self, columns, capture):
+        self.columns = columns
+        self.capture = capture
+
+    @classmethod
+    def from_columns(cls, lat, lon, alt=0.0, speed=0.0, heading=0.0, gimbal_pitch=-90.0, capture=0):
+        """Build an array from per-field arrays; scalar fields are broadcast to every waypoint"""
+        lat = np.asarray(lat, dtype=np.float64)
+        columns = np.empty((len(cls.FIELDS), len(lat)), dtype=np.float64)
+        for row, value in enumerate((lat, lon, alt, speed, heading, gimbal_pitch)):
+            columns[row] = value
+        flags = np.empty(len(lat), dtype=np.uint8)
+        flags[:] = capture
+        return cls(columns, flags)
+
+    @classmethod
+    def from_dicts(cls, waypoints):
+        """Build an array from the legacy list of {'lat', 'lon', 'alt', ...} dicts"""
+        columns = np.array([
+            [wp.get(key, default) for wp in waypoints]
+            for key, default in zip(cls.JSON_KEYS, (0.0, 0.0, 0.0, 0.0, 0.0, -90.0))
+        ], dtype=np.float64).reshape(len(cls.FIELDS), len(waypoints))
+        capture = np.array([wp.get('capture', 0) for wp in waypoints], dtype=np.uint8)
+        return cls(columns, capture)
+
+    @classmethod
+    def empty(cls):
+        return cls.from_columns(np.empty(0), np.empty(0))
+
+    @classmethod
+    def concatenate(cls, arrays):
+        """Join several arrays end to end (copies)"""
+        arrays = list(arrays)
+        if not arrays:
+            return cls.empty()
+        return cls(
+            np.concatenate([a.columns for a in arrays], axis=1),
+            np.concatenate([a.capture for a in arrays])
+        )
+
+    def __len__(self):
+        return self.columns.shape[1]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            index = range(len(self))[index]
+            return self.to_dicts(index, index + 1)[0]
+        # Slices give views; index arrays and masks give copies, as in NumPy
+        return WaypointArray(self.columns[:, index], self.capture[index])
+
+    @property
+    def lat(self):
+        return self.columns[0]
+
+    @property
+    def lon(self):
+        return self.columns[1]
+
+    @property
+    def alt(self):
+        return self.columns[2]
+
+    @property
+    def speed(self):
+        return self.columns[3]
+
+    @property
+    def heading(self):
+        return self.columns[4]
+
+    @property
+    def gimbal_pitch(self):
+        return self.columns[5]
+
+    @property
+    def nbytes(self):
+        return self.columns.nbytes + self.capture.nbytes
+
+    def matching_ends(self, other):
+        """
+        (prefix, suffix): how many leading and trailing waypoints are identical in both arrays.
+        The two never overlap, so what lies between them is the smallest span that differs.
+        """
+        count = min(len(self), len(other))
+        same = ((self.columns[:, :count] == other.columns[:, :count]).all(axis=0)
+                & (self.capture[:count] == other.capture[:count]))
+        prefix = count if same.all() else int(np.argmin(same))
+        tail = count - prefix
+        same = ((self.columns[:, len(self) - tail:] == other.columns[:, len(other) - tail:]).all(axis=0)
+                & (self.capture[len(self) - tail:] == other.capture[len(other) - tail:]))[::-1]
+        suffix = tail if same.all() else int(np.argmin(same))
+        return prefix, suffix
+
+    def to_dicts(self, start=None, stop=None):
+        """Materialize waypoints as JSON-ready dicts (opt-in; allocates one dict per waypoint)"""
+        columns = self.columns[:, start:stop].tolist()
+        capture = self.capture[start:stop].tolist()
+        return [
+            dict(zip(self.JSON_KEYS, values), capture=flags)
+            for values, flags in zip(zip(*columns), capture)
+        ]
+
+    def to_json(self):
+        return json.dumps(self.to_dicts())
+
+    def encode(self):
+        """Compact binary encoding: header followed by the raw columns"""
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(self.FIELDS), len(self))
+        return b''.join((
+            header,
+            np.ascontiguousarray(self.columns, dtype='<f8').tobytes(),
+            np.ascontiguousarray(self.capture).tobytes()
+        ))
+
+    @classmethod
+    def decode(cls, buffer):
+        """Decode a buffer produced by encode(); the columns are read-only views onto the buffer"""
+        magic, version, field_count, count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a waypoint array buffer")
+        if version != FORMAT_VERSION or field_count != len(cls.FIELDS):
+            raise ValueError(f"Unsupported waypoint array format version {version}")
+
+        offset = HEADER.size
+        columns = np.frombuffer(buffer, dtype='<f8', count=field_count * count, offset=offset)
+        offset += columns.nbytes
+        capture = np.frombuffer(buffer, dtype=np.uint8, count=count, offset=offset)
+        return cls(columns.reshape(field_count, count), capture)
+
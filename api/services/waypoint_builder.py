@@ -0,0 +1,37 @@
+import numpy as np
+
+from services.geo import DEFAULT_HOME, leg_headings
+from services.terrain import terrain_following
+from services.waypoint_array import WaypointArray
+
+
+class WaypointBuilder:
+    """
+    Turns a planned path into mission waypoints with one mission's per-waypoint settings
+    (altitude or terrain clearance, speed, capture flags), so a whole plan and a re-planned
+    piece of it come out identical.
+    """
+
+    def __init__(self, altitude, speed, capture=0, terrain=None, clearance=None, home=None):
+        self.altitude = altitude
+        self.speed = speed
+        self.capture = capture
+        self.terrain = terrain
+        self.clearance = clearance
+        self.home = tuple(home or DEFAULT_HOME)
+
+    def settings(self):
+        """Everything that affects the generated waypoints, for checking two builders agree"""
+        return (self.altitude, self.speed, self.capture, self.clearance, self.home)
+
+    def build(self, lat, lon, x, y):
+        """
+        Waypoints along a path given as lat/lon and planning-frame x/y.
+        Returns the waypoints and the index each path point ended up at (terrain following adds points).
+        """
+        waypoints = WaypointArray.from_columns(
+            lat, lon, alt=self.altitude, speed=self.speed, heading=leg_headings(x, y), capture=self.capture
+        )
+        if self.clearance is None:
+            return waypoints, np.arange(len(waypoints))
+        return terrain_following(waypoints, self.terrain, self.clearance, self.home)
@@ -0,0 +1,198 @@
+import numpy as np
+
+from services.geo import LocalFrame
+from services.waypoint_array import CAPTURE_TRIGGER, WaypointArray
+
+# Default cross-track tolerance for dropping waypoints (meters)
+DEFAULT_SIMPLIFY_TOLERANCE = 0.5
+
+# Approximate link time to transfer and acknowledge one waypoint during upload (seconds)
+UPLOAD_TIME_PER_WAYPOINT = 0.05
+
+
+def _segment_distance(px, py, pz, ax, ay, az, bx, by, bz):
+    """Distance from points to the 3D segments a-b, all as parallel arrays"""
+    vx, vy, vz = bx - ax, by - ay, bz - az
+    wx, wy, wz = px - ax, py - ay, pz - az
+    length_sq = vx * vx + vy * vy + vz * vz
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length_sq > 0, (wx * vx + wy * vy + wz * vz) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.sqrt((wx - t * vx) ** 2 + (wy - t * vy) ** 2 + (wz - t * vz) ** 2)
+
+
+def douglas_peucker_mask(x, y, z, tolerance, anchors=None):
+    """
+    Douglas-Peucker simplification, processed level by level: every open interval is split at its
+    farthest point in the same vectorized pass, so the Python loop runs once per recursion depth
+    rather than once per interval. Points flagged in `anchors` are always kept.
+    Returns a boolean mask of the points to keep.
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool) if anchors is None else np.asarray(anchors, dtype=bool).copy()
+    if n <= 2:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+
+    # Points still inside an interval that may need splitting
+    active = ~keep
+    while True:
+        candidates = np.flatnonzero(active)
+        if len(candidates) == 0:
+            break
+
+        kept = np.flatnonzero(keep)
+        interval = np.searchsorted(kept, candidates) - 1
+        a = kept[interval]
+        b = kept[interval + 1]
+        distance = _segment_distance(x[candidates], y[candidates], z[candidates],
+                                     x[a], y[a], z[a], x[b], y[b], z[b])
+
+        # Farthest candidate per interval (candidates are sorted, so intervals are contiguous runs)
+        order = np.lexsort((-distance, interval))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = interval[order][1:] != interval[order][:-1]
+        farthest = order[first]
+
+        split = farthest[distance[farthest] > tolerance]
+        if len(split) == 0:
+            break
+        keep[candidates[split]] = True
+
+        # Intervals whose farthest point is within tolerance are finished
+        done = np.zeros(len(kept), dtype=bool)
+        done[interval[farthest[distance[farthest] <= tolerance]]] = True
+        active[candidates[done[interval]]] = False
+        active[candidates[split]] = False
+
+    return keep
+
+
+def action_anchors(waypoints):
+    """Waypoints that must survive simplification: capture triggers and any change of per-waypoint action"""
+    anchors = (waypoints.capture & CAPTURE_TRIGGER) != 0
+    # A trigger fires at its waypoint only, so it is not an action change for the next one
+    actions = waypoints.capture & ~np.uint8(CAPTURE_TRIGGER)
+    changed = np.zeros(len(waypoints), dtype=bool)
+    changed[1:] = (
+        (np.diff(waypoints.speed) != 0)
+        | (np.diff(waypoints.gimbal_pitch) != 0)
+        | (actions[1:] != actions[:-1])
+    )
+    return anchors | changed
+
+
+def simplification_mask(waypoints, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, frame=None):
+    """
+    Mask of the waypoints simplify_waypoints() keeps, with the simplified WaypointArray.
+    The first and last waypoints are always kept, so a span can be re-simplified on its own.
+    Distances are measured in `frame`, by default one around the waypoints.
+    """
+    count = len(waypoints)
+    if count <= 2:
+        return np.ones(count, dtype=bool), waypoints
+
+    if frame is None:
+        frame = LocalFrame.around(np.column_stack((waypoints.lat, waypoints.lon)))
+    x, y = frame.to_local(waypoints.lat, waypoints.lon)
+    keep = douglas_peucker_mask(x, y, waypoints.alt, tolerance, anchors=action_anchors(waypoints))
+    return keep, _with_leg_headings(waypoints[keep], x[keep], y[keep])
+
+
+def _with_leg_headings(simplified, x, y):
+    """Leg headings change where points were removed; recompute them from the kept path"""
+    if len(x) >= 2:
+        headings = np.degrees(np.arctan2(np.diff(x), np.diff(y))) % 360.0
+        simplified.columns[4] = np.append(headings, headings[-1])
+    return simplified
+
+
+def _nearest_anchor(waypoints, index, step):
+    """
+    The nearest waypoint from `index` on, searching backwards (step -1) or forwards (step 1),
+    that every simplification keeps: an action anchor or an end of the mission. Anchors are
+    evaluated in growing windows, so the search costs the distance to the anchor, not the mission.
+    """
+    count = len(waypoints)
+    reach = 64
+    while True:
+        lo, hi = (max(index - reach, 0), index + 1) if step < 0 else (index, min(index + reach, count))
+        # An action change is judged against the previous waypoint, so the window starts one early
+        before = max(lo - 1, 0)
+        found = np.flatnonzero(action_anchors(waypoints[before:hi])[lo - before:])
+        if step < 0:
+            if len(found) or lo == 0:
+                return lo + int(found[-1]) if len(found) else 0
+        elif len(found) or hi == count:
+            return lo + int(found[0]) if len(found) else count - 1
+        reach *= 2
+
+
+def resimplify_span(waypoints, uploaded, uploaded_index, uploaded_count, prefix, suffix, frame,
+                    tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
+    """
+    Simplify a mission of which only the middle changed since `uploaded` (kept waypoints
+    `uploaded_index` of `uploaded_count`) was simplified from it in `frame`: the first `prefix`
+    and last `suffix` waypoints are the same as then. Douglas-Peucker never splits across a kept
+    anchor, so only the waypoints between the nearest anchors around the change are simplified
+    again and the rest is taken from `uploaded`; the result is the same as simplification_mask()
+    of the whole mission in `frame`.
+    Returns the kept waypoint indices, the simplified WaypointArray and the (start, stop) span
+    of `uploaded` that was replaced.
+    """
+    count = len(waypoints)
+    if count <= 2 or uploaded_count <= 2:
+        keep, simplified = simplification_mask(waypoints, tolerance, frame)
+        return np.flatnonzero(keep), simplified, (0, len(uploaded))
+
+    # Anchors are compared with their previous waypoint, so the first changed waypoint and the
+    # one after the change may have become or stopped being anchors; look past both
+    start = _nearest_anchor(waypoints, max(prefix - 1, 0), -1)
+    stop = _nearest_anchor(waypoints, min(count - suffix + 1, count - 1), 1)
+    span = waypoints[start:stop + 1]
+    x, y = frame.to_local(span.lat, span.lon)
+    keep = douglas_peucker_mask(x, y, span.alt, tolerance, anchors=action_anchors(span))
+    simplified = _with_leg_headings(span[keep], x[keep], y[keep])
+    index = start + np.flatnonzero(keep)
+
+    replaced_start = int(np.searchsorted(uploaded_index, start))
+    if stop == count - 1:
+        # The mission's last waypoint takes its heading from the leg into it, which may have changed
+        replaced_stop = len(uploaded)
+        tail = uploaded[len(uploaded):]
+        tail_index = uploaded_index[len(uploaded):]
+    else:
+        # The span's last waypoint heads for the next kept one after it, as it did before
+        shift = count - uploaded_count
+        replaced_stop = int(np.searchsorted(uploaded_index, stop - shift))
+        simplified, index = simplified[:-1], index[:-1]
+        tail = uploaded[replaced_stop:]
+        tail_index = uploaded_index[replaced_stop:] + shift
+    return (
+        np.concatenate((uploaded_index[:replaced_start], index, tail_index)),
+        WaypointArray.concatenate((uploaded[:replaced_start], simplified, tail)),
+        (replaced_start, replaced_stop)
+    )
+
+
+def simplify_waypoints(waypoints, tolerance=DEFAULT_SIMPLIFY_TOLERANCE):
+    """
+    Drop collinear and near-collinear waypoints (within `tolerance` meters of the simplified path,
+    altitude included) while keeping capture triggers and action changes.
+    Returns the simplified WaypointArray and a report of the savings.
+    """
+    _, simplified = simplification_mask(waypoints, tolerance)
+    return simplified, simplification_report(len(waypoints), len(simplified))
+
+
+def simplification_report(original, simplified):
+    removed = original - simplified
+    return {
+        'originalCount': original,
+        'simplifiedCount': simplified,
+        'reduction': removed / original if original else 0.0,
+        'uploadTimeBefore': original * UPLOAD_TIME_PER_WAYPOINT,
+        'uploadTimeAfter': simplified * UPLOAD_TIME_PER_WAYPOINT,
+        'uploadTimeSaved': removed * UPLOAD_TIME_PER_WAYPOINT
+    }
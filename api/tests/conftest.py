@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# Services and controllers import each other as `services.*` and `controllers.*`, relative to api/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def no_upload_delay(monkeypatch):
+    """Skip the simulated link delay of DroneController uploads"""
+    monkeypatch.setattr('controllers.drone_controller.time.sleep', lambda seconds: None)
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    """The API module, imported with its log, DEM and flight log directories under a temporary directory"""
+    root = tmp_path_factory.mktemp('server')
+    os.environ['DEM_DIRECTORY'] = str(root / 'dem')
+    os.environ['FLIGHT_LOG_DIRECTORY'] = str(root / 'flight_logs')
+    cwd = os.getcwd()
+    # The server logs to api_server.log in the working directory
+    os.chdir(root)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
+
+
+@pytest.fixture(scope='session')
+def desktop():
+    """
+    The Qt client module with an offscreen QApplication; skipped when PyQt or the client's own
+    modules are not importable, as in the desktop benchmark suite
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if root not in sys.path:
+        sys.path.append(root)
+    widgets = pytest.importorskip('PyQt6.QtWidgets')
+    module = pytest.importorskip('sar_mission_control')
+    widgets.QApplication.instance() or widgets.QApplication([])
+    return module
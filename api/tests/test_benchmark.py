@@ -0,0 +1,92 @@
+import importlib.util
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='module')
+def bench():
+    """The mission planning benchmark script, imported as a module"""
+    spec = importlib.util.spec_from_file_location('mission_planning', os.path.join(ROOT, 'benchmarks', 'mission_planning.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def result(suite, name, median, memory=1000, waypoints=100):
+    return {'suite': suite, 'name': name, 'params': {'missionType': name}, 'peakMemory': memory,
+            'waypointCount': waypoints, 'wallTime': {'min': median, 'median': median}}
+
+
+@pytest.fixture
+def planner_only(bench, monkeypatch):
+    """Fast stand-ins for both suites; the desktop one cannot run, as without PyQt"""
+    monkeypatch.setattr(bench, 'bench_planner', lambda repeats, quick=False: [result('planner', 'grid', 0.01)])
+    monkeypatch.setattr(bench, 'bench_desktop', lambda repeats, quick=False: ([], "desktop app not importable"))
+    monkeypatch.setattr(bench, 'git_commit', lambda: 'abc123')
+    yield
+    # main() silences planner logging for the rest of the process
+    logging.disable(logging.NOTSET)
+
+
+def test_desktop_suite_says_why_it_cannot_run(bench, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'PyQt6', None)
+    monkeypatch.setitem(sys.modules, 'PyQt6.QtWidgets', None)
+    results, reason = bench.bench_desktop(1, quick=True)
+    assert results == []
+    assert reason.startswith("desktop app not importable")
+
+
+def test_a_skipped_suite_fails_the_run(bench, planner_only, tmp_path, capsys):
+    output = tmp_path / 'bench.json'
+    assert bench.main(['--output', str(output)]) == bench.EXIT_SKIPPED
+    assert 'SKIPPED' in capsys.readouterr().err
+    report = json.loads(output.read_text())
+    assert report['skipped'] == [{'suite': 'desktop', 'reason': "desktop app not importable"}]
+    assert [r['suite'] for r in report['results']] == ['planner']
+
+    assert bench.main(['--output', str(output), '--allow-skip']) == 0
+    assert bench.main(['--output', str(output), '--suite', 'planner']) == 0
+
+
+def test_compare_reports_baseline_cases_that_did_not_run(bench, planner_only, tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'commit': 'old', 'results': [
+        result('planner', 'grid', 0.01), result('desktop', 'grid', 0.05)
+    ]}))
+    output = tmp_path / 'bench.json'
+    assert bench.main(['--output', str(output), '--suite', 'planner', '--compare', str(baseline)]) == 0
+    report = json.loads(output.read_text())
+    assert report['missing'] == [{'suite': 'desktop', 'name': 'grid'}]
+    assert report['regressions'] == []
+
+
+def test_compare_flags_slower_and_larger_cases(bench):
+    baseline = {'results': [result('planner', 'a', 1.0), result('planner', 'b', 1.0, memory=100),
+                            result('planner', 'c', 1.0)]}
+    current = [result('planner', 'a', 1.3), result('planner', 'b', 1.0, memory=200), result('planner', 'c', 1.2)]
+    regressions = bench.compare(current, baseline, threshold=1.25)
+    assert [(r['name'], r['metric']) for r in regressions] == [('a', 'wallTime'), ('b', 'peakMemory')]
+
+
+def test_scaling_exponent_of_linear_planning(bench):
+    results = [result('planner', f'grid {n}', n * 1e-5, waypoints=n) for n in (100, 1000, 10000)]
+    for r in results:
+        r['params'] = {'missionType': 'Search Grid', 'gridSize': r['waypointCount']}
+    curves = bench.scaling_curves(results)
+    assert len(curves) == 1
+    assert curves[0]['exponent'] == pytest.approx(1.0)
+
+
+def test_measure_runs_setup_before_every_run(bench):
+    calls = []
+    measured = bench.measure(lambda: calls.append('run') or 7, lambda: calls.append('setup'), repeats=3)
+    # One warm-up, the timed repeats and one traced run, each after a setup
+    assert calls == ['setup', 'run'] * 5
+    assert measured['repeats'] == 3 and measured['waypointCount'] == 7
+    assert measured['wallTime']['min'] <= measured['wallTime']['median']
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from services.camera_triggers import (
+    CAMERA_ALL, CAMERA_FRONT, CAMERA_LEFT, CAMERA_RIGHT, TriggerSchedule, footprint, plan_trigger_schedule
+)
+from services.geo import DEFAULT_HOME, LocalFrame
+from services.search_grid import DEFAULT_TURN_TIME
+from services.waypoint_array import CAPTURE_DIRECTIONAL, CAPTURE_PHOTO, CAPTURE_TRIGGER, WaypointArray
+
+FRAME = LocalFrame(*DEFAULT_HOME)
+
+
+def path(x, y, capture, altitude=50.0):
+    lat, lon = FRAME.to_geodetic(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    return WaypointArray.from_columns(lat, lon, altitude, 5.0, capture=capture)
+
+
+def test_triggers_are_spaced_by_speed_and_interval():
+    # 100 m north at 5 m/s with a photo every 2 s: one every 10 m, both ends included
+    schedule = plan_trigger_schedule(path([0, 0], [0, 100], CAPTURE_PHOTO), 5.0, 2.0)
+    assert len(schedule) == 11
+    np.testing.assert_allclose(schedule.distance, np.arange(0.0, 101.0, 10.0))
+    np.testing.assert_allclose(schedule.time, schedule.distance / 5.0)
+    np.testing.assert_allclose(schedule.heading, 0.0, atol=1e-9)
+    assert np.all(schedule.camera == CAMERA_ALL)
+    assert schedule.duration == pytest.approx(20.0)
+
+
+def test_overlap_follows_from_trigger_spacing_and_track_spacing():
+    across, along = footprint(50.0)
+    schedule = plan_trigger_schedule(path([0, 0], [0, 100], CAPTURE_PHOTO), 5.0, 2.0, track_spacing=20.0)
+    assert schedule.forward_overlap == pytest.approx(1.0 - 10.0 / along)
+    assert schedule.side_overlap == pytest.approx(1.0 - 20.0 / across)
+    # Spacing wider than the footprint leaves gaps, reported as negative overlap
+    sparse = plan_trigger_schedule(path([0, 0], [0, 1000], CAPTURE_PHOTO), 5.0, 20.0, track_spacing=200.0)
+    assert sparse.forward_overlap < 0 and sparse.side_overlap < 0
+
+
+def test_directional_capture_cycles_the_cameras():
+    schedule = plan_trigger_schedule(path([0, 0], [0, 100], CAPTURE_PHOTO | CAPTURE_DIRECTIONAL), 5.0, 2.0)
+    expected = np.resize([CAMERA_FRONT, CAMERA_LEFT, CAMERA_RIGHT], len(schedule))
+    np.testing.assert_array_equal(schedule.camera, expected)
+    # Each camera only fires on every third trigger, so its own photos are three steps apart
+    _, along = footprint(50.0)
+    assert schedule.forward_overlap == pytest.approx(1.0 - 30.0 / along)
+
+
+def test_only_legs_from_photo_waypoints_are_captured():
+    # Transit north without photos, then capture on the leg east
+    waypoints = path([0, 0, 100], [0, 100, 100], [0, CAPTURE_PHOTO, 0])
+    schedule = plan_trigger_schedule(waypoints, 5.0, 2.0)
+    assert schedule.distance.min() >= 100.0
+    np.testing.assert_allclose(schedule.heading, 90.0)
+    # Triggers after the corner wait for the turn: half a full turn for 90 degrees
+    np.testing.assert_allclose(schedule.time, schedule.distance / 5.0 + DEFAULT_TURN_TIME / 2)
+
+
+def test_explicit_triggers_fire_at_their_waypoint():
+    waypoints = path([0, 0, 0], [0, 50, 100], [0, CAPTURE_TRIGGER, 0])
+    schedule = plan_trigger_schedule(waypoints, 5.0, 2.0)
+    assert len(schedule) == 1
+    assert schedule.distance[0] == pytest.approx(50.0)
+    lat, lon = FRAME.to_geodetic(np.array([0.0]), np.array([50.0]))
+    assert (schedule.lat[0], schedule.lon[0]) == (pytest.approx(lat[0]), pytest.approx(lon[0]))
+
+
+def test_captured_by_counts_photos_taken_so_far():
+    schedule = plan_trigger_schedule(path([0, 0], [0, 100], CAPTURE_PHOTO), 5.0, 2.0)
+    assert schedule.captured_by(-1.0) == 0
+    # A photo due exactly now has been taken
+    assert schedule.captured_by(0.0) == 1
+    assert schedule.captured_by(3.9) == 2
+    assert schedule.captured_by(4.0) == 3
+    assert schedule.captured_by(schedule.duration + 60) == len(schedule)
+    assert TriggerSchedule.empty().captured_by(10.0) == 0
+
+
+@pytest.mark.parametrize('speed, interval', [(0.0, 2.0), (5.0, 0.0)])
+def test_no_interval_photos_without_speed_or_interval(speed, interval):
+    schedule = plan_trigger_schedule(path([0, 0], [0, 100], CAPTURE_PHOTO), speed, interval)
+    assert len(schedule) == 0
+    assert schedule.summary()['imagesPlanned'] == 0
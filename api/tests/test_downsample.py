@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from services.downsample import EXACT_LTTB_LIMIT, downsample, lttb, minmax
+
+
+def reference_lttb(x, y, threshold):
+    """Sequential Largest-Triangle-Three-Buckets over the same bucket edges"""
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = [0]
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_stop = edges[bucket + 1], edges[bucket + 2]
+            cx, cy = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        ax, ay = x[kept[-1]], y[kept[-1]]
+        area = np.abs((ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay))
+        kept.append(start + int(np.argmax(area)))
+    kept.append(n - 1)
+    return np.array(kept)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_lttb_matches_sequential_reference(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(3, 3000))
+    x = np.sort(rng.uniform(0, 1000, n))
+    y = np.cumsum(rng.normal(0, 1, n))
+    threshold = int(rng.integers(3, n + 1))
+
+    np.testing.assert_array_equal(lttb(x, y, threshold), reference_lttb(x, y, threshold))
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+@pytest.mark.parametrize('threshold', [1, 2, 3, 4, 7, 100])
+def test_never_returns_more_than_threshold_points(method, threshold):
+    rng = np.random.default_rng(threshold)
+    x = np.arange(1000.0)
+    y = rng.normal(0, 1, 1000)
+
+    keep = downsample(x, y, threshold, method)
+
+    assert 0 < len(keep) <= threshold
+    assert np.all(np.diff(keep) > 0)
+    assert keep[-1] == len(x) - 1 or method == 'minmax'
+
+
+def test_single_point_is_the_latest():
+    y = np.arange(10.0)
+    assert lttb(y, y, 1).tolist() == [9]
+    assert minmax(y, 1).tolist() == [9]
+
+
+def test_short_series_are_returned_whole():
+    x = np.arange(5.0)
+    assert downsample(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_minmax_keeps_every_spike():
+    y = np.zeros(10000)
+    spikes = [1234, 5678, 9001]
+    y[spikes] = [50.0, -50.0, 80.0]
+
+    keep = minmax(y, 100)
+
+    assert len(keep) <= 100
+    assert set(spikes) <= set(keep.tolist())
+
+
+def test_long_series_keep_end_points_and_spikes():
+    n = EXACT_LTTB_LIMIT * 2
+    x = np.arange(float(n))
+    y = np.sin(x / 5000.0)
+    y[123456] = 100.0
+
+    keep = downsample(x, y, 500)
+
+    assert len(keep) <= 500
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert 123456 in keep
+
+
+def test_invalid_arguments_are_rejected():
+    x = np.arange(10.0)
+    with pytest.raises(ValueError):
+        downsample(x, x, 0)
+    with pytest.raises(ValueError):
+        downsample(x, x, 5, 'median')
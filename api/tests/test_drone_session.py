@@ -0,0 +1,65 @@
+import pytest
+from flask import Flask
+
+from controllers.drone_session import SessionRegistry
+from services.telemetry_store import DEFAULT_DRONE_ID, TelemetryStore
+from services.telemetry_stream import TelemetryBroadcaster
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = SessionRegistry(TelemetryStore(capacity=16), TelemetryBroadcaster(), flight_log_directory=str(tmp_path))
+    yield registry
+    for session in registry.list():
+        registry.remove(session.drone_id)
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_get_creates_one_session_per_drone(registry):
+    first = registry.get('drone-a')
+
+    assert registry.get('drone-a') is first
+    assert registry.get('drone-b') is not first
+    assert sorted(session.drone_id for session in registry.list()) == ['drone-a', 'drone-b']
+
+
+@pytest.mark.parametrize('drone_id', ['', '.hidden', 'a/b', 'a\\b', 'x' * 65, None, ['drone-1']])
+def test_invalid_drone_ids_are_rejected(registry, drone_id):
+    with pytest.raises(ValueError):
+        registry.get(drone_id)
+    with pytest.raises(ValueError):
+        registry.find(drone_id)
+    assert registry.list() == []
+
+
+def test_reads_do_not_create_sessions(registry, app):
+    with app.test_request_context('/api/status?droneId=unknown'):
+        assert registry.for_request() is None
+    assert registry.find('unknown') is None
+    assert registry.list() == []
+
+
+def test_setup_requests_create_sessions(registry, app):
+    with app.test_request_context('/api/drone/connect', method='POST', json={'droneId': 'drone-c'}):
+        session = registry.for_request(create=True)
+    assert session.drone_id == 'drone-c'
+
+    with app.test_request_context('/api/status?droneId=drone-c'):
+        assert registry.for_request() is session
+
+
+def test_requests_without_drone_id_use_the_default_drone(registry, app):
+    with app.test_request_context('/api/status'):
+        assert registry.for_request(create=True).drone_id == DEFAULT_DRONE_ID
+
+
+def test_remove_closes_and_forgets_the_session(registry):
+    registry.get('drone-d')
+
+    assert registry.remove('drone-d').drone_id == 'drone-d'
+    assert registry.find('drone-d') is None
+    assert registry.remove('drone-d') is None
@@ -0,0 +1,50 @@
+import pytest
+
+from services import fleet_planner
+from services.geo import DEFAULT_HOME, square_area
+
+
+AREA = square_area(DEFAULT_HOME, 200)
+
+
+def fleet(*speeds):
+    return [{'id': f'drone-{i + 1}', 'speed': speed, 'battery': 100} for i, speed in enumerate(speeds)]
+
+
+def test_empty_partitions_have_the_mission_keys():
+    missions = fleet_planner.plan_fleet(AREA, fleet(1, 1e-9), 20, 50)
+    planned, empty = missions
+    assert empty['waypoints'] == [] and empty['area'] == []
+    assert set(empty) == set(planned)
+    assert empty['type'] == planned['type'] == 'Search Grid'
+
+
+def test_pooled_plan_matches_in_process_plan():
+    pooled = fleet_planner.plan_fleet(AREA, fleet(5, 5, 8), 20, 50, optimize=True, max_workers=2)
+    pool = fleet_planner._pool
+    assert pool is not None
+    again = fleet_planner.plan_fleet(AREA, fleet(5, 5, 8), 20, 50, optimize=True, max_workers=2)
+    assert fleet_planner._pool is pool
+
+    serial = fleet_planner.plan_fleet(AREA, fleet(5, 5, 8), 20, 50, optimize=True, max_workers=1)
+    for a, b, c in zip(pooled, again, serial):
+        assert a['waypoints'] == b['waypoints'] == c['waypoints']
+        assert a['stats'] == c['stats']
+
+
+def test_pool_workers_are_spawned():
+    fleet_planner.plan_fleet(AREA, fleet(5, 8), 20, 50, optimize=True, max_workers=2)
+    assert fleet_planner._pool._mp_context.get_start_method() == 'spawn'
+
+
+@pytest.mark.parametrize('data', [
+    {'trackSpacing': 'wide'},
+    {'altitude': [50]},
+    {'drones': [{'id': 'drone-1', 'speed': 'fast'}]},
+    {'drones': []},
+])
+def test_invalid_fleet_missions_are_rejected(client, data):
+    request = {'area': AREA.tolist(), 'drones': fleet(5, 5), **data}
+    response = client.post('/api/fleet/mission', json=request)
+    assert response.status_code == 400
+    assert not response.get_json()['success']
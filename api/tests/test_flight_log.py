@@ -0,0 +1,128 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from services.flight_log import (
+    DETECTIONS_FILE, INDEX_STRIDE, INDEX_SUFFIX, RECORD_DTYPE, SEGMENT_SUFFIX, FlightLog, FlightLogWriter,
+    segment_name
+)
+from services.telemetry_store import TelemetryRing, telemetry_dict
+
+
+def samples(count, seed=0):
+    rng = random.Random(seed)
+    timestamp = 1700000000.0
+    for _ in range(count):
+        # Repeated timestamps happen when samples arrive faster than the clock ticks
+        timestamp += rng.choice((0.0, 0.1, 0.1, 0.25))
+        yield {
+            'latitude': 37.7749 + rng.uniform(-0.01, 0.01),
+            'longitude': -122.4194 + rng.uniform(-0.01, 0.01),
+            'altitude': rng.uniform(0, 120),
+            'battery': rng.uniform(20, 100),
+            'gnssSignal': rng.choice(('Poor', 'Good', 'Excellent')),
+            'satellites': rng.randint(0, 30)
+        }, timestamp
+
+
+def write_log(directory, rows, segment_records=700):
+    writer = FlightLogWriter(str(directory), segment_records=segment_records, sync_records=333)
+    for sample, timestamp in rows:
+        writer.append(sample, timestamp)
+    writer.close()
+    return writer
+
+
+@pytest.fixture
+def logged(tmp_path):
+    """A four-segment flight log and a ring holding the same samples"""
+    rows = list(samples(2500))
+    ring = TelemetryRing(capacity=len(rows))
+    for sample, timestamp in rows:
+        ring.append(sample, timestamp)
+    writer = write_log(tmp_path, rows)
+    return FlightLog(str(tmp_path)), ring, writer
+
+
+def test_records_round_trip(logged):
+    log, ring, writer = logged
+    assert len(log) == len(ring) == writer.records == 2500
+    assert [segment.count for segment in log.segments] == [700, 700, 700, 400]
+    np.testing.assert_array_equal(log.window(), ring.window().astype(RECORD_DTYPE))
+    assert telemetry_dict(log.window()[123]) == telemetry_dict(ring.window()[123])
+    assert log.start_time == ring.window()['time'][0] and log.end_time == ring.window()['time'][-1]
+
+
+def test_time_windows_match_the_ring(logged):
+    log, ring, _ = logged
+    rng = random.Random(1)
+    times = ring.window()['time']
+    for _ in range(200):
+        start, stop = sorted(rng.choice((float(rng.choice(times)), rng.uniform(times[0] - 5, times[-1] + 5)))
+                             for _ in range(2))
+        expected = ring.window(start, stop)
+        np.testing.assert_array_equal(log.window(start, stop), expected.astype(RECORD_DTYPE))
+        columns = log.columns(start, stop, ('altitude', 'satellites'))
+        np.testing.assert_array_equal(columns['time'], expected['time'])
+        np.testing.assert_array_equal(columns['altitude'], expected['altitude'])
+    assert len(log.window(times[-1] + 1)) == 0
+    assert len(log.window(None, times[0] - 1)) == 0
+
+
+def test_index_is_rebuilt_when_missing(logged, tmp_path):
+    log, _, _ = logged
+    expected = [segment.index.copy() for segment in log.segments]
+    log.close()
+    for segment in log.segments:
+        os.remove(segment.path + INDEX_SUFFIX)
+    reopened = FlightLog(str(tmp_path))
+    for index, segment in zip(expected, reopened.segments):
+        np.testing.assert_array_equal(segment.index, index)
+        assert len(segment.index) == -(-segment.count // INDEX_STRIDE)
+    np.testing.assert_array_equal(reopened.window(), log.window())
+
+
+def test_torn_tail_is_ignored(logged, tmp_path):
+    log, _, _ = logged
+    last = log.segments[-1].path + SEGMENT_SUFFIX
+    log.close()
+    with open(last, 'ab') as f:
+        f.write(b'\x01' * (RECORD_DTYPE.itemsize - 3))
+    with open(tmp_path / DETECTIONS_FILE, 'a') as f:
+        f.write('{"time": 17000')
+    reopened = FlightLog(str(tmp_path))
+    assert len(reopened) == 2500
+    np.testing.assert_array_equal(reopened.window(), log.window())
+    assert reopened.detections() == []
+
+
+def test_reopened_writer_starts_a_new_segment(tmp_path):
+    rows = list(samples(30))
+    write_log(tmp_path, rows[:10])
+    write_log(tmp_path, rows[10:])
+    log = FlightLog(str(tmp_path))
+    assert [segment.number for segment in log.segments] == [1, 2]
+    assert os.path.exists(tmp_path / (segment_name(2) + SEGMENT_SUFFIX))
+    np.testing.assert_array_equal(log.window()['time'], [timestamp for _, timestamp in rows])
+
+
+def test_late_samples_keep_time_sorted(tmp_path):
+    writer = FlightLogWriter(str(tmp_path))
+    for timestamp in (10.0, 12.0, 11.0, 13.0):
+        writer.append({'altitude': timestamp}, timestamp)
+    writer.close()
+    log = FlightLog(str(tmp_path))
+    np.testing.assert_array_equal(log.window()['time'], [10.0, 12.0, 12.0, 13.0])
+
+
+def test_detections_round_trip(tmp_path):
+    writer = FlightLogWriter(str(tmp_path))
+    for timestamp in (3.0, 1.0, 2.0):
+        writer.append_detection({'label': 'person', 'score': timestamp / 10}, timestamp)
+    writer.close()
+    writer.append_detection({'label': 'ignored'}, 4.0)
+    log = FlightLog(str(tmp_path))
+    assert [entry['time'] for entry in log.detections()] == [1.0, 2.0, 3.0]
+    assert log.detections(1.5, 2.5) == [{'time': 2.0, 'detection': {'label': 'person', 'score': 0.2}}]
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('count', [0, 1, 4, 5, 6, 13])
+def test_view_is_the_latest_samples_oldest_first(desktop, count):
+    buffer = desktop.GraphBuffer(capacity=5)
+    for i in range(count):
+        buffer.append(float(i), 10.0 * i)
+    times, values = buffer.view()
+    expected = np.arange(max(0, count - 5), count, dtype=np.float64)
+    np.testing.assert_array_equal(times, expected)
+    np.testing.assert_array_equal(values, 10.0 * expected)
+
+
+def test_view_does_not_copy(desktop):
+    buffer = desktop.GraphBuffer(capacity=4)
+    for i in range(7):
+        buffer.append(float(i), float(i))
+    times, values = buffer.view()
+    assert np.shares_memory(times, buffer.times)
+    assert np.shares_memory(values, buffer.values)
+
+
+class Curve:
+    def __init__(self):
+        self.drawn = []
+
+    def setData(self, times, values):
+        self.drawn.append((times.tolist(), values.tolist()))
+
+
+def graph_window(desktop):
+    """Just the state record_graph_sample and render_graphs use, without building the window"""
+    telemetry_tab = object()
+    return SimpleNamespace(
+        graph_buffers={field: desktop.GraphBuffer(capacity=8) for field in desktop.GRAPH_FIELDS},
+        graph_curves={field: Curve() for field in desktop.GRAPH_FIELDS},
+        graph_start_time=None,
+        graphs_dirty=False,
+        telemetry_tab=telemetry_tab,
+        tabs=SimpleNamespace(currentWidget=lambda: telemetry_tab)
+    )
+
+
+def test_samples_are_drawn_once_per_render_tick(desktop):
+    window = graph_window(desktop)
+    record, render = desktop.SARMissionControl.record_graph_sample, desktop.SARMissionControl.render_graphs
+    record(window, {'altitude': 50.0, 'speed': 5.0}, 100.0)
+    record(window, {'altitude': 52.0, 'speed': 6.0, 'battery': 90.0}, 100.5)
+    render(window)
+    render(window)
+    assert window.graph_curves['altitude'].drawn == [([0.0, 0.5], [50.0, 52.0])]
+    # A field missing from a sample is left out of its graph rather than plotted as a gap
+    assert window.graph_curves['battery'].drawn == [([0.5], [90.0])]
+
+
+def test_hidden_graphs_are_not_redrawn(desktop):
+    window = graph_window(desktop)
+    window.tabs = SimpleNamespace(currentWidget=lambda: None)
+    desktop.SARMissionControl.record_graph_sample(window, {'altitude': 50.0}, 100.0)
+    desktop.SARMissionControl.render_graphs(window)
+    assert window.graph_curves['altitude'].drawn == []
+    # Still pending, so the graphs catch up when the tab is shown
+    assert window.graphs_dirty
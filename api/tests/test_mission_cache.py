@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from services.mission_cache import MissionPlanCache, mission_key
+
+
+def plan(cache, name, built):
+    """Look up a plan for `name`, recording in `built` whenever it had to be built"""
+    return cache.get_or_create({'name': name}, lambda: built.append(name) or f'plan-{name}')
+
+
+def test_hits_and_misses():
+    cache = MissionPlanCache()
+    built = []
+    assert plan(cache, 'a', built) == 'plan-a'
+    assert plan(cache, 'a', built) == 'plan-a'
+    assert plan(cache, 'b', built) == 'plan-b'
+    assert built == ['a', 'b']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 2, 2)
+    assert stats['hitRate'] == pytest.approx(1 / 3)
+
+
+def test_least_recently_used_plan_is_evicted():
+    cache = MissionPlanCache(max_entries=2)
+    built = []
+    plan(cache, 'a', built)
+    plan(cache, 'b', built)
+    # Using a makes b the least recently used
+    plan(cache, 'a', built)
+    plan(cache, 'c', built)
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size'] == 2
+
+    plan(cache, 'a', built)
+    plan(cache, 'b', built)
+    assert built == ['a', 'b', 'c', 'b']
+
+
+@pytest.mark.parametrize('reason, version', [('geofence', 'geofenceVersion'), ('terrain', 'terrainVersion')])
+def test_invalidation_bumps_the_version_and_changes_keys(reason, version):
+    cache = MissionPlanCache()
+    built = []
+    plan(cache, 'a', built)
+    key = cache.key(name='a')
+    cache.invalidate(reason)
+    assert cache.stats()[version] == 1
+    assert cache.stats()['size'] == 0
+    assert cache.key(name='a') != key
+    plan(cache, 'a', built)
+    assert built == ['a', 'a']
+
+
+def test_plain_invalidation_keeps_the_versions():
+    cache = MissionPlanCache()
+    key = cache.key(name='a')
+    cache.invalidate()
+    assert cache.key(name='a') == key
+
+
+def test_keys_ignore_float_noise_and_number_types():
+    area = [[37.7749, -122.4194], [37.775, -122.419], [37.776, -122.4185]]
+    noisy = [[lat + 1e-10, lon - 1e-10] for lat, lon in area]
+    assert mission_key(area=area, altitude=50) == mission_key(area=noisy, altitude=50.0)
+    assert mission_key(area=np.array(area)) == mission_key(area=area)
+    assert mission_key(datum={'lat': 1.0, 'lng': 2.0}) == mission_key(datum={'lat': 1, 'lon': 2})
+    assert mission_key(area=area, altitude=50) != mission_key(area=area, altitude=60)
+    assert mission_key(optimize=True) != mission_key(optimize=1)
@@ -0,0 +1,180 @@
+import numpy as np
+import pytest
+
+import services.waypoint_simplify as waypoint_simplify
+from controllers.drone_controller import DroneController
+from services.geo import DEFAULT_HOME, LocalFrame, square_area
+from services.waypoint_array import CAPTURE_TRIGGER, WaypointArray
+from services.waypoint_simplify import simplification_mask
+
+STEP = 1e-4
+
+
+def lane_mission(lat_steps, lon_steps, altitude=50.0, speed=5.0, capture=0):
+    """Waypoints moving by the given lat/lon step counts from a fixed origin"""
+    lat = 47.0 + STEP * np.cumsum(lat_steps)
+    lon = 8.0 + STEP * np.cumsum(lon_steps)
+    return WaypointArray.from_columns(lat, lon, altitude, speed, capture=capture)
+
+
+def triggered_mission(rng, count, rate=0.1):
+    """A lane mission with photo triggers, which simplification always keeps, at random waypoints"""
+    capture = np.where(rng.random(count) < rate, CAPTURE_TRIGGER, 0)
+    return lane_mission(rng.integers(0, 2, count), rng.integers(0, 2, count), capture=capture)
+
+
+def uploaded_controller(waypoints):
+    controller = DroneController()
+    controller.connected = True
+    controller.waypoints = waypoints
+    assert controller.upload_mission()
+    return controller
+
+
+def replace_span(controller, start, stop, replacement):
+    """Splice `replacement` over planned waypoints [start, stop), as an incremental re-plan does"""
+    old = controller.waypoints
+    waypoints = WaypointArray.concatenate((old[:start], replacement, old[stop:]))
+    controller.track_change({'start': start, 'waypoints': replacement}, len(waypoints))
+    controller.waypoints = waypoints
+    return waypoints
+
+
+def assert_same_waypoints(actual, expected):
+    assert len(actual) == len(expected)
+    np.testing.assert_array_equal(actual.columns, expected.columns)
+    np.testing.assert_array_equal(actual.capture, expected.capture)
+
+
+def test_delta_keeps_boundary_heading_of_full_simplification(no_upload_delay):
+    # North for four legs to a corner, then east; the corner's outgoing leg heads east (90°)
+    controller = uploaded_controller(lane_mission([0, 1, 1, 1, 1, 0, 0, 0], [0, 0, 0, 0, 0, 1, 1, 1]))
+    # Move a waypoint in the middle of the north leg off the line, so the changed span ends at the corner
+    jog = WaypointArray.concatenate((controller.waypoints[2:3],))
+    jog.columns[1] += 2 * STEP
+    waypoints = replace_span(controller, 2, 3, jog)
+
+    assert controller.upload_mission_delta()
+
+    _, expected = simplification_mask(waypoints, frame=controller.upload_frame)
+    assert_same_waypoints(controller.uploaded_waypoints, expected)
+    corner = int(np.flatnonzero(controller.uploaded_waypoints.lat == waypoints.lat[4])[0])
+    assert controller.uploaded_waypoints.heading[corner] == pytest.approx(90.0)
+
+
+def test_delta_matches_full_simplification_after_random_edits(no_upload_delay):
+    rng = np.random.default_rng(7)
+    for _ in range(100):
+        count = int(rng.integers(5, 60))
+        controller = uploaded_controller(lane_mission(rng.integers(0, 2, count), rng.integers(0, 2, count)))
+        for _ in range(3):
+            start = int(rng.integers(0, len(controller.waypoints)))
+            stop = int(rng.integers(start, len(controller.waypoints) + 1))
+            inserted = int(rng.integers(0, 10))
+            replacement = lane_mission(rng.integers(0, 3, inserted), rng.integers(0, 3, inserted))
+            waypoints = replace_span(controller, start, stop, replacement)
+            if len(waypoints) == 0:
+                break
+
+            assert controller.upload_mission_delta()
+
+            _, expected = simplification_mask(waypoints, frame=controller.upload_frame)
+            assert_same_waypoints(controller.uploaded_waypoints, expected)
+
+
+def test_delta_report_covers_only_the_changed_span(no_upload_delay):
+    controller = uploaded_controller(lane_mission([0] + [1, 0] * 20, [0] + [0, 1] * 20))
+    before = controller.uploaded_waypoints
+    replace_span(controller, 20, 22, lane_mission([0, 3], [0, 3])[:2])
+
+    assert controller.upload_mission_delta()
+
+    report = controller.get_upload_report()
+    after = controller.uploaded_waypoints
+    start, deleted, inserted = report['deltaStart'], report['deltaDeleteCount'], report['deltaInsertCount']
+    assert 0 < inserted < len(after)
+    assert_same_waypoints(after[:start], before[:start])
+    assert_same_waypoints(after[start + inserted:], before[start + deleted:])
+
+
+def test_unchanged_plan_uploads_nothing(no_upload_delay):
+    controller = uploaded_controller(lane_mission([0, 1, 1, 0], [0, 0, 1, 1]))
+    uploaded = controller.uploaded_waypoints
+
+    assert controller.upload_mission_delta()
+
+    assert controller.get_upload_report()['deltaInsertCount'] == 0
+    assert controller.uploaded_waypoints is uploaded
+
+
+def test_delta_with_anchors_matches_full_simplification(no_upload_delay):
+    rng = np.random.default_rng(11)
+    for _ in range(100):
+        controller = uploaded_controller(triggered_mission(rng, int(rng.integers(5, 120))))
+        for _ in range(3):
+            start = int(rng.integers(0, len(controller.waypoints)))
+            stop = int(rng.integers(start, min(start + 10, len(controller.waypoints)) + 1))
+            waypoints = replace_span(controller, start, stop, triggered_mission(rng, int(rng.integers(0, 10)), 0.3))
+            if len(waypoints) == 0:
+                break
+
+            assert controller.upload_mission_delta()
+
+            _, expected = simplification_mask(waypoints, frame=controller.upload_frame)
+            assert_same_waypoints(controller.uploaded_waypoints, expected)
+            np.testing.assert_array_equal(
+                controller.uploaded_index,
+                np.flatnonzero(simplification_mask(waypoints, frame=controller.upload_frame)[0])
+            )
+
+
+def test_delta_only_resimplifies_between_the_anchors_around_the_change(no_upload_delay, monkeypatch):
+    # Photo triggers every 20 waypoints along a long mission
+    count = 4000
+    capture = np.where(np.arange(count) % 20 == 0, CAPTURE_TRIGGER, 0)
+    controller = uploaded_controller(lane_mission(np.ones(count), np.zeros(count), capture=capture))
+    simplified = []
+    douglas_peucker_mask = waypoint_simplify.douglas_peucker_mask
+    monkeypatch.setattr(waypoint_simplify, 'douglas_peucker_mask',
+                        lambda x, *args, **kwargs: simplified.append(len(x)) or douglas_peucker_mask(x, *args, **kwargs))
+
+    jog = WaypointArray.concatenate((controller.waypoints[2010:2012],))
+    jog.columns[1] += STEP
+    replace_span(controller, 2010, 2012, jog)
+    assert controller.upload_mission_delta()
+
+    assert simplified == [21]
+    report = controller.get_upload_report()
+    assert report['deltaInsertCount'] == 4
+
+
+def test_incremental_replan_then_delta_upload(no_upload_delay):
+    controller = DroneController()
+    controller.connected = True
+    area = square_area(DEFAULT_HOME, 200)
+    controller.create_mission('Search Grid', 200, 50, 5, 0.5, True, False, area=area)
+    assert controller.upload_mission()
+    uploaded = controller.uploaded_waypoints
+
+    # A no-fly hole appears in the middle of the area
+    frame = LocalFrame(*DEFAULT_HOME)
+    lat, lon = frame.to_geodetic(np.array([80.0, 120.0, 120.0, 80.0]), np.array([80.0, 80.0, 120.0, 120.0]))
+    mission = controller.create_mission('Search Grid', 200, 50, 5, 0.5, True, False, area=area,
+                                        holes=[np.column_stack((lat, lon))], incremental=True)
+    delta = mission['delta']
+    assert delta['incremental']
+    # Only the splice is sent, not the whole mission again
+    assert mission['waypoints'] == []
+    assert len(delta['waypoints']) == delta['insertCount'] < mission['waypointCount']
+
+    assert controller.upload_mission_delta()
+    _, expected = simplification_mask(controller.waypoints, frame=controller.upload_frame)
+    assert_same_waypoints(controller.uploaded_waypoints, expected)
+    report = controller.get_upload_report()
+    start, deleted, inserted = report['deltaStart'], report['deltaDeleteCount'], report['deltaInsertCount']
+    assert 0 < start and inserted < len(expected)
+    assert_same_waypoints(expected[:start], uploaded[:start])
+    assert_same_waypoints(expected[start + inserted:], uploaded[start + deleted:])
+
+    # Battery segmentation still runs on the re-planned mission
+    assert controller.segment_mission({})['sortieCount'] >= 1
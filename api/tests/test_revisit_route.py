@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+import pytest
+
+from services.geo import DEFAULT_HOME, LocalFrame
+from services.revisit_route import (
+    distance_matrix, improve_tour, nearest_neighbour, or_opt_pass, plan_revisit_route, tour_length, two_opt_pass
+)
+
+FRAME = LocalFrame(*DEFAULT_HOME)
+
+
+def random_points(seed, count, size=2000.0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-size / 2, size / 2, count), rng.uniform(-size / 2, size / 2, count)
+
+
+def targets(x, y):
+    lat, lon = FRAME.to_geodetic(x, y)
+    return np.column_stack((lat, lon)).tolist()
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('local_pass', [two_opt_pass, or_opt_pass], ids=['2-opt', 'or-opt'])
+def test_passes_never_lengthen_the_tour_and_keep_home_first(seed, local_pass):
+    x, y = random_points(seed, 40)
+    dist = distance_matrix(np.append(0.0, x), np.append(0.0, y))
+    # A random tour leaves plenty to improve
+    tour = np.append(0, np.random.default_rng(seed).permutation(np.arange(1, len(dist))))
+    length = tour_length(tour, dist)
+    deadline = time.perf_counter() + 60
+    for _ in range(20):
+        moves = local_pass(tour, dist, deadline)
+        assert tour[0] == 0
+        assert sorted(tour.tolist()) == list(range(len(dist)))
+        new_length = tour_length(tour, dist)
+        assert new_length <= length + 1e-9
+        if moves == 0:
+            assert new_length == length
+            break
+        assert new_length < length
+        length = new_length
+
+
+def test_two_opt_uncrosses_a_tour():
+    # Corners of a square visited in a crossing order
+    x = np.array([0.0, 100.0, 0.0, 100.0])
+    y = np.array([0.0, 0.0, 100.0, 100.0])
+    dist = distance_matrix(x, y)
+    tour = np.array([0, 1, 2, 3])
+    assert two_opt_pass(tour, dist, time.perf_counter() + 60) > 0
+    assert tour_length(tour, dist) == pytest.approx(400.0)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_route_starts_and_ends_at_home(seed):
+    x, y = random_points(seed, 30)
+    route = plan_revisit_route(targets(x, y), DEFAULT_HOME, time_budget=10.0)
+    report = route.to_dict()
+
+    assert (route.plan.lat[0], route.plan.lon[0]) == DEFAULT_HOME
+    assert (route.plan.lat[-1], route.plan.lon[-1]) == DEFAULT_HOME
+    assert sorted(report['visitOrder']) == list(range(30))
+    assert report['converged']
+    assert report['pathLength'] <= report['initialPathLength'] + 1e-9
+    assert report['improvement'] >= 0
+    # The route visits the targets in the order it reports
+    np.testing.assert_allclose(route.plan.x[1:-1], x[route.order])
+
+
+def test_improvement_is_no_worse_than_nearest_neighbour():
+    x, y = random_points(42, 60)
+    dist = distance_matrix(np.append(0.0, x), np.append(0.0, y))
+    greedy = nearest_neighbour(dist)
+    improved, converged = improve_tour(greedy, dist, time_budget=10.0)
+    assert converged
+    assert improved[0] == greedy[0] == 0
+    assert tour_length(improved, dist) <= tour_length(greedy, dist)
+    # improve_tour works on a copy
+    np.testing.assert_array_equal(greedy, nearest_neighbour(dist))
+
+
+def test_no_targets_is_rejected():
+    with pytest.raises(ValueError):
+        plan_revisit_route([], DEFAULT_HOME)
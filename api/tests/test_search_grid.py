@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from services.coverage_optimizer import optimize_coverage
+from services.geo import DEFAULT_HOME, square_area
+from services.incremental_plan import LanePlan
+from services.search_grid import PathPlan, SearchArea
+from services.waypoint_builder import WaypointBuilder
+
+AREA = square_area(DEFAULT_HOME, 200)
+FRAME = SearchArea(AREA).frame
+
+
+def ring(x, y):
+    """A lat/lon ring from local meters of the area's frame"""
+    lat, lon = FRAME.to_geodetic(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    return np.column_stack((lat, lon))
+
+
+CENTRAL = ring([-40, 40, 40, -40], [-40, -40, 40, 40])
+DIAMOND = ring([0, 45, 0, -45], [-45, 0, 45, 0])
+# An L-shaped hole, so the way round is not just the convex hull
+CONCAVE = ring([-60, 20, 20, -20, -20, -60], [-60, -60, -20, -20, 40, 40])
+TWO = [ring([-70, -30, -30, -70], [-30, -30, 30, 30]), ring([30, 70, 70, 30], [-30, -30, 30, 30])]
+
+
+def strictly_inside(x, y, hole_x, hole_y, margin=0.01):
+    """Points more than `margin` meters inside a ring"""
+    inside = np.zeros(len(x), dtype=bool)
+    distance = np.full(len(x), np.inf)
+    for i in range(len(hole_x)):
+        ax, ay = hole_x[i], hole_y[i]
+        bx, by = hole_x[(i + 1) % len(hole_x)], hole_y[(i + 1) % len(hole_x)]
+        straddles = (ay > y) != (by > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inside ^= straddles & (x < ax + (y - ay) / (by - ay) * (bx - ax))
+        t = np.clip(((x - ax) * (bx - ax) + (y - ay) * (by - ay)) / ((bx - ax) ** 2 + (by - ay) ** 2), 0, 1)
+        distance = np.minimum(distance, np.hypot(x - ax - t * (bx - ax), y - ay - t * (by - ay)))
+    return inside & (distance > margin)
+
+
+def legs_through_holes(x, y, search_area):
+    """Number of path legs that pass through the inside of any hole"""
+    t = np.linspace(0.0, 1.0, 201)
+    px = x[:-1, None] + t * np.diff(x)[:, None]
+    py = y[:-1, None] + t * np.diff(y)[:, None]
+    crossing = np.zeros(len(x) - 1, dtype=bool)
+    for start, stop in search_area.rings[1:]:
+        inside = strictly_inside(px.ravel(), py.ravel(), search_area.x[start:stop], search_area.y[start:stop])
+        crossing |= inside.reshape(px.shape).any(axis=1)
+    return int(np.count_nonzero(crossing))
+
+
+@pytest.mark.parametrize('holes', [[CENTRAL], [DIAMOND], [CONCAVE], TWO], ids=['square', 'diamond', 'concave', 'two'])
+@pytest.mark.parametrize('decomposition', ['lanes', 'cells'])
+@pytest.mark.parametrize('heading', [0.0, 30.0, 90.0, 135.0])
+def test_no_leg_crosses_a_hole(holes, decomposition, heading):
+    search_area = SearchArea(AREA, holes)
+    plan = search_area.sweep(10, heading, decomposition)
+    assert legs_through_holes(plan.x, plan.y, search_area) == 0
+
+    # Every segment is still flown along its lane, from its entry to its exit waypoint
+    assert np.all(plan.exit_index == plan.entry_index + 1)
+    assert np.all(plan.entry_index[1:] > plan.exit_index[:-1])
+    detours = len(plan) - 2 * len(plan.lane)
+    assert plan.turn_count == len(plan.lane) - 1 + detours
+
+
+def test_straight_lanes_without_holes_are_unchanged():
+    plan = SearchArea(AREA).sweep(10, 0.0)
+    assert len(plan) == 2 * len(plan.lane)
+    np.testing.assert_array_equal(plan.entry_index, np.arange(0, len(plan), 2))
+
+
+def test_without_routing_the_sweep_would_cross_the_hole():
+    search_area = SearchArea(AREA, [CENTRAL])
+    plan = search_area.sweep(10, 0.0, 'lanes')
+    # The detour corners are what keeps the legs out of the hole
+    keep = np.concatenate((plan.entry_index, plan.exit_index))
+    keep.sort()
+    assert len(keep) < len(plan)
+    assert legs_through_holes(plan.x[keep], plan.y[keep], search_area) > 0
+    straight = PathPlan(plan.lat[keep], plan.lon[keep], plan.x[keep], plan.y[keep])
+    assert search_area.legs_through_holes(straight) == legs_through_holes(straight.x, straight.y, search_area)
+    assert search_area.legs_through_holes(plan) == 0
+
+
+def test_optimizer_never_picks_a_plan_through_a_hole():
+    search_area = SearchArea(AREA, [CONCAVE])
+    result = optimize_coverage(search_area, 10, 5, angle_step=15)
+    assert legs_through_holes(result.plan.x, result.plan.y, search_area) == 0
+    assert result.to_dict()['turns'] == result.plan.turn_count
+
+
+def test_lane_plan_stats_count_the_detours():
+    search_area = SearchArea(AREA, [CENTRAL])
+    plan = search_area.sweep(10, 0.0)
+    lane_plan = LanePlan.from_sweep(search_area, plan, WaypointBuilder(50, 5))
+    stats = lane_plan.stats(5)
+    assert stats['turns'] == plan.turn_count
+    assert stats['pathLength'] == pytest.approx(plan.path_length())
+    assert stats['estimatedFlightTime'] == pytest.approx(plan.estimate_flight_time(5))
+
+
+def test_replan_routes_around_a_new_hole():
+    builder = WaypointBuilder(50, 5)
+    plan = SearchArea(AREA).sweep(10, 0.0)
+    lane_plan = LanePlan.from_sweep(SearchArea(AREA), plan, builder)
+    changed = SearchArea(AREA, [CENTRAL], frame=FRAME)
+    replanned, delta, report = lane_plan.replan(changed)
+    assert report['replacedSegments'] > 0
+
+    x, y = FRAME.to_local(replanned.waypoints.lat, replanned.waypoints.lon)
+    assert legs_through_holes(x, y, changed) == 0
+    # The same figures as planning the changed area from scratch
+    fresh = changed.sweep(10, 0.0)
+    stats = replanned.stats(5)
+    assert stats['turns'] == fresh.turn_count
+    assert stats['pathLength'] == pytest.approx(fresh.path_length())
+    assert len(replanned.waypoints) == len(fresh)
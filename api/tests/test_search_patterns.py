@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from services.geo import DEFAULT_HOME
+from services.search_patterns import (
+    creeping_line, creeping_line_template, expanding_square, expanding_square_template, generate_pattern,
+    sector_search, sector_template
+)
+
+
+def legs(plan):
+    """Length of every leg of a pattern, in meters"""
+    return np.hypot(np.diff(plan.x), np.diff(plan.y))
+
+
+def turns(plan):
+    """Signed change of course at every inner vertex, degrees, positive to the right"""
+    bearings = np.degrees(np.arctan2(np.diff(plan.x), np.diff(plan.y)))
+    return (np.diff(bearings) + 180.0) % 360.0 - 180.0
+
+
+def test_expanding_square_legs_grow_every_second_leg():
+    plan = expanding_square(DEFAULT_HOME, 10, 40)
+    np.testing.assert_allclose(legs(plan), 10 * np.array([1, 1, 2, 2, 3, 3, 4, 4]))
+    np.testing.assert_allclose(turns(plan), 90.0)
+    # Starts at the datum, first leg along the commence heading
+    assert (plan.x[0], plan.y[0]) == (0.0, 0.0)
+    assert plan.x[1] == pytest.approx(0.0, abs=1e-9) and plan.y[1] == pytest.approx(10.0)
+
+
+def test_sector_search_turns_120_degrees_and_returns_to_the_datum():
+    plan = sector_search(DEFAULT_HOME, 10, 200)
+    np.testing.assert_allclose(legs(plan), 100 * np.array([1, 1, 2, 1, 2, 1, 1]))
+    np.testing.assert_allclose(turns(plan), 120.0)
+    np.testing.assert_allclose((plan.x[-1], plan.y[-1]), (0.0, 0.0), atol=1e-9)
+    # Every corner lies on the circle of one radius around the datum
+    np.testing.assert_allclose(np.hypot(plan.x, plan.y)[1:-1], 100.0)
+
+
+def test_creeping_line_alternates_crossing_and_advancing_legs():
+    plan = creeping_line(DEFAULT_HOME, 10, 60)
+    lengths = legs(plan)
+    np.testing.assert_allclose(lengths[0::2], 60.0)
+    np.testing.assert_allclose(lengths[1::2], 10.0)
+    # Two left turns, then two right turns, and so on, centered on the datum
+    expected = np.tile([-90.0, -90.0, 90.0, 90.0], len(plan))[:len(plan) - 2]
+    np.testing.assert_allclose(turns(plan), expected)
+    np.testing.assert_allclose((plan.x.mean(), plan.y.mean()), (0.0, 0.0), atol=1e-9)
+
+
+@pytest.mark.parametrize('heading', [0.0, 45.0, 90.0, 200.0])
+def test_heading_rotates_the_pattern(heading):
+    north = generate_pattern('Expanding Square', DEFAULT_HOME, 10, 40)
+    rotated = generate_pattern('Expanding Square', DEFAULT_HOME, 10, 40, heading)
+    np.testing.assert_allclose(legs(rotated), legs(north))
+    first = np.degrees(np.arctan2(rotated.x[1], rotated.y[1])) % 360.0
+    assert first == pytest.approx(heading % 360.0)
+
+
+@pytest.mark.parametrize('pattern, template', [
+    ('Expanding Square', lambda: expanding_square_template(8)),
+    ('Sector Search', sector_template),
+    ('Creeping Line', lambda: creeping_line_template(4)),
+])
+def test_cached_templates_cannot_be_mutated(pattern, template):
+    cached = template()
+    assert template() is cached
+    before = cached.copy()
+    with pytest.raises(ValueError):
+        cached[0, 0] = 99.0
+
+    # Plans are built from copies, so editing one leaves the template and later plans intact
+    plan = generate_pattern(pattern, DEFAULT_HOME, 10, 40)
+    expected = legs(plan)
+    plan.x[:] = 0.0
+    plan.y[:] = 0.0
+    np.testing.assert_array_equal(template(), before)
+    np.testing.assert_allclose(legs(generate_pattern(pattern, DEFAULT_HOME, 10, 40)), expected)
+
+
+@pytest.mark.parametrize('spacing, extent', [(0, 100), (10, 0), (-1, 100)])
+def test_non_positive_sizes_are_rejected(spacing, extent):
+    with pytest.raises(ValueError):
+        generate_pattern('Creeping Line', DEFAULT_HOME, spacing, extent)
+
+
+def test_unknown_pattern_is_rejected():
+    with pytest.raises(ValueError):
+        generate_pattern('Spiral', DEFAULT_HOME, 10, 100)
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from services.geo import DEFAULT_HOME, LocalFrame
+from services.sortie_planner import BatteryModel, MissionProfile, Sortie, sortie_waypoints
+from services.waypoint_array import CAPTURE_PHOTO, WaypointArray
+
+FRAME = LocalFrame(*DEFAULT_HOME)
+
+
+def mission(x, y, altitude=0.0):
+    """Waypoints at local meters east/north of home"""
+    lat, lon = FRAME.to_geodetic(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    return WaypointArray.from_columns(lat, lon, altitude, 5.0, capture=CAPTURE_PHOTO)
+
+
+# One watt-hour per meter and no reserve, so energy reads as meters flown
+METERS = {'capacity': 1000.0, 'per_meter': 1.0, 'per_turn': 0.0, 'reserve': 0.0}
+
+
+@pytest.mark.parametrize('battery', [
+    {'capacity': 0}, {'capacity': -5}, {'per_meter': 0}, {'per_meter': -0.1}, {'per_meter': float('nan')},
+    {'per_turn': -1}, {'reserve': -0.1}, {'reserve': 1.0}, {'reserve': 1.5},
+])
+def test_invalid_battery_models_are_rejected(battery):
+    with pytest.raises(ValueError):
+        BatteryModel(**battery)
+
+
+def test_invalid_battery_is_a_bad_request(server, client):
+    session = server.sessions.get('sortie-production')
+    session.mock_mode = False
+    session.drone_controller.set_mock_mode(False)
+    try:
+        response = client.post('/api/drone/mission/sorties',
+                               json={'droneId': 'sortie-production', 'battery': {'perMeter': 0}})
+        assert response.status_code == 400
+        assert 'perMeter' in response.get_json()['message']
+    finally:
+        server.sessions.sessions.pop('sortie-production', None)
+
+
+def test_sorties_cover_the_path_within_the_battery():
+    # Ten 200 m lanes next to home, about 2.2 km in all, on a battery good for 1 km
+    y = np.repeat(np.arange(0.0, 200.0, 20.0), 2)
+    x = np.tile([0.0, 200.0, 200.0, 0.0], 5)
+    waypoints = mission(x, y)
+    battery = BatteryModel(**METERS)
+    sorties = MissionProfile(waypoints, DEFAULT_HOME).segment(battery, speed=5)
+
+    assert len(sorties) > 2
+    assert sorties[0].start == 0.0
+    assert sorties[-1].stop == len(waypoints) - 1
+    for previous, sortie in zip(sorties, sorties[1:]):
+        # The next sortie resumes where the previous one turned home, at a fractional position
+        assert sortie.start == previous.stop
+    for sortie in sorties:
+        assert sortie.energy <= battery.usable + 1e-6
+        assert sortie.energy == pytest.approx(sortie.outbound + sortie.survey + sortie.inbound)
+    # Every sortie but the last flies until the battery only just gets it home
+    for sortie in sorties[:-1]:
+        assert sortie.energy == pytest.approx(battery.usable)
+
+
+def test_a_sortie_turns_home_part_way_along_a_leg():
+    # Out 300 m north then east along a 400 m leg; 1000 m of range runs out on that leg
+    waypoints = mission([0.0, 0.0, 400.0], [0.0, 300.0, 300.0])
+    battery = BatteryModel(**METERS)
+    sortie = MissionProfile(waypoints, DEFAULT_HOME).segment(battery, speed=5)[0]
+    assert 1.0 < sortie.stop < 2.0
+    # The turn point t along the leg satisfies 300 + 400 t + |(400 t, 300)| = 1000
+    t = sortie.stop - 1.0
+    assert 300 + 400 * t + np.hypot(400 * t, 300) == pytest.approx(1000.0)
+    assert sortie.energy == pytest.approx(battery.usable)
+
+
+def test_unreachable_path_is_rejected():
+    battery = BatteryModel(**{**METERS, 'capacity': 100.0})
+    with pytest.raises(ValueError):
+        MissionProfile(mission([0.0, 0.0], [200.0, 300.0]), DEFAULT_HOME).segment(battery, speed=5)
+
+
+def test_sortie_waypoints_start_and_stop_at_fractional_positions():
+    waypoints = mission([0.0, 0.0, 400.0, 400.0], [0.0, 300.0, 300.0, 0.0], altitude=50.0)
+    sortie = Sortie(0.5, 2.25, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    flown = sortie_waypoints(waypoints, sortie, DEFAULT_HOME)
+    x, y = FRAME.to_local(flown.lat, flown.lon)
+
+    # Halfway up the first leg, waypoints 1 and 2, a quarter down the third leg, then home
+    np.testing.assert_allclose(x, [0.0, 0.0, 400.0, 400.0, 0.0], atol=1e-6)
+    np.testing.assert_allclose(y, [150.0, 300.0, 300.0, 225.0, 0.0], atol=1e-6)
+    # No capture on the way home, which keeps the altitude of the last survey point
+    np.testing.assert_array_equal(flown.capture, [CAPTURE_PHOTO] * 4 + [0])
+    assert flown.alt[-1] == 50.0
+
+
+def test_sortie_waypoints_of_a_whole_path():
+    waypoints = mission([0.0, 0.0, 0.0, 0.0], [0.0, 100.0, 200.0, 300.0])
+    flown = sortie_waypoints(waypoints, Sortie(0.0, 3.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0), DEFAULT_HOME)
+    assert len(flown) == len(waypoints) + 1
+    np.testing.assert_array_equal(flown.columns[:, :-1], waypoints.columns)
+    assert (flown.lat[-1], flown.lon[-1]) == DEFAULT_HOME
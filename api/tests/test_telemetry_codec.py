@@ -0,0 +1,167 @@
+import random
+
+import pytest
+
+from services.telemetry_codec import (
+    FIELDS, FLAG_KEYFRAME, HEADER, TelemetryDecoder, TelemetryEncoder, encode_frame, stream_frame
+)
+from services.telemetry_store import GNSS_LEVELS
+from services.telemetry_stream import TelemetryBroadcaster, binary_events
+
+
+def sample(rng, t):
+    return {
+        'latitude': 37.7749 + rng.uniform(-0.01, 0.01),
+        'longitude': -122.4194 + rng.uniform(-0.01, 0.01),
+        'altitude': rng.uniform(0, 120),
+        'speed': rng.uniform(0, 15),
+        'battery': rng.uniform(20, 100),
+        'heading': rng.uniform(0, 360),
+        'roll': rng.uniform(-30, 30),
+        'pitch': rng.uniform(-30, 30),
+        'yaw': rng.uniform(-180, 180),
+        'gnssSignal': rng.choice(GNSS_LEVELS),
+        'satellites': rng.randint(0, 30),
+        'temperature': rng.uniform(-10, 45),
+        'distance': rng.uniform(0, 5000),
+        'flightTime': f"00:{int(t) // 60 % 60:02d}:{int(t) % 60:02d}",
+        'connected': rng.random() < 0.8
+    }
+
+
+def assert_round_trip(original, timestamp, decoded):
+    decoded_timestamp, telemetry = decoded
+    assert decoded_timestamp == pytest.approx(timestamp, abs=0.5e-3)
+    assert set(telemetry) == set(original)
+    for key, scale in FIELDS[1:]:
+        if isinstance(original[key], (str, int)):
+            assert telemetry[key] == original[key]
+        else:
+            assert telemetry[key] == pytest.approx(original[key], abs=0.5 / scale)
+    assert telemetry['connected'] is original['connected']
+
+
+def test_stream_round_trip():
+    rng = random.Random(3)
+    encoder = TelemetryEncoder(keyframe_interval=10)
+    decoder = TelemetryDecoder()
+    timestamp = 1700000000.0
+    telemetry = sample(rng, 0)
+    for sequence in range(200):
+        timestamp += rng.uniform(0.05, 0.5)
+        # Most fields hold still between samples, as they do in flight
+        changes = sample(rng, sequence)
+        for key in rng.sample(sorted(changes), rng.randint(0, 5)):
+            telemetry[key] = changes[key]
+        frame = encoder.encode(sequence, telemetry, timestamp)
+        decoded_sequence, drone_id, decoded_timestamp, decoded = decoder.decode(frame)
+        assert (decoded_sequence, drone_id) == (sequence, '')
+        assert_round_trip(telemetry, timestamp, (decoded_timestamp, decoded))
+        assert bool(HEADER.unpack_from(frame)[2] & FLAG_KEYFRAME) == (sequence % 11 == 0)
+
+
+def test_delta_frames_carry_only_changes():
+    encoder = TelemetryEncoder()
+    telemetry = sample(random.Random(1), 0)
+    keyframe = encoder.encode(0, telemetry, 10.0)
+    telemetry['connected'] = not telemetry['connected']
+    delta = encoder.encode(1, telemetry, 10.0)
+    assert HEADER.unpack_from(delta)[4] == 0
+    assert len(delta) == HEADER.size + 1 < len(keyframe)
+
+    decoder = TelemetryDecoder()
+    decoder.decode(keyframe)
+    assert decoder.decode(delta)[3]['connected'] is telemetry['connected']
+
+
+def test_connected_is_optional():
+    telemetry = sample(random.Random(2), 0)
+    del telemetry['connected']
+    _, drone_id, _, decoded = TelemetryDecoder().decode(encode_frame(7, telemetry, 5.0, 'drone-7'))
+    assert drone_id == 'drone-7'
+    assert 'connected' not in decoded
+
+
+def test_delta_before_keyframe_is_rejected():
+    encoder = TelemetryEncoder()
+    telemetry = sample(random.Random(4), 0)
+    encoder.encode(0, telemetry, 1.0)
+    with pytest.raises(ValueError):
+        TelemetryDecoder().decode(encoder.encode(1, telemetry, 2.0))
+
+
+def test_feed_splits_stream_chunks():
+    rng = random.Random(5)
+    encoder = TelemetryEncoder()
+    samples = [(sample(rng, i), 100.0 + i) for i in range(20)]
+    stream = b''.join(
+        stream_frame(encoder.encode(i, telemetry, timestamp)) + (stream_frame(b'') if i % 3 == 0 else b'')
+        for i, (telemetry, timestamp) in enumerate(samples)
+    )
+    decoder = TelemetryDecoder()
+    frames = []
+    offset = 0
+    while offset < len(stream):
+        step = rng.randint(1, 40)
+        frames.extend(decoder.feed(stream[offset:offset + step]))
+        offset += step
+    assert decoder.pending == b''
+    assert [frame[0] for frame in frames] == list(range(20))
+    for (telemetry, timestamp), frame in zip(samples, frames):
+        assert_round_trip(telemetry, timestamp, frame[2:])
+
+
+def test_drones_sharing_a_stream_keep_their_own_deltas():
+    rng = random.Random(6)
+    drones = ['drone-1', 'drone-2', 'ärzte-3']
+    encoder = TelemetryEncoder(keyframe_interval=7)
+    decoder = TelemetryDecoder()
+    latest = {drone_id: sample(rng, 0) for drone_id in drones}
+    for sequence in range(150):
+        drone_id = rng.choice(drones)
+        telemetry = latest[drone_id]
+        for key, value in sample(rng, sequence).items():
+            if rng.random() < 0.3:
+                telemetry[key] = value
+        timestamp = 1000.0 + sequence * 0.1
+        _, decoded_drone, decoded_timestamp, decoded = decoder.decode(
+            encoder.encode(sequence, telemetry, timestamp, drone_id))
+        assert decoded_drone == drone_id
+        assert_round_trip(telemetry, timestamp, (decoded_timestamp, decoded))
+
+
+def test_each_drone_starts_with_a_keyframe():
+    encoder = TelemetryEncoder()
+    telemetry = sample(random.Random(7), 0)
+    first = encoder.encode(0, telemetry, 1.0, 'drone-1')
+    assert HEADER.unpack_from(encoder.encode(1, telemetry, 1.0, 'drone-2'))[2] & FLAG_KEYFRAME
+    delta = encoder.encode(2, telemetry, 2.0, 'drone-2')
+    assert not HEADER.unpack_from(delta)[2] & FLAG_KEYFRAME
+
+    # A decoder that has seen only drone-1 never applies drone-2's deltas to drone-1's values
+    decoder = TelemetryDecoder()
+    decoder.decode(first)
+    with pytest.raises(ValueError):
+        decoder.decode(delta)
+
+
+def test_binary_stream_of_several_drones():
+    broadcaster = TelemetryBroadcaster(queue_size=100)
+    subscription = broadcaster.subscribe()
+    rng = random.Random(8)
+    published = []
+    for sequence in range(40):
+        drone_id = rng.choice(('drone-1', 'drone-2'))
+        telemetry = sample(rng, sequence)
+        broadcaster.publish(drone_id, telemetry, 2000.0 + sequence)
+        published.append((drone_id, telemetry, 2000.0 + sequence))
+
+    events = binary_events(broadcaster, subscription, heartbeat=0.01)
+    decoder = TelemetryDecoder()
+    frames = []
+    while len(frames) < len(published):
+        frames.extend(decoder.feed(next(events)))
+    events.close()
+    for (drone_id, telemetry, timestamp), frame in zip(published, frames):
+        assert frame[1] == drone_id
+        assert_round_trip(telemetry, timestamp, frame[2:])
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from services.telemetry_ingest import TelemetryIngest, normalize_frame
+from services.telemetry_stream import TelemetryBroadcaster
+
+
+class RecordingStore:
+    """Stands in for the TelemetryStore, keeping every appended sample per drone"""
+
+    def __init__(self, fail_for=()):
+        self.samples = {}
+        self.fail_for = set(fail_for)
+        self.lock = threading.Lock()
+
+    def append(self, drone_id, telemetry, timestamp):
+        if drone_id in self.fail_for:
+            raise RuntimeError("store unavailable")
+        with self.lock:
+            self.samples.setdefault(drone_id, []).append((timestamp, telemetry))
+
+
+def frame(drone_id, altitude, timestamp):
+    return {'droneId': drone_id, 'timestamp': timestamp, 'telemetry': {'altitude': altitude}}
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def ingest():
+    pipeline = TelemetryIngest(RecordingStore(), TelemetryBroadcaster(queue_size=1000))
+    yield pipeline
+    pipeline.stop()
+
+
+def test_submitted_frames_are_stored_and_published(ingest):
+    subscription = ingest.broadcaster.subscribe(drone_id='drone-2')
+    frames = [frame(f'drone-{i % 2 + 1}', float(i), 1000.0 + i) for i in range(20)]
+    assert ingest.submit(frames) == (20, 0)
+    wait_for(lambda: ingest.stats()['stored'] == 20)
+
+    # Each drone's samples arrive in order
+    assert [t for t, _ in ingest.store.samples['drone-1']] == [1000.0 + i for i in range(0, 20, 2)]
+    assert [t for t, _ in ingest.store.samples['drone-2']] == [1000.0 + i for i in range(1, 20, 2)]
+    published = [subscription.get(1).telemetry['altitude'] for _ in range(10)]
+    assert published == [float(i) for i in range(1, 20, 2)]
+    stats = ingest.stats()
+    assert stats['pending'] == 0
+    assert stats['drones']['drone-1']['stored'] == stats['drones']['drone-2']['stored'] == 10
+
+
+def test_malformed_frames_are_counted_and_skipped(ingest):
+    frames = [frame('drone-1', 1.0, 1.0), {'droneId': '../x', 'telemetry': {}}, {'droneId': 'drone-1'},
+              frame('drone-1', 2.0, 'yesterday'), 'not a frame']
+    assert ingest.submit(frames) == (1, 4)
+    wait_for(lambda: ingest.stats()['stored'] == 1)
+    assert ingest.stats()['malformed'] == 4
+
+
+def test_overload_refuses_new_frames():
+    pipeline = TelemetryIngest(RecordingStore(), max_pending=3)
+    # Queued frames only drain on the loop; count them pending without running it
+    pipeline.pending = 3
+    try:
+        assert pipeline.submit([frame('drone-1', 1.0, 1.0)]) == (0, 0)
+        assert pipeline.stats()['rejected'] == 1
+    finally:
+        pipeline.pending = 0
+        pipeline.stop()
+
+
+def test_a_drone_that_outpaces_the_store_loses_its_oldest_frames():
+    pipeline = TelemetryIngest(RecordingStore(), queue_size=4)
+    pipeline.loop = asyncio.new_event_loop()
+    try:
+        # Queued while the loop is not running, as when the consumer falls behind
+        for i in range(10):
+            pipeline._enqueue('drone-1', {'altitude': float(i)}, 1000.0 + i)
+        assert pipeline.pending == 4
+        assert pipeline.queues['drone-1'].dropped == 6
+
+        pipeline.loop.run_until_complete(asyncio.sleep(0.01))
+        assert [t for t, _ in pipeline.store.samples['drone-1']] == [1006.0, 1007.0, 1008.0, 1009.0]
+        assert pipeline.pending == 0
+    finally:
+        for queue in pipeline.queues.values():
+            queue.task.cancel()
+        pipeline.loop.run_until_complete(asyncio.sleep(0))
+        pipeline.loop.close()
+
+
+def test_store_errors_do_not_stop_other_drones(ingest):
+    ingest.store.fail_for.add('drone-1')
+    ingest.submit([frame('drone-1', 1.0, 1.0), frame('drone-2', 2.0, 2.0)])
+    wait_for(lambda: ingest.stats()['drones'].get('drone-1', {}).get('errors') == 1)
+    wait_for(lambda: ingest.stats()['stored'] == 1)
+    assert list(ingest.store.samples) == ['drone-2']
+
+
+def test_tcp_links_send_one_frame_per_line(ingest):
+    host, port = ingest.listen('127.0.0.1', 0)
+    lines = [json.dumps(frame('link-1', float(i), 500.0 + i)) for i in range(5)]
+    with socket.create_connection((host, port)) as link:
+        link.sendall(('\n'.join(lines[:3]) + '\n\n{broken\n' + '\n'.join(lines[3:]) + '\n').encode())
+        wait_for(lambda: ingest.stats()['stored'] == 5)
+        assert ingest.stats()['connections'] == 1
+    assert [t for t, _ in ingest.store.samples['link-1']] == [500.0 + i for i in range(5)]
+    assert ingest.stats()['malformed'] == 1
+    wait_for(lambda: ingest.stats()['connections'] == 0)
+
+
+def test_normalize_frame_defaults_the_timestamp():
+    drone_id, telemetry, timestamp = normalize_frame({'droneId': 'drone-1', 'telemetry': {'altitude': 1}}, 42.0)
+    assert (drone_id, telemetry, timestamp) == ('drone-1', {'altitude': 1}, 42.0)
+    assert normalize_frame(frame('drone-1', 1.0, '2024-01-01T00:00:00Z'))[2] == pytest.approx(1704067200.0)
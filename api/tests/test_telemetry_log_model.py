@@ -0,0 +1,66 @@
+import pytest
+
+
+@pytest.fixture
+def model(desktop):
+    return desktop.TelemetryLogModel(max_lines=5)
+
+
+def shown(model):
+    return [model.data(model.index(row)) for row in range(model.rowCount())]
+
+
+def test_lines_are_batched_until_the_flush(model):
+    model.append('a')
+    model.append('b')
+    assert model.rowCount() == 0
+    assert model.flush_timer.isActive()
+    model.flush()
+    assert shown(model) == ['b', 'a']
+
+
+def test_oldest_lines_are_dropped_past_the_bound(model):
+    for batch in (['1', '2', '3'], ['4', '5', '6', '7']):
+        for line in batch:
+            model.append(line)
+        model.flush()
+    assert shown(model) == ['7', '6', '5', '4', '3']
+
+
+def test_a_batch_larger_than_the_bound_keeps_its_newest_lines(model):
+    for line in range(12):
+        model.append(str(line))
+    model.flush()
+    assert shown(model) == ['11', '10', '9', '8', '7']
+
+
+def test_row_signals_cover_the_changed_rows(model):
+    for line in 'abcd':
+        model.append(line)
+    model.flush()
+    removed, inserted = [], []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    for line in 'efg':
+        model.append(line)
+    model.flush()
+    # Four lines and three more overflow the five-line bound by two, taken from the old end
+    assert removed == [(2, 3)]
+    assert inserted == [(0, 2)]
+
+
+def test_flush_without_lines_is_a_no_op(model):
+    inserted = []
+    model.rowsInserted.connect(lambda *args: inserted.append(args))
+    model.flush()
+    assert inserted == []
+
+
+def test_clear_drops_queued_lines(model):
+    model.append('a')
+    model.flush()
+    model.append('b')
+    model.clear()
+    model.flush()
+    assert model.rowCount() == 0
+    assert model.data(model.index(0)) is None
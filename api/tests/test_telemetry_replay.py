@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+from services.flight_log import FlightLog, FlightLogWriter
+from services.telemetry_replay import TelemetryReplay, parse_speed
+
+START = 1700000000.0
+SAMPLES = 50
+STEP = 0.1
+
+
+@pytest.fixture
+def log(tmp_path):
+    """Five seconds of flight at 10 Hz over several segments, with two detections"""
+    writer = FlightLogWriter(str(tmp_path), segment_records=16, sync_records=8)
+    for i in range(SAMPLES):
+        writer.append({'altitude': float(i), 'battery': 100.0 - i}, START + i * STEP)
+    writer.append_detection({'type': 'person', 'n': 1}, START + 1.05)
+    writer.append_detection({'type': 'vehicle', 'n': 2}, START + 3.0)
+    writer.close()
+    return FlightLog(str(tmp_path))
+
+
+class Recorder:
+    """Sink that records what the replay emits, in order, and can act on the n-th sample"""
+
+    def __init__(self, on_sample=None):
+        self.events = []
+        self.on_sample = on_sample
+        self.done = threading.Event()
+
+    def sink(self, telemetry, timestamp):
+        self.events.append(('sample', telemetry['recordedTime']))
+        if self.on_sample is not None:
+            self.on_sample(len(self.samples()))
+
+    def detection(self, detection):
+        self.events.append(('detection', detection['n']))
+
+    def samples(self):
+        return [value for kind, value in self.events if kind == 'sample']
+
+
+def test_plays_every_sample_with_detections_in_place(log):
+    recorder = Recorder()
+    replay = TelemetryReplay(log, recorder.sink, recorder.detection, speed=None)
+    replay.start()
+    replay.join(10)
+
+    assert recorder.samples() == pytest.approx([START + i * STEP for i in range(SAMPLES)])
+    # Each detection follows the last sample recorded before it
+    assert recorder.events.index(('detection', 1)) == 11
+    assert recorder.events[recorder.events.index(('detection', 2)) - 1] == ('sample', pytest.approx(START + 3.0))
+    status = replay.status()
+    assert status['finished'] and not status['running']
+    assert status['emitted'] == SAMPLES
+
+
+def test_seek_continues_from_the_position(log):
+    recorder = Recorder()
+    replay = TelemetryReplay(log, recorder.sink, recorder.detection, speed=None)
+    replay.seek(START + 2.95)
+    replay.start()
+    replay.join(10)
+    assert recorder.samples()[0] == pytest.approx(START + 3.0)
+    assert len(recorder.samples()) == SAMPLES - 30
+    # Only the detection after the seek position is replayed
+    assert ('detection', 1) not in recorder.events and ('detection', 2) in recorder.events
+
+
+def test_seek_is_clamped_to_the_flight(log):
+    replay = TelemetryReplay(log, lambda telemetry, timestamp: None, speed=None)
+    replay.seek(START - 100)
+    assert replay.status()['offset'] == 0.0
+    replay.seek(START + 100)
+    assert replay.status()['position'] == pytest.approx(START + (SAMPLES - 1) * STEP)
+
+
+def test_pause_holds_playback_until_resumed(log):
+    replay = None
+
+    def pause_at_five(count):
+        if count == 5:
+            replay.pause()
+
+    recorder = Recorder(pause_at_five)
+    replay = TelemetryReplay(log, recorder.sink, speed=50.0)
+    replay.start()
+    deadline = time.monotonic() + 5
+    while not replay.status()['paused'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    assert len(recorder.samples()) == 5
+    assert replay.status()['running']
+
+    replay.set_speed(None)
+    replay.resume()
+    replay.join(10)
+    assert len(recorder.samples()) == SAMPLES
+    assert replay.status()['speed'] == 'max'
+
+
+def test_loop_restarts_from_the_beginning(log):
+    replay = None
+
+    def stop_in_third_pass(count):
+        if count == 2 * SAMPLES + 5:
+            replay.stop()
+
+    recorder = Recorder(stop_in_third_pass)
+    replay = TelemetryReplay(log, recorder.sink, recorder.detection, speed=None, loop=True)
+    replay.start()
+    replay.join(10)
+
+    samples = recorder.samples()
+    assert len(samples) == 2 * SAMPLES + 5
+    assert samples[SAMPLES] == samples[2 * SAMPLES] == pytest.approx(START)
+    assert replay.status()['loops'] == 2
+    assert not replay.status()['finished']
+    # Detections come round again with every pass; the third stopped before the first of them
+    assert recorder.events.count(('detection', 1)) == 2
+
+
+def test_empty_log_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        TelemetryReplay(FlightLog(str(tmp_path)), lambda telemetry, timestamp: None)
+
+
+@pytest.mark.parametrize('value, speed', [('max', None), ('2', 2.0), (0.5, 0.5)])
+def test_parse_speed(value, speed):
+    assert parse_speed(value) == speed
+
+
+@pytest.mark.parametrize('value', ['0', -1, 'fast', 'nan'])
+def test_invalid_speeds_are_rejected(value):
+    with pytest.raises(ValueError):
+        parse_speed(value)
@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.telemetry_store import TelemetryRing, telemetry_dict
+
+
+def fill(ring, count, seed=0):
+    """Append `count` samples and return their (time, altitude) pairs"""
+    rng = random.Random(seed)
+    timestamp = 1000.0
+    appended = []
+    for _ in range(count):
+        timestamp += rng.choice((0.0, 0.5, 1.0))
+        altitude = rng.uniform(0, 120)
+        ring.append({'altitude': altitude, 'gnssSignal': 'Good'}, timestamp)
+        appended.append((timestamp, np.float32(altitude)))
+    return appended
+
+
+@pytest.mark.parametrize('count', [0, 1, 64, 65, 200])
+def test_windows_match_a_scan_of_the_kept_samples(count):
+    ring = TelemetryRing(capacity=64)
+    kept = fill(ring, count, seed=count)[-64:]
+    assert len(ring) == len(kept)
+    rng = random.Random(count)
+    for _ in range(100):
+        start, stop = sorted(rng.uniform(995, 1000 + count + 5) for _ in range(2))
+        expected = [(t, a) for t, a in kept if start <= t <= stop]
+        window = ring.window(start, stop)
+        assert list(zip(window['time'], window['altitude'])) == expected
+        columns = ring.columns(start, stop, ('altitude',))
+        assert list(zip(columns['time'], columns['altitude'])) == expected
+    assert [t for t, _ in kept] == ring.window()['time'].tolist()
+
+
+def test_late_samples_are_filed_at_the_latest_time():
+    ring = TelemetryRing(capacity=4)
+    for timestamp in (10.0, 12.0, 11.0):
+        ring.append({'altitude': timestamp}, timestamp)
+    assert ring.window()['time'].tolist() == [10.0, 12.0, 12.0]
+    assert ring.window()['altitude'].tolist() == [10.0, 12.0, 11.0]
+
+
+def test_latest():
+    ring = TelemetryRing(capacity=3)
+    assert ring.latest() is None
+    fill(ring, 7)
+    latest = ring.latest()
+    assert latest['time'][0] == ring.window()['time'][-1]
+    assert telemetry_dict(latest[0])['gnssSignal'] == 'Good'
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        TelemetryRing(capacity=0)
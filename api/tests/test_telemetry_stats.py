@@ -0,0 +1,119 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from services.telemetry_stats import RollingWindow, TelemetryStats, TelemetryStatsRegistry, window_key
+
+
+def brute_force(samples, t, window):
+    """Mean, min, max and least-squares slope of the samples in [t - window, t]"""
+    kept = [(s, v) for s, v in samples if s >= t - window]
+    times = np.array([s for s, _ in kept])
+    values = np.array([v for _, v in kept])
+    slope = np.polyfit(times - times[0], values, 1)[0] if np.ptp(times) > 0 else None
+    return len(kept), values.mean(), values.min(), values.max(), slope
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_window_matches_a_rescan_over_a_long_flight(seed):
+    rng = random.Random(seed)
+    window = RollingWindow(10.0)
+    samples = []
+    t = 1.7e9
+    for i in range(5000):
+        # Irregular spacing, with repeated timestamps and gaps longer than the window
+        t += rng.choice((0.0, 0.05, 0.1, 0.2, 0.5, 12.0 if i % 997 == 0 else 0.1))
+        value = 100.0 + 0.5 * math.sin(i / 50.0) + rng.uniform(-1, 1)
+        window.add(t, value)
+        samples.append((t, value))
+        if i % 37 == 0:
+            count, mean, minimum, maximum, slope = brute_force(samples, t, 10.0)
+            assert len(window) == count
+            assert window.mean() == pytest.approx(mean, rel=1e-12)
+            assert (window.minimum(), window.maximum()) == (minimum, maximum)
+            if slope is None:
+                assert window.slope() is None
+            else:
+                assert window.slope() == pytest.approx(slope, rel=1e-6, abs=1e-9)
+
+
+def test_samples_exactly_one_window_old_are_kept():
+    window = RollingWindow(5.0)
+    for t in (0.0, 1.0, 5.0):
+        window.add(t, t)
+    assert len(window) == 3
+    window.add(5.5, 5.5)
+    assert len(window) == 3
+    assert window.minimum() == 1.0
+
+
+def test_slope_needs_time_to_pass():
+    window = RollingWindow(5.0)
+    assert window.snapshot() == {'count': 0, 'mean': None, 'min': None, 'max': None, 'slope': None}
+    window.add(1.0, 3.0)
+    window.add(1.0, 5.0)
+    assert window.slope() is None
+    window.add(2.0, 7.0)
+    assert window.slope() == pytest.approx(3.0)
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        RollingWindow(0)
+
+
+def test_trends_of_a_steady_climb_and_drain():
+    stats = TelemetryStats()
+    t0 = 1.7e9
+    for i in range(121):
+        # 2 m/s climb, 8 m/s ground speed, 1.5 %/min battery drain, one sample per second
+        snapshot = stats.update({'altitude': 2.0 * i, 'speed': 8.0, 'battery': 90.0 - 0.025 * i,
+                                 'gnssSignal': 'Good'}, t0 + i)
+    assert snapshot['climbRate'] == pytest.approx(2.0)
+    assert snapshot['groundSpeedAvg'] == pytest.approx(8.0)
+    assert snapshot['batteryDrainRate'] == pytest.approx(1.5)
+    # 87 % left, 25 % reserve, 0.025 %/s
+    assert snapshot['timeToReserve'] == pytest.approx((87.0 - 25.0) / 0.025)
+    # The 10 s climb window only holds its last 11 samples
+    assert snapshot['fields']['altitude']['windows'][window_key(10.0)]['count'] == 11
+    assert snapshot['samples'] == 121
+
+
+def test_battery_below_reserve_has_no_time_left():
+    stats = TelemetryStats()
+    stats.update({'battery': 26.0}, 0.0)
+    assert stats.update({'battery': 24.0}, 10.0)['timeToReserve'] == 0.0
+
+
+def test_missing_and_non_numeric_values_are_skipped():
+    stats = TelemetryStats()
+    stats.update({'altitude': 10.0}, 0.0)
+    for value in (None, 'high', True, float('nan'), float('inf')):
+        stats.update({'altitude': value}, 1.0)
+    field = stats.snapshot()['fields']['altitude']
+    assert field['latest'] == 10.0
+    assert field['windows']['10s']['count'] == 1
+
+
+def test_late_samples_are_filed_at_the_latest_time():
+    stats = TelemetryStats()
+    stats.update({'altitude': 1.0}, 10.0)
+    assert stats.update({'altitude': 2.0}, 5.0)['time'] == 10.0
+
+
+def test_ewma_weighs_samples_by_the_time_they_cover():
+    stats = TelemetryStats(windows={'altitude': (10.0,)}, time_constant=5.0)
+    stats.update({'altitude': 0.0}, 0.0)
+    ewma = stats.update({'altitude': 10.0}, 5.0)['fields']['altitude']['ewma']
+    assert ewma == pytest.approx(10.0 * (1.0 - math.exp(-1.0)))
+
+
+def test_registry_keeps_drones_apart():
+    registry = TelemetryStatsRegistry()
+    assert registry.snapshot('drone-1') is None
+    registry.update('drone-1', {'altitude': 5.0}, 1.0)
+    registry.update('drone-2', {'altitude': 50.0}, 1.0)
+    assert registry.snapshot('drone-1')['fields']['altitude']['latest'] == 5.0
+    assert registry.snapshot('drone-2')['fields']['altitude']['latest'] == 50.0
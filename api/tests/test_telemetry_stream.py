@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from services.telemetry_store import DEFAULT_DRONE_ID
+
+
+def open_stream(server, client, query=''):
+    """Open the SSE stream; returns the response and the subscription the request made"""
+    before = set(server.telemetry_broadcaster.subscriptions)
+    response = client.get('/api/telemetry/stream' + query, buffered=False)
+    added = set(server.telemetry_broadcaster.subscriptions) - before
+    return response, added.pop() if added else None
+
+
+def events(response):
+    """Telemetry payloads of a stream, skipping the retry preamble"""
+    for chunk in response.response:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith('id:'):
+            yield json.loads(chunk.split('data: ', 1)[1])
+
+
+@pytest.mark.parametrize('query, drone_id', [
+    ('', DEFAULT_DRONE_ID),
+    ('?droneId=stream-a', 'stream-a'),
+    ('?allDrones=true', None),
+])
+def test_stream_defaults_to_the_requesting_drone(server, client, query, drone_id):
+    response, subscription = open_stream(server, client, query)
+    try:
+        assert response.status_code == 200
+        assert subscription.drone_id == drone_id
+    finally:
+        response.close()
+    assert subscription not in server.telemetry_broadcaster.subscriptions
+
+
+def test_stream_carries_only_its_drone(server, client):
+    response, _ = open_stream(server, client, '?droneId=stream-b')
+    try:
+        server.telemetry_broadcaster.publish('stream-c', {'altitude': 1.0}, 10.0)
+        server.telemetry_broadcaster.publish('stream-b', {'altitude': 2.0}, 11.0)
+        frame = next(events(response))
+        assert frame['droneId'] == 'stream-b'
+        assert frame['telemetry'] == {'altitude': 2.0}
+    finally:
+        response.close()
+
+
+def test_invalid_drone_id_is_rejected(client):
+    assert client.get('/api/telemetry/stream?droneId=../x').status_code == 400
+
+
+@pytest.mark.parametrize('queue', ['0', '-3', 'many', '100000'])
+def test_invalid_queue_sizes_are_rejected(server, client, queue):
+    before = len(server.telemetry_broadcaster.subscriptions)
+    response = client.get(f'/api/telemetry/stream?queue={queue}')
+    assert response.status_code == 400
+    assert len(server.telemetry_broadcaster.subscriptions) == before
+
+
+def test_queue_size_is_applied(server, client):
+    response, subscription = open_stream(server, client, '?queue=16')
+    try:
+        assert subscription.frames.maxlen == 16
+    finally:
+        response.close()
@@ -0,0 +1,64 @@
+import pytest
+
+from controllers.drone_controller import DroneController
+from services.geo import DEFAULT_HOME, square_area
+from services.terrain import TerrainModel
+
+
+@pytest.fixture
+def drones(server):
+    """The default drone in mock mode and a second drone in production mode"""
+    mock = server.sessions.get('drone-1')
+    production = server.sessions.get('reload-production')
+    # MockController has no lifecycle to stop, so switch the production drone's controllers directly
+    production.mock_mode = False
+    production.drone_controller.set_mock_mode(False)
+    yield mock, production
+    server.sessions.sessions.pop('reload-production', None)
+
+
+def terrain_versions(*sessions):
+    return [session.drone_controller.get_plan_cache_stats()['terrainVersion'] for session in sessions]
+
+
+def test_reload_invalidates_every_drone(client, drones):
+    before = terrain_versions(*drones)
+    response = client.post('/api/terrain/reload')
+    assert response.status_code == 200
+    assert response.get_json()['success']
+    assert terrain_versions(*drones) == [version + 1 for version in before]
+
+
+def test_one_failing_drone_does_not_skip_the_others(client, drones, monkeypatch):
+    mock, production = drones
+
+    def fail(reason=None):
+        raise RuntimeError("cache unavailable")
+
+    monkeypatch.setattr(mock.drone_controller, 'invalidate_plans', fail)
+    before = terrain_versions(production)
+    response = client.post('/api/terrain/reload')
+    assert response.status_code == 500
+    assert 'drone-1' in response.get_json()['message']
+    assert terrain_versions(production) == [before[0] + 1]
+
+
+@pytest.mark.parametrize('clearance', ['high', [30], {}])
+def test_invalid_terrain_clearance_is_rejected(client, clearance):
+    response = client.post('/api/drone/mission', json={'terrainClearance': clearance})
+    assert response.status_code == 400
+
+
+def test_terrain_swap_changes_the_plan_key(tmp_path):
+    controller = DroneController()
+    controller.set_terrain_model(TerrainModel(str(tmp_path)))
+    area = square_area(DEFAULT_HOME, 100)
+    controller.create_mission('Search Grid', 100, 50, 5, 0.5, True, False, area=area)
+    controller.create_mission('Search Grid', 100, 50, 5, 0.5, True, False, area=area)
+    assert controller.get_plan_cache_stats()['hits'] == 1
+
+    # A reload the plan cache is never told about still misses
+    controller.terrain.reload()
+    controller.create_mission('Search Grid', 100, 50, 5, 0.5, True, False, area=area)
+    stats = controller.get_plan_cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, 2)
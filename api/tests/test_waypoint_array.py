@@ -0,0 +1,104 @@
+import random
+import struct
+
+import numpy as np
+import pytest
+
+from services.waypoint_array import (
+    CAPTURE_PHOTO, CAPTURE_TRIGGER, HEADER, MAGIC, WaypointArray
+)
+
+
+def random_array(rng, count):
+    return WaypointArray.from_columns(
+        [37.77 + rng.uniform(-0.01, 0.01) for _ in range(count)],
+        [-122.42 + rng.uniform(-0.01, 0.01) for _ in range(count)],
+        alt=[rng.uniform(10, 120) for _ in range(count)],
+        speed=5.0,
+        heading=[rng.uniform(0, 360) for _ in range(count)],
+        gimbal_pitch=-60.0,
+        capture=[rng.choice((0, CAPTURE_PHOTO, CAPTURE_PHOTO | CAPTURE_TRIGGER)) for _ in range(count)]
+    )
+
+
+def assert_same(a, b):
+    assert len(a) == len(b)
+    np.testing.assert_array_equal(a.columns, b.columns)
+    np.testing.assert_array_equal(a.capture, b.capture)
+
+
+@pytest.mark.parametrize('count', [0, 1, 2, 257])
+def test_binary_round_trip(count):
+    waypoints = random_array(random.Random(count), count)
+    buffer = waypoints.encode()
+    assert len(buffer) == HEADER.size + waypoints.nbytes
+    decoded = WaypointArray.decode(buffer)
+    assert_same(decoded, waypoints)
+    assert not decoded.columns.flags.writeable
+
+
+def test_binary_round_trip_of_views():
+    waypoints = random_array(random.Random(1), 50)
+    for view in (waypoints[10:30], waypoints[::3], waypoints[::-1]):
+        assert_same(WaypointArray.decode(view.encode()), view)
+
+
+def test_decode_rejects_foreign_buffers():
+    buffer = random_array(random.Random(2), 5).encode()
+    with pytest.raises(ValueError):
+        WaypointArray.decode(b'XXXX' + buffer[4:])
+    with pytest.raises(ValueError):
+        WaypointArray.decode(struct.pack('<4sH', MAGIC, 99) + buffer[6:])
+    with pytest.raises(ValueError):
+        WaypointArray.decode(buffer[:-1])
+
+
+def test_dict_round_trip():
+    waypoints = random_array(random.Random(3), 20)
+    dicts = waypoints.to_dicts()
+    assert set(dicts[0]) == set(WaypointArray.JSON_KEYS) | {'capture'}
+    assert_same(WaypointArray.from_dicts(dicts), waypoints)
+    assert waypoints.to_dicts(5, 8) == dicts[5:8]
+    assert waypoints[-1] == dicts[-1]
+    with pytest.raises(IndexError):
+        waypoints[20]
+
+
+def test_from_dicts_defaults():
+    waypoints = WaypointArray.from_dicts([{'lat': 1.0, 'lon': 2.0}])
+    assert waypoints[0] == {'lat': 1.0, 'lon': 2.0, 'alt': 0.0, 'speed': 0.0, 'heading': 0.0,
+                            'gimbalPitch': -90.0, 'capture': 0}
+    assert len(WaypointArray.from_dicts([])) == 0
+
+
+def test_concatenate():
+    rng = random.Random(4)
+    parts = [random_array(rng, count) for count in (3, 0, 4)]
+    joined = WaypointArray.concatenate(parts)
+    assert joined.to_dicts() == [wp for part in parts for wp in part.to_dicts()]
+    assert len(WaypointArray.concatenate([])) == 0
+
+
+def reference_matching_ends(a, b):
+    a, b = a.to_dicts(), b.to_dicts()
+    prefix = 0
+    while prefix < min(len(a), len(b)) and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(len(a), len(b)) - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def test_matching_ends_matches_reference():
+    rng = random.Random(5)
+    for _ in range(300):
+        a = random_array(rng, rng.randint(0, 12))
+        # Edit a copy: replace a random span with fresh waypoints, or none at all
+        start = rng.randint(0, len(a))
+        stop = rng.randint(start, len(a))
+        b = WaypointArray.concatenate((a[:start], random_array(rng, rng.randint(0, 3)), a[stop:]))
+        if len(b) and rng.random() < 0.3:
+            b.capture[rng.randrange(len(b))] ^= CAPTURE_TRIGGER
+        assert a.matching_ends(b) == reference_matching_ends(a, b)
+        assert b.matching_ends(a) == reference_matching_ends(b, a)
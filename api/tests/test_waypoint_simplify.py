@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from services.geo import LocalFrame
+from services.waypoint_array import CAPTURE_PHOTO, CAPTURE_TRIGGER, WaypointArray
+from services.waypoint_simplify import douglas_peucker_mask, simplification_mask, simplify_waypoints
+
+
+def reference_douglas_peucker(x, y, z, tolerance, anchors):
+    """Textbook recursive Douglas-Peucker, run between consecutive anchors"""
+    points = np.column_stack((x, y, z))
+    keep = anchors.copy()
+    keep[0] = keep[-1] = True
+
+    def simplify(first, last):
+        if last - first < 2:
+            return
+        a, b = points[first], points[last]
+        ab = b - a
+        inner = points[first + 1:last]
+        length_sq = ab @ ab
+        t = np.clip((inner - a) @ ab / length_sq, 0.0, 1.0) if length_sq > 0 else np.zeros(len(inner))
+        distance = np.linalg.norm(inner - (a + t[:, None] * ab), axis=1)
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            keep[first + 1 + farthest] = True
+            simplify(first, first + 1 + farthest)
+            simplify(first + 1 + farthest, last)
+
+    kept = np.flatnonzero(keep)
+    for first, last in zip(kept[:-1], kept[1:]):
+        simplify(first, last)
+    return keep
+
+
+def wandering_path(rng, count):
+    x = np.cumsum(rng.normal(0, 3, count))
+    y = np.cumsum(rng.normal(2, 3, count))
+    z = 50 + np.cumsum(rng.normal(0, 0.3, count))
+    return x, y, z
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_recursive_douglas_peucker(seed):
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(3, 300))
+    x, y, z = wandering_path(rng, count)
+    anchors = rng.random(count) < 0.05
+    tolerance = float(rng.uniform(0.2, 5.0))
+
+    expected = reference_douglas_peucker(x, y, z, tolerance, anchors)
+
+    np.testing.assert_array_equal(douglas_peucker_mask(x, y, z, tolerance, anchors), expected)
+
+
+def test_collinear_waypoints_collapse_to_the_ends():
+    waypoints = WaypointArray.from_columns(np.linspace(47.0, 47.01, 50), np.full(50, 8.0), 50.0, 5.0)
+
+    keep, simplified = simplification_mask(waypoints)
+
+    assert np.flatnonzero(keep).tolist() == [0, 49]
+    assert len(simplified) == 2
+
+
+def test_capture_triggers_and_action_changes_are_kept():
+    count = 40
+    capture = np.zeros(count, dtype=np.uint8)
+    capture[7] = CAPTURE_TRIGGER
+    capture[20:] = CAPTURE_PHOTO
+    speed = np.full(count, 5.0)
+    speed[30:] = 8.0
+    waypoints = WaypointArray.from_columns(np.linspace(47.0, 47.01, count), np.full(count, 8.0), 50.0, speed,
+                                           capture=capture)
+
+    keep, _ = simplification_mask(waypoints)
+
+    assert np.flatnonzero(keep).tolist() == [0, 7, 20, 30, count - 1]
+
+
+def test_headings_follow_the_kept_legs():
+    # North to a corner, then east; the points in between are redundant
+    lat = np.array([47.0, 47.001, 47.002, 47.002, 47.002])
+    lon = np.array([8.0, 8.0, 8.0, 8.001, 8.002])
+    waypoints = WaypointArray.from_columns(lat, lon, 50.0, 5.0, heading=123.0)
+
+    keep, simplified = simplification_mask(waypoints)
+
+    assert np.flatnonzero(keep).tolist() == [0, 2, 4]
+    np.testing.assert_allclose(simplified.heading, [0.0, 90.0, 90.0], atol=1e-6)
+
+
+def test_simplified_path_stays_within_tolerance():
+    rng = np.random.default_rng(3)
+    count = 500
+    x, y, z = wandering_path(rng, count)
+    frame = LocalFrame(47.0, 8.0)
+    lat, lon = frame.to_geodetic(x, y)
+    waypoints = WaypointArray.from_columns(lat, lon, z, 5.0)
+
+    simplified, report = simplify_waypoints(waypoints, tolerance=1.0)
+
+    assert report['originalCount'] == count
+    assert report['simplifiedCount'] == len(simplified) < count
+    # Every dropped point lies within the tolerance of the kept leg it falls on
+    keep, _ = simplification_mask(waypoints, tolerance=1.0)
+    kx, ky = frame.to_local(simplified.lat, simplified.lon)
+    px, py = frame.to_local(lat, lon)
+    kept = np.flatnonzero(keep)
+    leg = np.searchsorted(kept, np.arange(count), side='right') - 1
+    leg = np.minimum(leg, len(kept) - 2)
+    a = np.column_stack((kx[leg], ky[leg], simplified.alt[leg]))
+    b = np.column_stack((kx[leg + 1], ky[leg + 1], simplified.alt[leg + 1]))
+    p = np.column_stack((px, py, z))
+    ab = b - a
+    t = np.clip(np.einsum('ij,ij->i', p - a, ab) / np.einsum('ij,ij->i', ab, ab), 0.0, 1.0)
+    distance = np.linalg.norm(p - (a + t[:, None] * ab), axis=1)
+    assert distance.max() <= 1.0 + 1e-6
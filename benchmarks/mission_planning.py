@@ -0,0 +1,329 @@
+"""
+Mission planning benchmarks.
+
+Times DroneController.create_mission across mission types, area sizes and track spacings, plus
+the desktop app's generate_mission path with Qt running headless, and writes the results as
+JSON so two commits can be compared:
+
+    python benchmarks/mission_planning.py --output bench.json
+    python benchmarks/mission_planning.py --output new.json --compare bench.json
+
+Every case records wall time (min and median over the repeats), peak traced memory and the
+waypoint count. The plan cache is invalidated before every run so each one plans from scratch.
+The desktop suite needs PyQt6; a run that cannot do a requested suite fails unless --allow-skip
+is given (or only --suite planner is asked for), so a comparison never quietly loses half its cases.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'api'))
+
+from controllers.drone_controller import DroneController
+from services.geo import DEFAULT_HOME, LocalFrame
+
+# Area sizes (meters per side), lane spacings and pattern types of the full matrix
+GRID_SIZES = (250, 500, 1000, 2000)
+TRACK_SPACINGS = (10, 20, 40)
+PATTERN_TYPES = ('Expanding Square', 'Sector Search', 'Creeping Line', 'Track Line')
+TARGET_COUNTS = (50, 200, 500)
+
+# Heading optimization evaluates dozens of sweeps per plan, so it runs on the smaller areas only
+OPTIMIZE_GRID_SIZES = (250, 500, 1000)
+
+# Matrix used with --quick
+QUICK_GRID_SIZES = (250, 1000)
+QUICK_TRACK_SPACINGS = (20,)
+QUICK_TARGET_COUNTS = (50, 200)
+
+DEFAULT_REPEATS = 5
+
+# A case is flagged by --compare when its median time or peak memory grows by more than this factor
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+# Exit codes: regressions found, and a requested suite that could not run
+EXIT_REGRESSION = 1
+EXIT_SKIPPED = 2
+
+MISSION_DEFAULTS = {
+    'altitude': 50.0,
+    'speed': 5.0,
+    'capture_interval': 0.5,
+    'directional_capture': True,
+    'spotlight_enabled': False
+}
+
+
+def random_targets(count, extent, seed=0):
+    """`count` reproducible points [lat, lon] scattered over an `extent` square north-east of home"""
+    rng = np.random.default_rng(seed)
+    lat, lon = LocalFrame(*DEFAULT_HOME).to_geodetic(rng.uniform(0, extent, count), rng.uniform(0, extent, count))
+    return np.column_stack((lat, lon)).tolist()
+
+
+def planner_cases(quick=False):
+    """(case parameters, create_mission keyword arguments) of every create_mission case"""
+    grid_sizes = QUICK_GRID_SIZES if quick else GRID_SIZES
+    spacings = QUICK_TRACK_SPACINGS if quick else TRACK_SPACINGS
+    target_counts = QUICK_TARGET_COUNTS if quick else TARGET_COUNTS
+
+    cases = []
+    for grid_size in grid_sizes:
+        for spacing in spacings:
+            for optimize in (False, True):
+                if optimize and grid_size not in OPTIMIZE_GRID_SIZES:
+                    continue
+                params = {'missionType': 'Search Grid', 'gridSize': grid_size, 'trackSpacing': spacing,
+                          'optimize': optimize}
+                cases.append((params, {'mission_type': 'Search Grid', 'grid_size': grid_size,
+                                       'track_spacing': spacing, 'optimize': optimize}))
+            for pattern in PATTERN_TYPES:
+                params = {'missionType': pattern, 'gridSize': grid_size, 'trackSpacing': spacing}
+                cases.append((params, {'mission_type': pattern, 'grid_size': grid_size, 'track_spacing': spacing}))
+    for count in target_counts:
+        params = {'missionType': 'Object Tracking', 'gridSize': 2000, 'targets': count}
+        cases.append((params, {'mission_type': 'Object Tracking', 'grid_size': 2000,
+                               'targets': random_targets(count, 2000)}))
+    return cases
+
+
+def case_name(params):
+    return ' '.join(f"{key}={value}" for key, value in params.items())
+
+
+def measure(run, setup, repeats):
+    """
+    Wall times of `repeats` runs and the peak traced memory of one more, measured separately so
+    tracing does not slow the timed runs. `run` returns the waypoint count.
+    """
+    # One untimed run first, so lazy imports and first-use caches are not charged to the case
+    setup()
+    run()
+
+    times = []
+    waypoints = 0
+    for _ in range(repeats):
+        setup()
+        started = time.perf_counter()
+        waypoints = run()
+        times.append(time.perf_counter() - started)
+
+    setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'repeats': repeats,
+        'wallTime': {'min': min(times), 'median': statistics.median(times)},
+        'peakMemory': peak,
+        'waypointCount': waypoints
+    }
+
+
+def bench_planner(repeats, quick=False):
+    """create_mission on the API's drone controller"""
+    controller = DroneController()
+    results = []
+    for params, kwargs in planner_cases(quick):
+        arguments = dict(MISSION_DEFAULTS, **kwargs)
+
+        def run():
+            return controller.create_mission(**arguments)['waypointCount']
+
+        result = measure(run, controller.invalidate_plans, repeats)
+        result.update({'suite': 'planner', 'name': case_name(params), 'params': params})
+        results.append(result)
+        print(f"planner  {result['name']:<70} {result['wallTime']['median'] * 1000:9.2f} ms "
+              f"{result['waypointCount']:7d} wp")
+    return results
+
+
+def bench_desktop(repeats, quick=False):
+    """
+    The Qt app's generate_mission with an offscreen platform. Returns (results, skip reason);
+    the suite is skipped when PyQt or the app's own modules are not importable.
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.append(ROOT)
+    try:
+        from PyQt6.QtWidgets import QApplication
+        from sar_mission_control import SARMissionControl
+    except ImportError as e:
+        return [], f"desktop app not importable: {e}"
+
+    app = QApplication.instance() or QApplication([])
+    window = SARMissionControl()
+    # Telemetry is read on a worker thread that would compete with the timed planning
+    window.telemetry_worker.stop()
+    results = []
+    try:
+        for grid_size in (QUICK_GRID_SIZES if quick else GRID_SIZES):
+            params = {'missionType': 'Search Grid', 'gridSize': grid_size}
+            window.mission_type_selector.setCurrentText('Search Grid')
+            window.grid_size_input.setText(str(grid_size))
+
+            def run():
+                window.generate_mission()
+                app.processEvents()
+                return 0 if window.mission_waypoints is None else len(window.mission_waypoints)
+
+            result = measure(run, window.mission_cache.invalidate, repeats)
+            result.update({'suite': 'desktop', 'name': case_name(params), 'params': params})
+            results.append(result)
+            print(f"desktop  {result['name']:<70} {result['wallTime']['median'] * 1000:9.2f} ms "
+                  f"{result['waypointCount']:7d} wp")
+    finally:
+        if hasattr(window, 'mock_data_generator'):
+            window.mock_data_generator.stop()
+        window.close()
+    return results, None
+
+
+def scaling_curves(results):
+    """
+    Log-log slope of median wall time against waypoint count for each mission type and
+    setting: about 1 means planning time grows linearly with mission size.
+    """
+    groups = {}
+    for result in results:
+        params = result['params']
+        key = (result['suite'],) + tuple(
+            (name, value) for name, value in params.items() if name not in ('gridSize', 'trackSpacing', 'targets')
+        )
+        groups.setdefault(key, []).append(result)
+
+    curves = []
+    for key, members in groups.items():
+        points = [(r['waypointCount'], r['wallTime']['median']) for r in members
+                  if r['waypointCount'] > 0 and r['wallTime']['median'] > 0]
+        if len({count for count, _ in points}) < 2:
+            continue
+        counts, times = np.log(np.array(points)).T
+        slope = float(np.polyfit(counts, times, 1)[0])
+        curves.append({
+            'suite': key[0],
+            'params': dict(key[1:]),
+            'points': [{'waypointCount': count, 'wallTime': wall} for count, wall in sorted(points)],
+            'exponent': slope
+        })
+    return curves
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def missing_cases(results, baseline):
+    """Baseline cases this run has no result for, e.g. a suite that was skipped this time"""
+    current = {(r['suite'], r['name']) for r in results}
+    return [{'suite': r['suite'], 'name': r['name']} for r in baseline['results']
+            if (r['suite'], r['name']) not in current]
+
+
+def compare(results, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """Cases whose median wall time or peak memory grew by more than `threshold` against the baseline"""
+    previous = {(r['suite'], r['name']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['suite'], result['name']))
+        if old is None:
+            continue
+        for metric, new_value, old_value in (
+            ('wallTime', result['wallTime']['median'], old['wallTime']['median']),
+            ('peakMemory', result['peakMemory'], old['peakMemory'])
+        ):
+            if old_value > 0 and new_value / old_value > threshold:
+                regressions.append({
+                    'suite': result['suite'],
+                    'name': result['name'],
+                    'metric': metric,
+                    'baseline': old_value,
+                    'current': new_value,
+                    'ratio': new_value / old_value
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark mission planning")
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON results")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS, help="Timed runs per case")
+    parser.add_argument('--quick', action='store_true', help="Run a reduced matrix")
+    parser.add_argument('--suite', choices=('all', 'planner', 'desktop'), default='all')
+    parser.add_argument('--compare', help="Earlier results to check for regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Slowdown/growth factor reported as a regression")
+    parser.add_argument('--allow-skip', action='store_true',
+                        help="Succeed even when a requested suite cannot run here")
+    args = parser.parse_args(argv)
+
+    # Planner logging would otherwise dominate the output
+    logging.disable(logging.INFO)
+
+    results = []
+    skipped = []
+    if args.suite in ('all', 'planner'):
+        results.extend(bench_planner(args.repeats, args.quick))
+    if args.suite in ('all', 'desktop'):
+        desktop, reason = bench_desktop(args.repeats, args.quick)
+        results.extend(desktop)
+        if reason:
+            skipped.append({'suite': 'desktop', 'reason': reason})
+            print(f"desktop  SKIPPED: {reason}", file=sys.stderr)
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'results': results,
+        'skipped': skipped,
+        'scaling': scaling_curves(results)
+    }
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report['baseline'] = baseline.get('commit')
+        report['regressions'] = compare(results, baseline, args.threshold)
+        report['missing'] = missing_cases(results, baseline)
+        for regression in report['regressions']:
+            print(f"REGRESSION {regression['suite']} {regression['name']}: {regression['metric']} "
+                  f"x{regression['ratio']:.2f}")
+        if report['missing']:
+            print(f"MISSING {len(report['missing'])} baseline cases were not run", file=sys.stderr)
+        exit_code = EXIT_REGRESSION if report['regressions'] else 0
+    if skipped and not args.allow_skip:
+        print("Requested suites were skipped; run --suite planner or pass --allow-skip to accept that",
+              file=sys.stderr)
+        exit_code = EXIT_SKIPPED
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
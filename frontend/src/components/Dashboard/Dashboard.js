@@ -29,6 +29,7 @@ function Dashboard() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [droneConnected, setDroneConnected] = useState(false);
+  const [droneId, setDroneId] = useState(null);
   const [telemetry, setTelemetry] = useState(null);
   const [detections, setDetections] = useState([]);
   const [missionActive, setMissionActive] = useState(false);
@@ -42,6 +43,7 @@ function Dashboard() {
         setLoading(true);
         const response = await ApiService.getSystemStatus();
         setDroneConnected(response.data.connected);
+        setDroneId(response.data.droneId);
         setError(null);
       } catch (err) {
         console.error('Failed to load status:', err);
@@ -54,30 +56,59 @@ function Dashboard() {
     loadStatus();
   }, []);
 
-  // Poll telemetry when drone is connected
+  // Stream telemetry when drone is connected, falling back to polling if streaming fails
   useEffect(() => {
     let intervalId;
+    let source;
     
-    if (droneConnected) {
+    const applyTelemetry = (data) => {
+      setTelemetry(data);
+      
+      // Update detections if available in telemetry
+      if (data && data.detections) {
+        setDetections(data.detections);
+      }
+    };
+    
+    const startPolling = () => {
       intervalId = setInterval(async () => {
         try {
           const response = await ApiService.getTelemetry();
-          setTelemetry(response.data.telemetry);
-          
-          // Update detections if available in telemetry
-          if (response.data.telemetry.detections) {
-            setDetections(response.data.telemetry.detections);
-          }
+          applyTelemetry(response.data.telemetry);
         } catch (err) {
           console.error('Failed to fetch telemetry:', err);
         }
       }, 1000);
+    };
+    
+    if (droneConnected) {
+      if (typeof EventSource !== 'undefined') {
+        source = ApiService.streamTelemetry(
+          droneId,
+          frame => {
+            // Only this dashboard's drone, even if the server streams others alongside it
+            if (!droneId || frame.droneId === droneId) {
+              applyTelemetry(frame.telemetry);
+            }
+          },
+          () => {
+            // EventSource retries on its own; only give up if the stream was closed for good
+            if (source.readyState === EventSource.CLOSED && !intervalId) {
+              console.error('Telemetry stream closed, polling instead');
+              startPolling();
+            }
+          }
+        );
+      } else {
+        startPolling();
+      }
     }
     
     return () => {
+      if (source) source.close();
       if (intervalId) clearInterval(intervalId);
     };
-  }, [droneConnected]);
+  }, [droneConnected, droneId]);
 
   const handleConnectDrone = async () => {
     try {
@@ -68,6 +68,16 @@ const ApiService = {
   connectDrone: (connectionDetails) => apiClient.post('/drone/connect', connectionDetails),
   disconnectDrone: () => apiClient.post('/drone/disconnect'),
   getTelemetry: () => apiClient.get('/telemetry'),
+  // Server-sent telemetry frames of one drone; returns the EventSource so the caller can close it
+  streamTelemetry: (droneId, onFrame, onError) => {
+    const query = droneId ? `?droneId=${encodeURIComponent(droneId)}` : '';
+    const source = new EventSource(`${API_BASE_URL}/telemetry/stream${query}`);
+    source.addEventListener('telemetry', event => onFrame(JSON.parse(event.data)));
+    if (onError) {
+      source.onerror = onError;
+    }
+    return source;
+  },
   createMission: (missionData) => apiClient.post('/drone/mission', missionData),
   uploadMission: () => apiClient.post('/drone/mission/upload'),
   startMission: () => apiClient.post('/drone/mission/start'),
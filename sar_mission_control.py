@@ -1,11 +1,14 @@
 import sys
 import os
 import json
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QComboBox, QGridLayout, 
-                            QGroupBox, QStatusBar, QSplitter, QFrame, QCheckBox, QLineEdit)
-from PyQt6.QtCore import Qt, QTimer, pyqtSlot, pyqtSignal, QThread
+                            QGroupBox, QStatusBar, QSplitter, QFrame, QCheckBox, QLineEdit, QListView)
+from PyQt6.QtCore import Qt, QTimer, pyqtSlot, pyqtSignal, QThread, QAbstractListModel, QModelIndex
 from PyQt6.QtGui import QFont, QIcon, QPixmap, QColor
 import pyqtgraph as pg
 import numpy as np
@@ -18,6 +21,231 @@ from telemetry_parser import TelemetryParser
 from settings_manager import SettingsManager
 from mock_data_generator import MockDataGenerator
 
+# Mission planning services live in the API package and import each other as `services.*`
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+from services.camera_triggers import plan_trigger_schedule
+from services.mission_cache import MissionPlanCache
+from services.telemetry_stats import GROUND_SPEED_WINDOW, RollingWindow, TelemetryStats
+from services.telemetry_stream import DEFAULT_STREAM_RATE
+from services.terrain import DEFAULT_EXPORT_CELL_SIZE, TerrainModel
+from services.waypoint_array import CAPTURE_DIRECTIONAL, CAPTURE_PHOTO, WaypointArray
+
+# Lines kept in the telemetry log; older ones are dropped, so the log never grows with the mission
+TELEMETRY_LOG_LINES = 2000
+
+# Log lines arriving within this many milliseconds are shown together in one view update
+TELEMETRY_LOG_FLUSH_MS = 16
+
+# Samples kept per live graph: ten minutes at 50 Hz
+GRAPH_CAPACITY = 30000
+
+# Live graphs are redrawn at most this many times per second, however fast telemetry arrives
+GRAPH_FPS = 30
+
+# Telemetry fields plotted on the telemetry tab's live graphs
+GRAPH_FIELDS = ('altitude', 'speed', 'battery')
+
+# Samples held for the UI between snapshots; a UI that falls further behind gets only the newest
+SNAPSHOT_MAX_SAMPLES = 500
+
+# Seconds of snapshot latencies the UI latency readout covers
+UI_LATENCY_WINDOW = 60.0
+
+
+class TelemetryWorker(QThread):
+    """
+    Reads telemetry off the GUI thread, so a slow link never stalls the window. The source is
+    polled faster than it updates, so a reading is only kept when it is a new sample: one whose
+    own timestamp has advanced or, for sources without one, whose values have changed. Samples
+    read since the UI last took a snapshot are coalesced into one, and a new snapshot is only
+    signalled once the UI has handled the previous one, so the GUI event queue never holds more
+    than one.
+    """
+
+    snapshot_ready = pyqtSignal(dict)
+    read_failed = pyqtSignal(str)
+
+    def __init__(self, source, rate=DEFAULT_STREAM_RATE, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.samples = deque(maxlen=SNAPSHOT_MAX_SAMPLES)
+        # The last sample kept, which repeated reads of the same sample are compared against
+        self.last_sample = None
+        # Bumped on every source change, so the UI can drop snapshots of the previous source
+        self.generation = 0
+        self.awaiting_ui = False
+        self.polls = 0
+        self.errors = 0
+        self.read_time_total = 0.0
+        self.read_time_max = 0.0
+
+    def set_source(self, source):
+        """Read from a new source from the next poll on, discarding samples of the old one"""
+        with self.lock:
+            self.source = source
+            self.samples.clear()
+            self.last_sample = None
+            self.generation += 1
+
+    def is_new_sample(self, telemetry):
+        """Whether a reading is a sample not kept yet, rather than the last one read again"""
+        last = self.last_sample
+        if last is None:
+            return True
+        timestamp = telemetry.get('timestamp')
+        if timestamp is not None and last.get('timestamp') is not None:
+            return timestamp > last['timestamp']
+        return telemetry != last
+
+    def run(self):
+        next_tick = time.monotonic()
+        failing = False
+        while not self.stop_event.is_set():
+            with self.lock:
+                source, generation = self.source, self.generation
+            started = time.monotonic()
+            try:
+                telemetry = source() if source is not None else None
+                failing = False
+            except Exception as e:
+                telemetry = None
+                self.errors += 1
+                # Reported once per run of failures rather than on every poll
+                if not failing:
+                    self.read_failed.emit(str(e))
+                failing = True
+            read_time = time.monotonic() - started
+            self.polls += 1
+            self.read_time_total += read_time
+            self.read_time_max = max(self.read_time_max, read_time)
+
+            snapshot = None
+            with self.lock:
+                if generation == self.generation and telemetry and self.is_new_sample(telemetry):
+                    # Copied, so a source that updates its sample in place cannot change one kept
+                    self.last_sample = dict(telemetry)
+                    self.samples.append((time.time(), self.last_sample))
+                if not self.awaiting_ui and self.samples:
+                    snapshot = {
+                        'generation': self.generation,
+                        'samples': list(self.samples),
+                        'emitted': time.monotonic()
+                    }
+                    self.samples.clear()
+                    self.awaiting_ui = True
+            if snapshot is not None:
+                self.snapshot_ready.emit(snapshot)
+
+            # Fixed-rate schedule that does not drift with the time spent reading the link
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self.stop_event.wait(delay)
+
+    def snapshot_handled(self):
+        """Called by the UI once it has applied a snapshot; the next one may then be signalled"""
+        with self.lock:
+            self.awaiting_ui = False
+
+    def stop(self):
+        self.stop_event.set()
+        self.wait()
+
+    def stats(self):
+        return {
+            'polls': self.polls,
+            'errors': self.errors,
+            'readTimeMean': self.read_time_total / self.polls if self.polls else 0.0,
+            'readTimeMax': self.read_time_max
+        }
+
+
+class GraphBuffer:
+    """
+    Fixed-size ring of one graph's (time, value) samples in preallocated arrays. Each sample is
+    written twice, at its slot and one capacity further on, so the latest samples are always one
+    contiguous slice that the curve can plot without copying or rebuilding lists.
+    """
+
+    def __init__(self, capacity=GRAPH_CAPACITY):
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity)
+        self.values = np.zeros(2 * capacity)
+        self.count = 0
+
+    def append(self, t, value):
+        slot = self.count % self.capacity
+        self.times[slot] = self.times[slot + self.capacity] = t
+        self.values[slot] = self.values[slot + self.capacity] = value
+        self.count += 1
+
+    def view(self):
+        """(times, values) of the buffered samples, oldest first, as views of the buffers"""
+        if self.count <= self.capacity:
+            return self.times[:self.count], self.values[:self.count]
+        head = self.count % self.capacity
+        return self.times[head:head + self.capacity], self.values[head:head + self.capacity]
+
+
+class TelemetryLogModel(QAbstractListModel):
+    """
+    Newest-first telemetry log lines in a bounded deque. New lines are queued and inserted in one
+    batch per flush, trimming the oldest in the same pass, so the cost of an update depends on the
+    lines added, not on how long the log is.
+    """
+
+    def __init__(self, max_lines=TELEMETRY_LOG_LINES, parent=None):
+        super().__init__(parent)
+        self.lines = deque(maxlen=max_lines)
+        self.pending = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(TELEMETRY_LOG_FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid() and index.row() < len(self.lines):
+            return self.lines[index.row()]
+        return None
+
+    def append(self, line):
+        """Queue a line; it is shown with the rest of its batch at the next flush"""
+        self.pending.append(line)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        if not self.pending:
+            return
+        max_lines = self.lines.maxlen
+        batch = self.pending[-max_lines:]
+        self.pending = []
+
+        overflow = len(self.lines) + len(batch) - max_lines
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), len(self.lines) - overflow, len(self.lines) - 1)
+            for _ in range(overflow):
+                self.lines.pop()
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), 0, len(batch) - 1)
+        # extendleft reverses the batch, leaving the newest line first
+        self.lines.extendleft(batch)
+        self.endInsertRows()
+
+    def clear(self):
+        self.pending = []
+        self.beginResetModel()
+        self.lines.clear()
+        self.endResetModel()
+
 class SARMissionControl(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -182,6 +410,9 @@ class SARMissionControl(QMainWindow):
         self.setStatusBar(self.statusBar)
         self.statusBar.showMessage("System initialized in Mock Mode")
         
+        self.ui_latency_label = QLabel("UI latency: N/A")
+        self.statusBar.addPermanentWidget(self.ui_latency_label)
+        
         # Set central widget
         self.setCentralWidget(central_widget)
         
@@ -250,7 +481,8 @@ class SARMissionControl(QMainWindow):
         mission_type_layout = QHBoxLayout()
         mission_type_layout.addWidget(QLabel("Mission Type:"))
         self.mission_type_selector = QComboBox()
-        self.mission_type_selector.addItems(["Search Grid", "Object Tracking", "Area Mapping", "Perimeter Patrol"])
+        self.mission_type_selector.addItems(["Search Grid", "Object Tracking", "Area Mapping", "Perimeter Patrol",
+                                             "Expanding Square", "Sector Search", "Creeping Line", "Track Line"])
         mission_type_layout.addWidget(self.mission_type_selector)
         planning_layout.addLayout(mission_type_layout)
         
@@ -621,6 +853,24 @@ class SARMissionControl(QMainWindow):
         
         top_layout.addWidget(battery_group)
         
+        # Rolling trends
+        trends_group = QGroupBox("Trends")
+        trends_layout = QGridLayout(trends_group)
+        
+        self.climb_rate_label = QLabel("Climb Rate: N/A")
+        trends_layout.addWidget(self.climb_rate_label, 0, 0)
+        
+        self.avg_speed_label = QLabel(f"Avg Speed ({GROUND_SPEED_WINDOW:g} s): N/A")
+        trends_layout.addWidget(self.avg_speed_label, 0, 1)
+        
+        self.battery_drain_label = QLabel("Battery Drain: N/A")
+        trends_layout.addWidget(self.battery_drain_label, 1, 0)
+        
+        self.time_to_reserve_label = QLabel("Time to Reserve: N/A")
+        trends_layout.addWidget(self.time_to_reserve_label, 1, 1)
+        
+        top_layout.addWidget(trends_group)
+        
         layout.addLayout(top_layout)
         
         # Telemetry graphs
@@ -661,6 +911,18 @@ class SARMissionControl(QMainWindow):
         
         layout.addLayout(graphs_layout)
         
+        # Curves are fed from ring buffers and redrawn by render_graphs; long windows are drawn
+        # downsampled to the plot's pixel width (keeping peaks) and clipped to the visible range
+        self.graph_buffers = {field: GraphBuffer() for field in GRAPH_FIELDS}
+        self.graph_curves = {}
+        for field, graph in zip(GRAPH_FIELDS, (self.altitude_graph, self.speed_graph, self.battery_graph)):
+            curve = graph.plot(pen=pg.mkPen('#55aaff', width=2))
+            curve.setDownsampling(auto=True, method='peak')
+            curve.setClipToView(True)
+            self.graph_curves[field] = curve
+        self.graph_start_time = None
+        self.graphs_dirty = False
+        
         # Sensor data
         sensor_layout = QHBoxLayout()
         
@@ -730,9 +992,12 @@ class SARMissionControl(QMainWindow):
         log_group = QGroupBox("Telemetry Log")
         log_layout = QVBoxLayout(log_group)
         
-        self.telemetry_log = QLabel("No telemetry data received yet")
+        # Only the visible rows are drawn, however many lines the model holds
+        self.telemetry_log_model = TelemetryLogModel(parent=self)
+        self.telemetry_log = QListView()
+        self.telemetry_log.setModel(self.telemetry_log_model)
+        self.telemetry_log.setUniformItemSizes(True)
         self.telemetry_log.setStyleSheet("background-color: #2a2a2a; border: 1px dashed #5a5a5a; min-height: 100px; padding: 5px;")
-        self.telemetry_log.setAlignment(Qt.AlignmentFlag.AlignTop)
         log_layout.addWidget(self.telemetry_log)
         
         log_buttons_layout = QHBoxLayout()
@@ -857,16 +1122,29 @@ class SARMissionControl(QMainWindow):
         self.detection_module = DetectionModule(mock_mode=self.mock_mode)
         self.mission_planner = MissionPlanner(mock_mode=self.mock_mode)
         self.telemetry_parser = TelemetryParser(mock_mode=self.mock_mode)
+        self.mission_cache = MissionPlanCache()
+        self.terrain_model = TerrainModel()
+        self.mission_waypoints = None
+        # Rolling trends, updated with each sample the UI receives
+        self.telemetry_stats = TelemetryStats()
         
         # Start mock data generation if in mock mode
         if self.mock_mode:
             self.mock_data_generator = MockDataGenerator(update_interval=500)  # 500ms update interval
             self.mock_data_generator.start()
         
-        # Setup data refresh timer
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_ui_data)
-        self.update_timer.start(500)  # Update UI every 500ms
+        # Telemetry is read on a worker thread and handed over as snapshots, queued to the GUI
+        # thread; how long each waited there is tracked to show how responsive the UI is
+        self.ui_latency = RollingWindow(UI_LATENCY_WINDOW)
+        self.telemetry_worker = TelemetryWorker(self.telemetry_source(), parent=self)
+        self.telemetry_worker.snapshot_ready.connect(self.apply_telemetry_snapshot, Qt.ConnectionType.QueuedConnection)
+        self.telemetry_worker.read_failed.connect(self.show_telemetry_error, Qt.ConnectionType.QueuedConnection)
+        self.telemetry_worker.start()
+        
+        # Live graphs render on their own capped timer, independent of the telemetry rate
+        self.render_timer = QTimer()
+        self.render_timer.timeout.connect(self.render_graphs)
+        self.render_timer.start(1000 // GRAPH_FPS)
         
     def connect_signals(self):
         """Connect UI signals and slots"""
@@ -874,6 +1152,7 @@ class SARMissionControl(QMainWindow):
         self.connect_btn.clicked.connect(self.connect_to_drone)
         self.generate_mission_btn.clicked.connect(self.generate_mission)
         self.upload_mission_btn.clicked.connect(self.upload_mission)
+        self.export_terrain_btn.clicked.connect(self.export_terrain_model)
         
         # Connect mock settings
         self.apply_mock_settings_btn.clicked.connect(self.apply_mock_settings)
@@ -881,6 +1160,9 @@ class SARMissionControl(QMainWindow):
         # Connect settings buttons
         self.save_settings_btn.clicked.connect(self.save_settings)
         
+        # Connect telemetry log buttons
+        self.clear_log_btn.clicked.connect(self.telemetry_log_model.clear)
+        
     def change_mode(self, index):
         """Switch between mock and production modes"""
         if index == 0:  # Mock mode
@@ -900,6 +1182,7 @@ class SARMissionControl(QMainWindow):
         self.detection_module.set_mock_mode(self.mock_mode)
         self.mission_planner.set_mock_mode(self.mock_mode)
         self.telemetry_parser.set_mock_mode(self.mock_mode)
+        self.mission_cache.invalidate()
         
         # Start/stop mock data generator
         if self.mock_mode and not hasattr(self, 'mock_data_generator'):
@@ -908,12 +1191,47 @@ class SARMissionControl(QMainWindow):
         elif not self.mock_mode and hasattr(self, 'mock_data_generator'):
             self.mock_data_generator.stop()
             delattr(self, 'mock_data_generator')
+        self.telemetry_worker.set_source(self.telemetry_source())
+    
+    def telemetry_source(self):
+        """Callable the telemetry worker reads: the mock generator or the telemetry parser"""
+        if self.mock_mode:
+            return self.mock_data_generator.get_current_data
+        return self.telemetry_parser.get_latest_telemetry
+    
+    @pyqtSlot(dict)
+    def apply_telemetry_snapshot(self, snapshot):
+        """Apply the samples the telemetry worker coalesced since the last snapshot"""
+        received = time.monotonic()
+        self.ui_latency.add(received, received - snapshot['emitted'])
+        try:
+            if snapshot['generation'] != self.telemetry_worker.generation:
+                # Read before a mode switch, in the previous source's format
+                return
+            stats = None
+            for timestamp, telemetry in snapshot['samples']:
+                stats = self.telemetry_stats.update(telemetry, timestamp)
+                self.record_graph_sample(telemetry, timestamp)
+                if self.mock_mode:
+                    current_time = datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
+                    self.telemetry_log_model.append(f"{current_time} - Alt: {telemetry['altitude']:.1f}m, Spd: {telemetry['speed']:.1f}m/s, Bat: {telemetry['battery']}%")
+            if stats is not None:
+                self.update_trends(stats)
+                self.update_ui_data(snapshot['samples'][-1][1])
+        finally:
+            self.telemetry_worker.snapshot_handled()
+        self.ui_latency_label.setText(
+            f"UI latency: {self.ui_latency.mean() * 1000:.0f} ms (max {self.ui_latency.maximum() * 1000:.0f} ms)")
+    
+    @pyqtSlot(str)
+    def show_telemetry_error(self, message):
+        self.statusBar.showMessage(f"Error updating telemetry: {message}")
     
-    def update_ui_data(self):
-        """Update UI with latest data from modules"""
+    def update_ui_data(self, telemetry):
+        """Update the telemetry labels with the latest sample"""
         if self.mock_mode:
             # Update with mock data
-            mock_data = self.mock_data_generator.get_current_data()
+            mock_data = telemetry
             
             # Update flight data
             self.altitude_label.setText(f"Altitude: {mock_data['altitude']:.1f} m")
@@ -942,20 +1260,79 @@ class SARMissionControl(QMainWindow):
             
             # Update battery status
             self.battery_status.setText(f"{mock_data['battery']}%")
+        else:
+            # Real telemetry uses the API's payload keys; fields the link has not reported keep their last value
+            if 'altitude' in telemetry:
+                self.altitude_label.setText(f"Altitude: {telemetry['altitude']:.1f} m")
+            if 'speed' in telemetry:
+                self.speed_label.setText(f"Speed: {telemetry['speed']:.1f} m/s")
+            if 'distance' in telemetry:
+                self.distance_label.setText(f"Distance: {telemetry['distance']:.1f} m")
+            if 'heading' in telemetry:
+                self.heading_label.setText(f"Heading: {telemetry['heading']:.0f}° N")
+            if 'flightTime' in telemetry:
+                self.flight_time_label.setText(f"Flight Time: {telemetry['flightTime']}")
+            
+            if 'latitude' in telemetry:
+                self.latitude_label.setText(f"Latitude: {telemetry['latitude']:.5f}° N")
+            if 'longitude' in telemetry:
+                self.longitude_label.setText(f"Longitude: {telemetry['longitude']:.5f}° E")
+            if 'gnssSignal' in telemetry:
+                self.gnss_signal_label.setText(f"GNSS Signal: {telemetry['gnssSignal']}")
+                self.gnss_status.setText(telemetry['gnssSignal'])
+            if 'satellites' in telemetry:
+                self.satellites_label.setText(f"Satellites: {telemetry['satellites']}")
+            
+            if 'battery' in telemetry:
+                self.battery_percentage_label.setText(f"Battery: {telemetry['battery']:.0f}%")
+                self.battery_status.setText(f"{telemetry['battery']:.0f}%")
             
-            # Update telemetry log
-            current_time = datetime.now().strftime("%H:%M:%S")
-            self.telemetry_log.setText(f"{current_time} - Alt: {mock_data['altitude']:.1f}m, Spd: {mock_data['speed']:.1f}m/s, Bat: {mock_data['battery']}%\n" + self.telemetry_log.text())
+            if 'roll' in telemetry:
+                self.roll_label.setText(f"Roll: {telemetry['roll']:.1f}°")
+            if 'pitch' in telemetry:
+                self.pitch_label.setText(f"Pitch: {telemetry['pitch']:.1f}°")
+            if 'yaw' in telemetry:
+                self.yaw_label.setText(f"Yaw: {telemetry['yaw']:.1f}°")
+            if 'temperature' in telemetry:
+                self.temperature_label.setText(f"Temperature: {telemetry['temperature']:.1f}°C")
+    
+    def record_graph_sample(self, telemetry, timestamp):
+        """Add a sample to the live graph buffers; drawn at the next render tick"""
+        if self.graph_start_time is None:
+            self.graph_start_time = timestamp
+        t = timestamp - self.graph_start_time
+        for field, buffer in self.graph_buffers.items():
+            value = telemetry.get(field)
+            if value is not None:
+                buffer.append(t, value)
+        self.graphs_dirty = True
+    
+    def render_graphs(self):
+        """Redraw the live graphs when there are new samples and the telemetry tab is showing"""
+        if not self.graphs_dirty or self.tabs.currentWidget() is not self.telemetry_tab:
+            return
+        self.graphs_dirty = False
+        for field, curve in self.graph_curves.items():
+            curve.setData(*self.graph_buffers[field].view())
+    
+    def update_trends(self, stats):
+        """Show the rolling telemetry trends; N/A until there are enough samples"""
+        climb_rate = stats['climbRate']
+        self.climb_rate_label.setText(
+            f"Climb Rate: {climb_rate:+.1f} m/s" if climb_rate is not None else "Climb Rate: N/A")
+        ground_speed = stats['groundSpeedAvg']
+        self.avg_speed_label.setText(
+            f"Avg Speed ({GROUND_SPEED_WINDOW:g} s): {ground_speed:.1f} m/s" if ground_speed is not None
+            else f"Avg Speed ({GROUND_SPEED_WINDOW:g} s): N/A")
+        drain = stats['batteryDrainRate']
+        self.battery_drain_label.setText(
+            f"Battery Drain: {drain:.2f} %/min" if drain is not None else "Battery Drain: N/A")
+        time_to_reserve = stats['timeToReserve']
+        if time_to_reserve is None:
+            self.time_to_reserve_label.setText("Time to Reserve: N/A")
         else:
-            # In production mode, get real data from modules
-            try:
-                telemetry_data = self.telemetry_parser.get_latest_telemetry()
-                if telemetry_data:
-                    # Update UI with real telemetry data
-                    # This would be implemented with real data sources
-                    pass
-            except Exception as e:
-                self.statusBar.showMessage(f"Error updating telemetry: {str(e)}")
+            minutes, seconds = divmod(int(time_to_reserve), 60)
+            self.time_to_reserve_label.setText(f"Time to Reserve: {minutes:02d}:{seconds:02d}")
     
     def connect_to_drone(self):
         """Connect to the drone"""
@@ -992,15 +1369,19 @@ class SARMissionControl(QMainWindow):
             speed = float(self.speed_input.text())
             capture_interval = float(self.interval_input.text())
             
-            # Call mission planner to generate waypoints
-            mission_data = self.mission_planner.generate_mission(
-                mission_type=mission_type,
-                grid_size=grid_size,
-                altitude=altitude,
-                speed=speed,
-                capture_interval=capture_interval,
-                directional_capture=self.directional_checkbox.isChecked(),
-                spotlight_enabled=self.spotlight_checkbox.isChecked()
+            mission_params = {
+                'mission_type': mission_type,
+                'grid_size': grid_size,
+                'altitude': altitude,
+                'speed': speed,
+                'capture_interval': capture_interval,
+                'directional_capture': self.directional_checkbox.isChecked(),
+                'spotlight_enabled': self.spotlight_checkbox.isChecked()
+            }
+            
+            # Call mission planner to generate waypoints, reusing the plan for repeated presses
+            mission_data = self.mission_cache.get_or_create(
+                mission_params, lambda: self.mission_planner.generate_mission(**mission_params)
             )
             
             # Update waypoints display
@@ -1013,6 +1394,20 @@ class SARMissionControl(QMainWindow):
                 
             self.waypoints_display.setText(waypoints_text)
             
+            # Planned photo count and duration come from the trigger schedule along the path
+            waypoints = WaypointArray.from_dicts(mission_data['waypoints'])
+            if not waypoints.capture.any() and capture_interval > 0:
+                waypoints.capture[:] = CAPTURE_PHOTO | (CAPTURE_DIRECTIONAL if mission_params['directional_capture'] else 0)
+            self.mission_waypoints = waypoints
+            schedule = plan_trigger_schedule(waypoints, speed, capture_interval)
+            remaining = int(schedule.duration)
+            self.mapping_stats.setText(
+                "Area Covered: 0.00 km²\n"
+                f"Images Captured: 0 / {len(schedule)}\n"
+                f"Estimated Completion: {remaining // 3600:02d}:{remaining % 3600 // 60:02d}:{remaining % 60:02d}\n"
+                "Resolution: 0.0 cm/px"
+            )
+            
             # Update mission info
             self.mission_status_label.setText("Status: Ready")
             
@@ -1022,6 +1417,26 @@ class SARMissionControl(QMainWindow):
         except Exception as e:
             self.statusBar.showMessage(f"Error generating mission: {str(e)}")
     
+    def export_terrain_model(self):
+        """Export the terrain under the current mission; tiles are streamed, never loaded whole"""
+        if self.mission_waypoints is None or len(self.mission_waypoints) == 0:
+            self.statusBar.showMessage("Generate a mission before exporting its terrain model")
+            return
+        if len(self.terrain_model) == 0:
+            self.statusBar.showMessage(f"No DEM tiles found in {self.terrain_model.directory}")
+            return
+        
+        try:
+            lat, lon = self.mission_waypoints.lat, self.mission_waypoints.lon
+            save_dir = self.save_path_input.text()
+            os.makedirs(save_dir, exist_ok=True)
+            file_path = os.path.join(save_dir, f"terrain_{datetime.now().strftime('%Y%m%d_%H%M%S')}.asc")
+            rows, cols = self.terrain_model.export(lat.min(), lat.max(), lon.min(), lon.max(),
+                                                     DEFAULT_EXPORT_CELL_SIZE, file_path)
+            self.statusBar.showMessage(f"Exported {rows}x{cols} terrain model to {file_path}")
+        except Exception as e:
+            self.statusBar.showMessage(f"Error exporting terrain model: {str(e)}")
+    
     def upload_mission(self):
         """Upload mission to drone"""
         if self.mock_mode:
@@ -1172,6 +1587,11 @@ class SARMissionControl(QMainWindow):
             self.statusBar.showMessage("Settings saved successfully")
         except Exception as e:
             self.statusBar.showMessage(f"Error saving settings: {str(e)}")
+    
+    def closeEvent(self, event):
+        """Stop the telemetry worker before the window goes away"""
+        self.telemetry_worker.stop()
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":